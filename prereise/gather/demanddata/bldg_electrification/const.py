@@ -1,4 +1,6 @@
 import os
+import tempfile
+from functools import lru_cache
 
 import numpy as np
 import pandas as pd
@@ -740,6 +742,63 @@ iso_zone_name_shps = {
     ],
 }
 
+# States overlaid to draw the load zones of multi-state ISOs
+iso_states = {
+    "NE": ["MA", "ME", "NH", "VT", "CT", "RI"],
+    "PJM": [
+        "DE",
+        "IL",
+        "IN",
+        "KY",
+        "MD",
+        "NC",
+        "MI",
+        "NJ",
+        "OH",
+        "PA",
+        "VA",
+        "WV",
+        "TN",
+        "DC",
+    ],
+    "SPP": [
+        "KS",
+        "OK",
+        "NM",
+        "TX",
+        "AR",
+        "LA",
+        "MO",
+        "SD",
+        "ND",
+        "MT",
+        "MN",
+        "IA",
+        "WY",
+        "NE",
+    ],
+    "MISO": [
+        "LA",
+        "AR",
+        "MS",
+        "MI",
+        "MO",
+        "KY",
+        "IN",
+        "IL",
+        "IA",
+        "MN",
+        "WI",
+        "ND",
+        "SD",
+        "TX",
+        "MT",
+    ],
+    "SW": ["AZ", "NM", "CO", "NV", "WY", "SD", "NE"],
+    "NW": ["CA", "WA", "OR", "ID", "NV", "UT", "WY", "MT"],
+    "SE": ["MO", "KY", "MS", "TN", "AL", "GA", "NC", "SC", "FL", "VA"],
+}
+
 classes = ["res", "com"]
 
 # Years with temperature data
@@ -750,15 +809,16 @@ yr_temps_first, yr_temps_last = yr_temps_all[0], yr_temps_all[-1]
 # (a) 50th percentile NEEP CCHP database [midperfhp],
 # (b) 90th percentile NEEP CCHP database [advperfhp],
 # (c) future HP targets, average of residential and commercial targets [futurehp]
+# are stored in hp_param and hp_param_dhw. These and the puma tables are read on
+# first access, see get_table()
 dir_path = os.path.dirname(os.path.abspath(__file__))
-hp_param = pd.read_csv(os.path.join(dir_path, "data", "hp_parameters.csv"))
-hp_param_dhw = pd.read_csv(os.path.join(dir_path, "data", "hp_parameters_dhw.csv"))
-puma_data = pd.read_csv(
-    os.path.join(dir_path, "data", "puma_data.csv"), index_col="puma"
-)
-puma_fuel = pd.read_csv(
-    os.path.join(dir_path, "data", "puma_fuel.csv"), index_col="puma"
-)
+tables = {
+    "hp_param": ("hp_parameters.csv", None),
+    "hp_param_dhw": ("hp_parameters_dhw.csv", None),
+    "puma_data": ("puma_data.csv", "puma"),
+    "puma_fuel": ("puma_fuel.csv", "puma"),
+}
+_table_cache_dir = None
 
 # Reference temperatures for computations
 temp_ref = {"res": 18.3, "com": 16.7}
@@ -900,3 +960,57 @@ recs_cbecs_census_region = {
         "Pacific": ["CA", "AK", "HI", "OR", "WA"],
     },
 }
+
+
+@lru_cache(maxsize=None)
+def get_table(name):
+    """Read a data table of the package. Tables are read once, on first access, and
+    are also available as module attributes, e.g. ``const.puma_data``. If a table
+    cache is set, see :func:`set_table_cache`, tables are stored as Parquet files and
+    memory-mapped on subsequent reads.
+
+    :param str name: name of the table, one of the keys of ``tables``.
+    :return: (*pandas.DataFrame*) -- table.
+    :raises ValueError: if name is unknown.
+    """
+    if name not in tables:
+        raise ValueError(f"name must be one of: {', '.join(tables)}")
+    filename, index_col = tables[name]
+    csv_path = os.path.join(dir_path, "data", filename)
+    if _table_cache_dir is None:
+        return pd.read_csv(csv_path, index_col=index_col)
+
+    parquet_path = os.path.join(_table_cache_dir, f"{name}.parquet")
+    if not os.path.isfile(parquet_path) or os.path.getmtime(
+        parquet_path
+    ) < os.path.getmtime(csv_path):
+        table = pd.read_csv(csv_path, index_col=index_col)
+        os.makedirs(_table_cache_dir, exist_ok=True)
+        # write to a file unique to this call so that concurrent processes filling
+        # the same table do not overwrite each other's partial file
+        fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=_table_cache_dir)
+        os.close(fd)
+        try:
+            table.to_parquet(tmp_path)
+            os.replace(tmp_path, parquet_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    return pd.read_parquet(parquet_path, memory_map=True)
+
+
+def set_table_cache(cache_dir):
+    """Set the location where data tables are stored as Parquet files.
+
+    :param str cache_dir: location of the cache. Tables are read from the csv files
+        if None.
+    """
+    global _table_cache_dir
+    _table_cache_dir = cache_dir
+    get_table.cache_clear()
+
+
+def __getattr__(name):
+    if name in tables:
+        return get_table(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from prereise.gather.demanddata.bldg_electrification.weather_data import (
+    read_puma_weather,
+)
+
+
+def read_puma_temps(states, year):
+    """Read hourly temperatures of all pumas within several states and stack them in
+    a single array.
+
+    :param iterable states: abbrev. of states.
+    :param int year: weather year.
+    :return: (*tuple*) -- a pandas.DataFrame of (pumas x hours) temperatures and a
+        pandas.Series giving the state of each puma.
+    """
+    temps = {state: read_puma_weather("temps", state, year) for state in states}
+    puma_state = pd.concat(
+        [pd.Series(state, index=t.columns) for state, t in temps.items()]
+    )
+    stacked = pd.DataFrame(
+        np.concatenate([t.to_numpy(dtype=float).T for t in temps.values()]),
+        index=puma_state.index,
+    )
+    return stacked, puma_state
+
+
+def heating_degree_hours(temps, temp_ref):
+    """Compute heating degree hours.
+
+    :param numpy.ndarray/pandas.DataFrame temps: temperatures, in C.
+    :param float temp_ref: reference temperature, in C.
+    :return: (*numpy.ndarray*) -- temperature difference below the reference
+        temperature, zero above.
+    """
+    return np.maximum(temp_ref - np.asarray(temps, dtype=float), 0)
+
+
+def cooling_degree_hours(temps, temp_ref):
+    """Compute cooling degree hours.
+
+    :param numpy.ndarray/pandas.DataFrame temps: temperatures, in C.
+    :param float temp_ref: reference temperature, in C.
+    :return: (*numpy.ndarray*) -- temperature difference above the reference
+        temperature, zero below.
+    """
+    return np.maximum(np.asarray(temps, dtype=float) - temp_ref, 0)
+
+
+def get_state_operator(puma_state, weights=None):
+    """Build the sparse matrix summing puma level values by state.
+
+    :param pandas.Series puma_state: state of each puma, indexed by puma.
+    :param pandas.Series weights: weight of each puma, indexed by puma. Pumas missing
+        from weights are given a zero weight. Defaults to None, i.e. unit weights.
+    :return: (*tuple*) -- a (states x pumas) scipy.sparse.csr_matrix and the list of
+        states.
+    """
+    states, rows = np.unique(puma_state.to_numpy(), return_inverse=True)
+    if weights is None:
+        data = np.ones(len(puma_state))
+    else:
+        data = np.nan_to_num(
+            weights.reindex(puma_state.index, fill_value=0).to_numpy(dtype=float)
+        )
+    operator = sparse.csr_matrix(
+        (data, (rows, np.arange(len(puma_state)))),
+        shape=(len(states), len(puma_state)),
+    )
+    return operator, list(states)
+
+
+def state_weighted_sums(values, puma_state, weights=None):
+    """Sum puma level hourly values by state, weighted by e.g. puma floor areas.
+
+    :param numpy.ndarray/pandas.DataFrame values: (pumas x hours) values. Missing
+        values are ignored.
+    :param pandas.Series puma_state: state of each puma, indexed by puma and in the
+        same order as the rows of values.
+    :param pandas.Series weights: weight of each puma, indexed by puma. Defaults to
+        None, i.e. unit weights.
+    :return: (*pandas.DataFrame*) -- (states x hours) weighted sums.
+    """
+    operator, states = get_state_operator(puma_state, weights)
+    return pd.DataFrame(
+        operator @ np.nan_to_num(np.asarray(values, dtype=float)), index=states
+    )
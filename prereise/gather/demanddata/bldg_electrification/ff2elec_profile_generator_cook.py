@@ -1,4 +1,5 @@
 import os
+from functools import lru_cache
 
 import pandas as pd
 
@@ -48,33 +49,12 @@ def generate_cook_profiles(
             "low: Low cooking efficiency \n",
         )
 
-    dir_path = os.path.dirname(os.path.abspath(__file__))
-    state_slopes = pd.read_csv(
-        os.path.join(dir_path, "data", f"state_slopes_ff_{bldg_class}.csv"),
-        index_col="state",
-    )
-
-    cook_other = "cook" if bldg_class == "com" else "other"
-
     # Make directory for output profiles
     os.makedirs("Profiles", exist_ok=True)
 
     # Loop through states to create profile outputs
     for state in states:
-        # Load and subset relevant data for the state
-        puma_data_it = const.puma_data[const.puma_data["state"] == state]
-
-        # Load cook constant for state_it
-        cook_const_mmbtu_m2 = state_slopes.loc[state, f"{cook_other}_const"]
-
-        # Area * frac_ff * efficiency * cook_const * unit conv
-        cook_elec = (
-            puma_data_it[f"{bldg_class}_area_{const.base_year}_m2"]
-            * puma_data_it[f"frac_ff_{cook_other}_{bldg_class}_{const.base_year}"]
-            * (const.conv_mmbtu_to_kwh / 1000)
-            * cook_const_mmbtu_m2
-            * const.cooking_multiplier[(bldg_class, efficiency)]
-        )
+        cook_elec = calculate_cook_profiles(state, bldg_class, efficiency)
 
         # Export profile file as CSV
         cook_elec.to_csv(
@@ -84,3 +64,46 @@ def generate_cook_profiles(
                 f"elec_cook_ff2hp_{bldg_class}_{state}_{yr_temps}_{efficiency}_mw.csv",
             )
         )
+
+
+@lru_cache(maxsize=None)
+def read_state_slopes(bldg_class):
+    """Read fossil fuel slopes and constants of states.
+
+    :param str bldg_class: type of building.
+    :return: (*pandas.DataFrame*) -- slopes and constants indexed by state.
+    """
+    dir_path = os.path.dirname(os.path.abspath(__file__))
+    return pd.read_csv(
+        os.path.join(dir_path, "data", f"state_slopes_ff_{bldg_class}.csv"),
+        index_col="state",
+    )
+
+
+def calculate_cook_profiles(state, bldg_class, efficiency):
+    """Compute electricity loads from converting fossil fuel cooking to electric
+    cooking for all pumas within a state.
+
+    :param str state: abbrev. of state.
+    :param str bldg_class: type of building.
+    :param str efficiency: efficiency of cooking.
+    :return: (*pandas.Series*) -- constant hourly loads in MW, indexed by puma.
+    """
+    cook_other = "cook" if bldg_class == "com" else "other"
+
+    # Load and subset relevant data for the state
+    puma_data_it = const.puma_data[const.puma_data["state"] == state]
+
+    # Load cook constant for state_it
+    cook_const_mmbtu_m2 = read_state_slopes(bldg_class).loc[
+        state, f"{cook_other}_const"
+    ]
+
+    # Area * frac_ff * efficiency * cook_const * unit conv
+    return (
+        puma_data_it[f"{bldg_class}_area_{const.base_year}_m2"]
+        * puma_data_it[f"frac_ff_{cook_other}_{bldg_class}_{const.base_year}"]
+        * (const.conv_mmbtu_to_kwh / 1000)
+        * cook_const_mmbtu_m2
+        * const.cooking_multiplier[(bldg_class, efficiency)]
+    )
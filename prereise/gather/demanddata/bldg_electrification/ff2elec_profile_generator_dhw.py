@@ -4,39 +4,13 @@ import numpy as np
 import pandas as pd
 
 from prereise.gather.demanddata.bldg_electrification import const
-
-
-def func_dhw_cop(temp_c, model):
-    """Generate COPs for input hourly temperatures with a given heat pump model
-    :param list temp_c: hourly temperatures
-    :param str model : type of heat pump
-    :return list cop: Coefficient of performance list
-    """
-    cop_base = [0] * len(temp_c)
-
-    model_params = const.hp_param_dhw.set_index("model").loc[model]
-    t_low = model_params.loc["t_low"]
-    t_cp = model_params.loc["t_cp"]
-    t_high = model_params.loc["t_high"]
-    cop_er = model_params.loc["cop_er"]
-    cop_low = model_params.loc["cop_low"]
-    cop_cp = model_params.loc["cop_cp"]
-    cop_high = model_params.loc["cop_high"]
-
-    for i in range(len(temp_c)):
-        if temp_c[i] <= t_cp:
-            cop_base[i] = ((temp_c[i] - t_low) / (t_cp - t_low)) * (
-                cop_cp - cop_low
-            ) + cop_low
-        else:
-            cop_base[i] = ((temp_c[i] - t_cp) / (t_high - t_cp)) * (
-                cop_high - cop_cp
-            ) + cop_cp
-
-    cop = [max(c, cop_er) for c in cop_base]
-
-    return cop
-
+from prereise.gather.demanddata.bldg_electrification.ff2elec_profile_generator_cook import (
+    read_state_slopes,
+)
+from prereise.gather.demanddata.bldg_electrification.hp_cop import dhw_cop
+from prereise.gather.demanddata.bldg_electrification.weather_data import (
+    read_puma_weather,
+)
 
 # Create folder for output profiles
 os.makedirs("Profiles", exist_ok=True)
@@ -90,85 +64,93 @@ def generate_dhw_profiles(
             "futurehp: future performance heat pump",
         )
 
-    # parse user data
-    temp_ref_it = const.temp_ref[bldg_class]
-    dhw_mult = const.dhw_com_mult if bldg_class == "com" else const.dhw_res_mult
-
-    dir_path = os.path.dirname(os.path.abspath(__file__))
-
-    state_slopes = pd.read_csv(
-        os.path.join(dir_path, "data", f"state_slopes_ff_{bldg_class}.csv"),
-        index_col="state",
-    )
-
     # Loop through states to create profile outputs
     for state in states:
-        # Load and subset relevant data for the state
-        puma_data_it = const.puma_data.query("state == @state")
-
-        temps_pumas_it = pd.read_csv(
-            f"https://besciences.blob.core.windows.net/datasets/bldg_el/pumas/{yr_temps}/temps/temps_pumas_{state}_{yr_temps}.csv"
+        elec_dhw_ff2hp_puma_mw_it = calculate_dhw_profiles(
+            yr_temps, state, bldg_class, hp_model
         )
 
-        hours = pd.date_range(
-            f"{yr_temps}-01-01", periods=len(temps_pumas_it), freq="H", tz="UTC"
+        # Export profile file as CSV
+        elec_dhw_ff2hp_puma_mw_it.to_csv(
+            os.path.join(
+                os.path.dirname(__file__),
+                "Profiles",
+                f"elec_dhw_ff2hp_{bldg_class}_{state}_{yr_temps}_{hp_model}_mw.csv",
+            ),
+            index=False,
         )
 
-        # Load DHW constant and slope for state_it
-        dhw_const_mmbtu_m2 = state_slopes.loc[state, "dhw_const"]
 
-        dhw_slope_mmbtu_m2_degC = (  # noqa: N806
-            state_slopes.loc[state, "dhw_slope"] if bldg_class == "res" else 0
-        )
+def calculate_dhw_profiles(yr_temps, state, bldg_class, hp_model):
+    """Compute electricity loads from converting fossil fuel water heating to heat
+    pump water heaters for all pumas within a state.
 
-        # Based on the timezone for each PUMA
-        # the dhw multiplier list is arranged to match local time
-        dhw_mult_df = puma_data_it.apply(
-            lambda x: pd.Series(
-                hours.tz_convert(x.timezone).hour.map(lambda y: dhw_mult[y])
-            ),
-            axis=1,
-        )
+    :param int yr_temps: year for temperature.
+    :param str state: abbrev. of state.
+    :param str bldg_class: type of building.
+    :param str hp_model: type of heat pump.
+    :return: (*pandas.DataFrame*) -- hourly loads in MW, pumas as columns.
+    """
+    # parse user data
+    temp_ref_it = const.temp_ref[bldg_class]
+    dhw_mult = const.dhw_com_mult if bldg_class == "com" else const.dhw_res_mult
+    state_slopes = read_state_slopes(bldg_class)
 
-        temps_pumas_transpose_it = temps_pumas_it.T
+    # Load and subset relevant data for the state
+    puma_data_it = const.puma_data.query("state == @state")
 
-        temp_dev_from_ref_degC = temps_pumas_transpose_it.applymap(  # noqa: N806
-            lambda x: temp_ref_it - x
-        )
-        cop_inverse = temps_pumas_transpose_it.apply(
-            lambda x: np.reciprocal(func_dhw_cop(x, hp_model)), 1
-        )
+    temps_pumas_it = read_puma_weather("temps", state, yr_temps)
 
-        cop_list_df = pd.DataFrame(
-            cop_inverse.to_list(), list(temp_dev_from_ref_degC.index)
-        )
+    hours = pd.date_range(
+        f"{yr_temps}-01-01", periods=len(temps_pumas_it), freq="H", tz="UTC"
+    )
 
-        temp_dev_from_ref_degC_slope = (  # noqa: N806
-            temp_dev_from_ref_degC * dhw_slope_mmbtu_m2_degC
-            + dhw_const_mmbtu_m2  # noqa: N806
-        )
+    # Load DHW constant and slope for state_it
+    dhw_const_mmbtu_m2 = state_slopes.loc[state, "dhw_const"]
 
-        temp_dev_cop = (
-            temp_dev_from_ref_degC_slope.multiply(cop_list_df) * const.eff_dhw_ff_base
-        )  # mmbtu-heat pump electricity load per m2 for 100% of puma floor area
+    dhw_slope_mmbtu_m2_degC = (  # noqa: N806
+        state_slopes.loc[state, "dhw_slope"] if bldg_class == "res" else 0
+    )
 
-        temp_dev_cop *= dhw_mult_df
+    # Based on the timezone for each PUMA
+    # the dhw multiplier list is arranged to match local time
+    local_hours = {
+        tz: hours.tz_convert(tz).hour for tz in puma_data_it["timezone"].unique()
+    }
+    dhw_mult_df = pd.DataFrame(
+        np.array(dhw_mult)[
+            np.stack([local_hours[tz] for tz in puma_data_it["timezone"]])
+        ],
+        index=puma_data_it.index,
+    )
 
-        ff_area_scalars = list(
-            puma_data_it[f"{bldg_class}_area_{const.base_year}_m2"]
-            * puma_data_it[f"frac_ff_dhw_{bldg_class}_{const.base_year}"]
-            * (const.conv_mmbtu_to_kwh * const.conv_kw_to_mw)
-        )
+    temps_pumas_transpose_it = temps_pumas_it.T.astype(float)
 
-        elec_dhw_ff2hp_puma_mw_it = temp_dev_cop.mul(ff_area_scalars, axis=0).T
-        elec_dhw_ff2hp_puma_mw_it.columns = temps_pumas_it.columns
+    temp_dev_from_ref_degC = temp_ref_it - temps_pumas_transpose_it  # noqa: N806
+    cop_list_df = pd.DataFrame(
+        np.reciprocal(dhw_cop(temps_pumas_transpose_it.to_numpy(), hp_model)),
+        index=temps_pumas_transpose_it.index,
+        columns=temps_pumas_transpose_it.columns,
+    )
 
-        # Export profile file as CSV
-        elec_dhw_ff2hp_puma_mw_it.to_csv(
-            os.path.join(
-                os.path.dirname(__file__),
-                "Profiles",
-                f"elec_dhw_ff2hp_{bldg_class}_{state}_{yr_temps}_{hp_model}_mw.csv",
-            ),
-            index=False,
-        )
+    temp_dev_from_ref_degC_slope = (  # noqa: N806
+        temp_dev_from_ref_degC * dhw_slope_mmbtu_m2_degC
+        + dhw_const_mmbtu_m2  # noqa: N806
+    )
+
+    temp_dev_cop = (
+        temp_dev_from_ref_degC_slope.multiply(cop_list_df) * const.eff_dhw_ff_base
+    )  # mmbtu-heat pump electricity load per m2 for 100% of puma floor area
+
+    temp_dev_cop *= dhw_mult_df
+
+    ff_area_scalars = list(
+        puma_data_it[f"{bldg_class}_area_{const.base_year}_m2"]
+        * puma_data_it[f"frac_ff_dhw_{bldg_class}_{const.base_year}"]
+        * (const.conv_mmbtu_to_kwh * const.conv_kw_to_mw)
+    )
+
+    elec_dhw_ff2hp_puma_mw_it = temp_dev_cop.mul(ff_area_scalars, axis=0).T
+    elec_dhw_ff2hp_puma_mw_it.columns = temps_pumas_it.columns
+
+    return elec_dhw_ff2hp_puma_mw_it
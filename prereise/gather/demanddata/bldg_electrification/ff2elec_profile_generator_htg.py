@@ -1,69 +1,17 @@
 import os
+from functools import lru_cache
 
 import numpy as np
 import pandas as pd
 
 from prereise.gather.demanddata.bldg_electrification import const
-
-
-def calculate_cop(temp_c, model):
-    cop_base, cr_base = _calculate_cop_base_cr_base(temp_c, model)
-
-    eaux = [max(0.75 - i, 0) for i in cr_base]
-
-    sumlist = [
-        (cr_base[i] + eaux[i]) / (cr_base[i] / cop_base[i] + eaux[i])
-        if cr_base[i] != 0
-        else 1
-        for i in range(len(cr_base))
-    ]
-    cop = [1 if cr_base[i] == 0 else max(sumlist[i], 1) for i in range(len(cr_base))]
-    return cop
-
-
-def _calculate_cop_base_cr_base(temp_c, model):
-    temp_k = [i + 273.15 for i in temp_c]
-    cop_base = [0] * len(temp_c)
-    cr_base = [0] * len(temp_c)
-
-    model_params = const.hp_param.set_index("model").loc[model]
-    T1_K = model_params.loc["T1_K"]  # noqa: N806
-    COP1 = model_params.loc["COP1"]  # noqa: N806
-    T2_K = model_params.loc["T2_K"]  # noqa: N806
-    COP2 = model_params.loc["COP2"]  # noqa: N806
-    T3_K = model_params.loc["T3_K"]  # noqa: N806
-    COP3 = model_params.loc["COP3"]  # noqa: N806
-    CR3 = model_params.loc["CR3"]  # noqa: N806
-    a = model_params.loc["a"]
-    b = model_params.loc["b"]
-    c = model_params.loc["c"]
-
-    for i, temp in enumerate(temp_k):
-        if temp + b > 0:
-            cr_base[i] = a * np.log(temp + b) + c
-        if temp > T2_K:
-            cop_base[i] = ((COP1 - COP2) / (T1_K - T2_K)) * temp + (
-                COP2 * T1_K - COP1 * T2_K
-            ) / (T1_K - T2_K)
-        if T3_K < temp <= T2_K:
-            cop_base[i] = ((COP2 - COP3) / (T2_K - T3_K)) * temp + (
-                COP3 * T2_K - COP2 * T3_K
-            ) / (T2_K - T3_K)
-        if temp <= T3_K:
-            cop_base[i] = (cr_base[i] / CR3) * COP3
-
-    return cop_base, cr_base
-
-
-def htg_to_cop(temp_c, model):
-    if model == "futurehp":
-        cop = calculate_cop(temp_c, model)
-
-        adv_cop = calculate_cop(temp_c, "advperfhp")
-        cop_final = [max(cop[i], adv_cop[i]) for i in range(len(cop))]
-        return cop_final
-    else:
-        return calculate_cop(temp_c, model)
+from prereise.gather.demanddata.bldg_electrification.degree_hours import (
+    heating_degree_hours,
+)
+from prereise.gather.demanddata.bldg_electrification.hp_cop import htg_to_cop
+from prereise.gather.demanddata.bldg_electrification.weather_data import (
+    read_puma_weather,
+)
 
 
 def generate_htg_profiles(
@@ -118,45 +66,12 @@ def generate_htg_profiles(
         )
     os.makedirs(output_folder, exist_ok=True)
 
-    # parse user data
-    temp_ref_it = const.temp_ref[bldg_class]
-    dir_path = os.path.dirname(os.path.abspath(__file__))
-    puma_slopes = pd.read_csv(
-        os.path.join(dir_path, "data", f"puma_slopes_ff_{bldg_class}.csv"),
-        index_col="puma",
-    )
-
     # Loop through states to create profile outputs
     for state in states:
-        # Load and subset relevant data for the state
-        puma_data_it = const.puma_data.query("state == @state")
-        puma_slopes_it = puma_slopes.query("state == @state")
-        temps_pumas_it = pd.read_csv(
-            f"https://besciences.blob.core.windows.net/datasets/bldg_el/pumas/{yr_temps}/temps/temps_pumas_{state}_{yr_temps}.csv"
+        elec_htg_ff2hp_puma_mw_it = calculate_htg_profiles(
+            yr_temps, state, bldg_class, hp_model
         )
 
-        # Compute electric HP loads from fossil fuel conversion
-        elec_htg_ff2hp_puma_mw_it_ref_temp = temps_pumas_it.applymap(
-            lambda x: max(temp_ref_it - x, 0)
-        )
-        elec_htg_ff2hp_puma_mw_it_func = temps_pumas_it.apply(
-            lambda x: np.reciprocal(htg_to_cop(x, hp_model))
-        )
-
-        elec_htg_ff2hp_puma_mw_it = elec_htg_ff2hp_puma_mw_it_ref_temp.multiply(
-            elec_htg_ff2hp_puma_mw_it_func
-        )
-
-        pumalist = (
-            puma_slopes_it[f"htg_slope_{bldg_class}_mmbtu_m2_degC"]
-            * puma_data_it[f"{bldg_class}_area_{const.base_year}_m2"]
-            * puma_data_it[f"frac_ff_sh_{bldg_class}_{const.base_year}"]
-            * (const.conv_mmbtu_to_kwh * const.conv_kw_to_mw)
-            * const.eff_htg_ff_base
-        )
-
-        elec_htg_ff2hp_puma_mw_it *= pumalist
-
         # Export profile file as CSV
         elec_htg_ff2hp_puma_mw_it.to_csv(
             os.path.join(
@@ -166,3 +81,56 @@ def generate_htg_profiles(
             ),
             index=False,
         )
+
+
+@lru_cache(maxsize=None)
+def read_puma_slopes(bldg_class):
+    """Read fossil fuel heating slopes of pumas.
+
+    :param str bldg_class: type of building.
+    :return: (*pandas.DataFrame*) -- slopes indexed by puma.
+    """
+    dir_path = os.path.dirname(os.path.abspath(__file__))
+    return pd.read_csv(
+        os.path.join(dir_path, "data", f"puma_slopes_ff_{bldg_class}.csv"),
+        index_col="puma",
+    )
+
+
+def calculate_htg_profiles(yr_temps, state, bldg_class, hp_model):
+    """Compute electricity loads from converting fossil fuel heating to electric heat
+    pumps for all pumas within a state.
+
+    :param int yr_temps: year for temperature.
+    :param str state: abbrev. of state.
+    :param str bldg_class: type of building.
+    :param str hp_model: type of heat pump.
+    :return: (*pandas.DataFrame*) -- hourly loads in MW, pumas as columns.
+    """
+    # parse user data
+    temp_ref_it = const.temp_ref[bldg_class]
+    puma_slopes = read_puma_slopes(bldg_class)
+
+    # Load and subset relevant data for the state
+    puma_data_it = const.puma_data.query("state == @state")
+    puma_slopes_it = puma_slopes.query("state == @state")
+    temps_pumas_it = read_puma_weather("temps", state, yr_temps)
+
+    # Compute electric HP loads from fossil fuel conversion
+    elec_htg_ff2hp_puma_mw_it = pd.DataFrame(
+        heating_degree_hours(temps_pumas_it, temp_ref_it)
+        * np.reciprocal(htg_to_cop(temps_pumas_it.to_numpy(dtype=float), hp_model)),
+        index=temps_pumas_it.index,
+        columns=temps_pumas_it.columns,
+    )
+
+    pumalist = (
+        puma_slopes_it[f"htg_slope_{bldg_class}_mmbtu_m2_degC"]
+        * puma_data_it[f"{bldg_class}_area_{const.base_year}_m2"]
+        * puma_data_it[f"frac_ff_sh_{bldg_class}_{const.base_year}"]
+        * (const.conv_mmbtu_to_kwh * const.conv_kw_to_mw)
+        * const.eff_htg_ff_base
+    )
+
+    elec_htg_ff2hp_puma_mw_it *= pumalist
+    return elec_htg_ff2hp_puma_mw_it
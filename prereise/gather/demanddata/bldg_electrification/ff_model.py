@@ -1,10 +1,17 @@
 import os
+from concurrent.futures import ProcessPoolExecutor
 
 import numpy as np
 import pandas as pd
 from scipy.optimize import least_squares
 
 from prereise.gather.demanddata.bldg_electrification import const
+from prereise.gather.demanddata.bldg_electrification.degree_hours import (
+    cooling_degree_hours,
+    heating_degree_hours,
+    read_puma_temps,
+    state_weighted_sums,
+)
 
 
 def calculate_r2(endogenous, residuals):
@@ -20,16 +27,169 @@ def calculate_r2(endogenous, residuals):
     return r2
 
 
-def calculate_state_slopes(puma_data, year=const.base_year):
+def _fit_monthly_fuel_use(design, ff, hours_in_month, bounds):
+    """Fit a linear model of monthly fossil fuel use, weighted by the number of hours
+    in each month. The model being linear in its parameters, the Jacobian of the
+    residuals is constant and passed to the solver.
+
+    :param numpy.ndarray design: (months x parameters) design matrix.
+    :param numpy.ndarray ff: average hourly fossil fuel use for each month.
+    :param numpy.ndarray hours_in_month: number of hours in each month.
+    :param tuple bounds: lower and upper bounds of the parameters.
+    :return: (*tuple*) -- fitted parameters and residuals of the fit.
+    """
+    weights = np.sqrt(hours_in_month)
+    jacobian = -weights[:, None] * design
+
+    # Returns difference between fitted equation and actual fossil fuel usage for the
+    # least_squares function to minimize
+    def func(par):
+        return weights * (ff - design @ par)
+
+    lm = least_squares(func, bounds[0], jac=lambda par: jacobian, bounds=bounds)
+    return lm.x, lm.fun / weights
+
+
+def _fit_state_slopes_res(state, hd_sh, hd_dhw, ff, hours_in_month, sum_areas):
+    """Estimate residential regression parameters for a state.
+
+    :param str state: abbrev. of state.
+    :param numpy.ndarray hd_sh: monthly heating degrees, area weighted.
+    :param numpy.ndarray hd_dhw: monthly temperature deviations from the reference
+        temperature, area weighted.
+    :param numpy.ndarray ff: average hourly fossil fuel use for each month.
+    :param numpy.ndarray hours_in_month: number of hours in each month.
+    :param dict sum_areas: fossil fuel floor areas for each end use.
+    :return: (*tuple*) -- row of the state slopes table and residuals of the fit.
+    """
+    design = np.column_stack(
+        [
+            hd_sh,
+            sum_areas["dhw"] + const.dhw_lin_scalar * hd_dhw,
+            np.full(len(ff), sum_areas["other"]),
+        ]
+    )
+    par, residuals = _fit_monthly_fuel_use(
+        design,
+        ff,
+        hours_in_month,
+        (const.bounds_lower_res, const.bounds_upper_res),
+    )
+
+    # Solved coefficients for slopes and constants
+    row = [
+        state,
+        calculate_r2(ff, residuals),
+        par[0],
+        par[1],
+        par[1] * const.dhw_lin_scalar,
+        par[2],
+    ]
+    return row, residuals
+
+
+def _fit_state_slopes_com(state, hd_sh, hd_other, ff, hours_in_month, sum_areas):
+    """Estimate commercial regression parameters for a state.
+
+    :param str state: abbrev. of state.
+    :param numpy.ndarray hd_sh: monthly heating degrees, area weighted.
+    :param numpy.ndarray hd_other: monthly cooling degrees, area weighted.
+    :param numpy.ndarray ff: average hourly fossil fuel use for each month.
+    :param numpy.ndarray hours_in_month: number of hours in each month.
+    :param dict sum_areas: fossil fuel floor areas for each end use.
+    :return: (*tuple*) -- row of the state slopes table and residuals of the fit.
+    """
+    sum_areaff_dhw = sum_areas["dhw"]
+    sum_areaff_cook = sum_areas["cook"]
+    sum_areaff_other = sum_areas["other"]
+    sum_areaff = sum_areaff_dhw + sum_areaff_cook + sum_areaff_other
+
+    bound_lower_consts_par = (
+        const.dhw_low_bound_com * sum_areaff_dhw
+        + const.cook_c_scalar * const.dhw_low_bound_com * sum_areaff_cook
+    ) / sum_areaff
+    bound_upper_consts_par = (
+        const.dhw_high_bound_com * sum_areaff_dhw
+        + const.cook_c_scalar * const.dhw_high_bound_com * sum_areaff_cook
+        + const.other_high_bound_com * sum_areaff_other
+    ) / sum_areaff
+
+    bounds_lower_com = [0, bound_lower_consts_par, 0]
+    bounds_upper_com = [np.inf, bound_upper_consts_par, np.inf]
+
+    design = np.column_stack([hd_sh, np.full(len(ff), sum_areaff), hd_other])
+    par, residuals = _fit_monthly_fuel_use(
+        design, ff, hours_in_month, (bounds_lower_com, bounds_upper_com)
+    )
+
+    # Solved dhw/cook/other constants
+    consts_par = par[1]
+
+    bound_decision_point = (
+        consts_par
+        * sum_areaff
+        / (sum_areaff_dhw + const.cook_c_scalar * sum_areaff_cook)
+    )
+    if bound_decision_point <= const.dhw_high_bound_com:
+        par_dhw_c = bound_decision_point
+        par_other_c = 0
+    else:
+        par_dhw_c = const.dhw_high_bound_com
+        par_other_c = (
+            consts_par * sum_areaff
+            - (
+                const.dhw_high_bound_com * sum_areaff_dhw
+                + const.cook_c_scalar * const.dhw_high_bound_com * sum_areaff_cook
+            )
+        ) / sum_areaff_other
+
+    par_cook_c = const.cook_c_scalar * par_dhw_c
+
+    # Solved coefficients for slopes
+    row = [
+        state,
+        calculate_r2(ff, residuals),
+        par[0],
+        par_dhw_c,
+        par_cook_c,
+        par_other_c,
+        par[2],
+    ]
+    return row, residuals
+
+
+_fit_state_slopes = {"res": _fit_state_slopes_res, "com": _fit_state_slopes_com}
+
+
+def _fit_state_class_slopes(clas, args):
+    """Estimate regression parameters of a building class for a state.
+
+    :param str clas: building class, either *'res'* or *'com'*.
+    :param tuple args: inputs of the fit, see :func:`_fit_state_slopes_res` and
+        :func:`_fit_state_slopes_com`.
+    :return: (*tuple*) -- row of the state slopes table and residuals of the fit.
+    """
+    return _fit_state_slopes[clas](*args)
+
+
+def calculate_state_slopes(
+    puma_data, year=const.base_year, max_workers=None, diagnostics=False
+):
     """Estimate regression parameters per-state for residential and commercial fuel use.
 
     :param pandas.DataFrame puma_data: data frame of per-puma data.
     :param int/str year: year of data to use for analysis.
+    :param int max_workers: number of processes used to run the state fits in
+        parallel. Defaults to the number of processors on the machine. Fits are run
+        in the current process if 1.
+    :param bool diagnostics: whether to also return the residuals of the fits.
     :return: (*tuple*) -- a pair of pandas.DataFrame objects for per-state residential
-        and commercial slopes, respectively.
+        and commercial slopes, respectively. If ``diagnostics`` is True, a third
+        pandas.DataFrame holds the monthly residuals of the fits, indexed by building
+        class and state.
     """
     dti = pd.date_range(start=f"{year}-01-01", end=f"{year}-12-31 23:00:00", freq="H")
-    hours_in_month = dti.month.value_counts()
+    hours_in_month = dti.month.value_counts().sort_index()
 
     # Load in historical fossil fuel usage data for input/base year
     data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
@@ -46,63 +206,52 @@ def calculate_state_slopes(puma_data, year=const.base_year):
         os.path.join(data_dir, f"propane_data_bystate_{year}.csv"), index_col="state"
     )
 
-    # Initialize dataframes to store state heating slopes
-    state_slopes_res = pd.DataFrame(
-        columns=(["state", "r2", "sh_slope", "dhw_const", "dhw_slope", "other_const"])
-    )
-    state_slopes_com = pd.DataFrame(
-        columns=(
-            [
-                "state",
-                "r2",
-                "sh_slope",
-                "dhw_const",
-                "cook_const",
-                "other_const",
-                "other_slope",
-            ]
-        )
-    )
+    # Hourly heating/cooling degrees for all pumas, multiplied by their corresponding
+    # area and percent fossil fuel, summed up to one hourly list per state and
+    # averaged by month
+    temps_pumas, puma_state = read_puma_temps(const.state_list, year)
+    hd_monthly = {}
+    for clas in const.classes:
+        areas = puma_data[f"{clas}_area_{year}_m2"]
+        hd_hourly = {
+            "sh": state_weighted_sums(
+                heating_degree_hours(temps_pumas, const.temp_ref[clas]),
+                puma_state,
+                areas * puma_data[f"frac_ff_sh_{clas}_{year}"],
+            )
+        }
+        if clas == "res":
+            hd_hourly["dhw"] = state_weighted_sums(
+                const.temp_ref[clas] - temps_pumas,
+                puma_state,
+                areas * puma_data[f"frac_ff_dhw_{clas}_{year}"],
+            )
+        else:
+            hd_hourly["other"] = state_weighted_sums(
+                cooling_degree_hours(temps_pumas, const.temp_ref[clas]),
+                puma_state,
+                areas * puma_data[f"frac_ff_sh_{clas}_{year}"],
+            )
+        hd_monthly[clas] = {
+            k: v.T.groupby(dti.month).mean() for k, v in hd_hourly.items()
+        }
+    del temps_pumas
 
+    # Gather the inputs of the state fits
+    tasks = []
     for state in const.state_list:
         # Load puma data
         puma_data_it = puma_data.query("state == @state")
 
-        # Load puma temperatures
-        temps_pumas = temps_pumas = pd.read_csv(
-            f"https://besciences.blob.core.windows.net/datasets/bldg_el/pumas/{year}/temps/temps_pumas_{state}_{year}.csv"
-        )
-        temps_pumas_transpose = temps_pumas.T
-
         for clas in const.classes:
-            # puma area * percentage of puma area that uses fossil fuel
-            areas_ff_sh_it = (
-                puma_data_it[f"{clas}_area_{year}_m2"]
-                * puma_data_it[f"frac_ff_sh_{clas}_{year}"]
-            )
-            areas_ff_dhw_it = (
-                puma_data_it[f"{clas}_area_{year}_m2"]
-                * puma_data_it[f"frac_ff_dhw_{clas}_{year}"]
-            )
-            areas_ff_cook_it = (
-                puma_data_it[f"{clas}_area_{year}_m2"]
-                * puma_data_it[f"frac_ff_cook_com_{year}"]
-            )
-            if clas == "res":
-                areas_ff_other_it = (
-                    puma_data_it[f"{clas}_area_{year}_m2"]
-                    * puma_data_it[f"frac_ff_other_res_{year}"]
-                )
-            else:
-                areas_ff_other_it = (
-                    puma_data_it[f"{clas}_area_{year}_m2"]
-                    * puma_data_it[f"frac_ff_sh_com_{year}"]
-                )
-
-            # sum of previous areas to be used in fitting
-            sum_areaff_dhw = sum(areas_ff_dhw_it)
-            sum_areaff_other = sum(areas_ff_other_it)
-            sum_areaff_cook = sum(areas_ff_cook_it)
+            # puma area * percentage of puma area that uses fossil fuel, summed up
+            areas_it = puma_data_it[f"{clas}_area_{year}_m2"]
+            frac_other = "frac_ff_other_res" if clas == "res" else "frac_ff_sh_com"
+            sum_areas = {
+                "dhw": sum(areas_it * puma_data_it[f"frac_ff_dhw_{clas}_{year}"]),
+                "cook": sum(areas_it * puma_data_it[f"frac_ff_cook_com_{year}"]),
+                "other": sum(areas_it * puma_data_it[f"{frac_other}_{year}"]),
+            }
 
             # Load monthly natural gas usage for the state
             natgas = ng_usage_data[clas][state]
@@ -115,154 +264,58 @@ def calculate_state_slopes(puma_data, year=const.base_year):
             # Fossil fuel average monthly mmbtu, normalized by hours in month
             ff_monthly_it = ff_usage_data_it / hours_in_month
 
-            # Hourly heating degrees for all pumas in a given state, multiplied by their corresponding area and percent fossil fuel, summed up to one hourly list
-            hd_hourly_it_sh = (
-                temps_pumas_transpose.applymap(
-                    lambda x: max(const.temp_ref[clas] - x, 0)
+            hd_monthly_it = [v[state].to_numpy() for v in hd_monthly[clas].values()]
+            tasks.append(
+                (
+                    clas,
+                    (
+                        state,
+                        *hd_monthly_it,
+                        ff_monthly_it.to_numpy(),
+                        hours_in_month.to_numpy(),
+                        sum_areas,
+                    ),
                 )
-                .mul(areas_ff_sh_it, axis=0)
-                .sum(axis=0)
             )
-            hd_monthly_it_sh = hd_hourly_it_sh.groupby(dti.month).mean()
 
-            if clas == "res":
-                hd_hourly_it_dhw = (
-                    temps_pumas_transpose.applymap(lambda x: const.temp_ref[clas] - x)
-                    .mul(areas_ff_dhw_it, axis=0)
-                    .sum(axis=0)
-                )
-                hd_monthly_it_dhw = hd_hourly_it_dhw.groupby(dti.month).mean()
-
-                # Fitting function: Returns difference between fitted equation and actual fossil fuel usage for the least_squares function to minimize
-                def func_r(par, sh, dhw, ff):
-                    err = hours_in_month ** (1 / 2) * (
-                        ff
-                        - (
-                            par[0] * sh
-                            + par[1] * (sum_areaff_dhw + const.dhw_lin_scalar * dhw)
-                            + par[2] * sum_areaff_other
-                        )
-                    )
-                    return err
-
-                # Least squares solver
-                lm_it = least_squares(
-                    func_r,
-                    const.bounds_lower_res,
-                    args=(hd_monthly_it_sh, hd_monthly_it_dhw, ff_monthly_it),
-                    bounds=(const.bounds_lower_res, const.bounds_upper_res),
-                )
-
-                # Solved coefficients for slopes and constants
-                par_sh_l = lm_it.x[0]
-                par_dhw_c = lm_it.x[1]
-                par_dhw_l = lm_it.x[1] * const.dhw_lin_scalar
-                par_other_c = lm_it.x[2]
-
-                corrected_residuals = np.array(lm_it.fun) / hours_in_month ** (1 / 2)
-                r2 = calculate_r2(ff_monthly_it, corrected_residuals)
-
-                # Add coefficients to output dataframe
-                df_i = len(state_slopes_res)
-                state_slopes_res.loc[df_i] = [
-                    state,
-                    r2,
-                    par_sh_l,
-                    par_dhw_c,
-                    par_dhw_l,
-                    par_other_c,
-                ]
-            else:
-                hd_hourly_it_other = (
-                    temps_pumas_transpose.applymap(
-                        lambda x: max(x - const.temp_ref[clas], 0)
-                    )
-                    .mul(areas_ff_other_it, axis=0)
-                    .sum(axis=0)
-                )
-                hd_monthly_it_other = hd_hourly_it_other.groupby(dti.month).mean()
-
-                bound_lower_consts_par = (
-                    const.dhw_low_bound_com * sum_areaff_dhw
-                    + const.cook_c_scalar * const.dhw_low_bound_com * sum_areaff_cook
-                ) / (sum_areaff_dhw + sum_areaff_cook + sum_areaff_other)
-                bound_upper_consts_par = (
-                    const.dhw_high_bound_com * sum_areaff_dhw
-                    + const.cook_c_scalar * const.dhw_high_bound_com * sum_areaff_cook
-                    + const.other_high_bound_com * sum_areaff_other
-                ) / (sum_areaff_dhw + sum_areaff_cook + sum_areaff_other)
-
-                bounds_lower_com = [0, bound_lower_consts_par, 0]
-                bounds_upper_com = [np.inf, bound_upper_consts_par, np.inf]
-
-                # Fitting function: Returns difference between fitted equation and actual fossil fuel usage for the least_squares function to minimize
-                def func_c(par, sh, other, ff):
-                    err = hours_in_month ** (1 / 2) * (
-                        ff
-                        - (
-                            par[0] * sh
-                            + par[1]
-                            * (sum_areaff_dhw + sum_areaff_cook + sum_areaff_other)
-                            + par[2] * other
-                        )
-                    )
-                    return err
-
-                # Least squares solver
-                lm_it = least_squares(
-                    func_c,
-                    bounds_lower_com,
-                    args=(hd_monthly_it_sh, hd_monthly_it_other, ff_monthly_it),
-                    bounds=(bounds_lower_com, bounds_upper_com),
-                )
-
-                # Solved dhw/cook/other constants
-                consts_par = lm_it.x[1]
-
-                bound_decision_point = (
-                    consts_par
-                    * (sum_areaff_dhw + sum_areaff_cook + sum_areaff_other)
-                    / (sum_areaff_dhw + const.cook_c_scalar * sum_areaff_cook)
-                )
-                if bound_decision_point <= const.dhw_high_bound_com:
-                    par_dhw_c = bound_decision_point
-                    par_other_c = 0
-                else:
-                    par_dhw_c = const.dhw_high_bound_com
-                    par_other_c = (
-                        consts_par
-                        * (sum_areaff_dhw + sum_areaff_cook + sum_areaff_other)
-                        - (
-                            const.dhw_high_bound_com * sum_areaff_dhw
-                            + const.cook_c_scalar
-                            * const.dhw_high_bound_com
-                            * sum_areaff_cook
-                        )
-                    ) / sum_areaff_other
-
-                par_cook_c = const.cook_c_scalar * par_dhw_c
-
-                # Solved coefficients for slopes
-                par_sh_l = lm_it.x[0]
-                par_other_l = lm_it.x[2]
-
-                corrected_residuals = np.array(lm_it.fun) / hours_in_month ** (1 / 2)
-                r2 = calculate_r2(ff_monthly_it, corrected_residuals)
-
-                # Add coefficients to output dataframe
-                df_i = len(state_slopes_com)
-                state_slopes_com.loc[df_i] = [
-                    state,
-                    r2,
-                    par_sh_l,
-                    par_dhw_c,
-                    par_cook_c,
-                    par_other_c,
-                    par_other_l,
-                ]
+    # Run the fits, results are collected in the order of the tasks
+    if max_workers == 1:
+        results = [_fit_state_class_slopes(*t) for t in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(_fit_state_class_slopes, *zip(*tasks)))
 
     # Export heating/hot water/cooking coefficients for each state
-    return state_slopes_res, state_slopes_com
+    columns = {
+        "res": ["state", "r2", "sh_slope", "dhw_const", "dhw_slope", "other_const"],
+        "com": [
+            "state",
+            "r2",
+            "sh_slope",
+            "dhw_const",
+            "cook_const",
+            "other_const",
+            "other_slope",
+        ],
+    }
+    state_slopes = {
+        clas: pd.DataFrame(
+            [row for t, (row, _) in zip(tasks, results) if t[0] == clas],
+            columns=columns[clas],
+        )
+        for clas in const.classes
+    }
+    if not diagnostics:
+        return state_slopes["res"], state_slopes["com"]
+
+    residuals = pd.DataFrame(
+        [r for _, r in results],
+        index=pd.MultiIndex.from_tuples(
+            [(clas, args[0]) for clas, args in tasks], names=["clas", "state"]
+        ),
+        columns=hours_in_month.index.rename("month"),
+    )
+    return state_slopes["res"], state_slopes["com"], residuals
 
 
 def adjust_puma_slopes(
@@ -301,15 +354,12 @@ def adjust_puma_slopes(
     # Create data frames to hold output
     adj_slopes = {clas: puma_data["state"].to_frame() for clas in classes}
 
-    for state in const.state_list:
-        # Load puma temperatures
-        temps_pumas = pd.read_csv(
-            f"https://besciences.blob.core.windows.net/datasets/bldg_el/pumas/{year}/temps/temps_pumas_{state}_{year}.csv"
+    # Annual heating degree hours below const.temp_ref_res/com for each puma
+    temps_pumas, _ = read_puma_temps(const.state_list, year)
+    for clas in classes:
+        puma_data.loc[temps_pumas.index, hd_col_names[clas]] = np.nansum(
+            heating_degree_hours(temps_pumas, const.temp_ref[clas]), axis=1
         )
-        # Hourly temperature difference below const.temp_ref_res/com for each puma
-        for clas in classes:
-            temp_diff = temps_pumas.applymap(lambda x: max(const.temp_ref[clas] - x, 0))
-            puma_data.loc[temp_diff.columns, hd_col_names[clas]] = temp_diff.sum()
 
     # Load in state groups consistent with building area scale adjustments
     data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
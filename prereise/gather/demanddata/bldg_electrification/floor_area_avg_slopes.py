@@ -9,35 +9,50 @@ import pandas as pd
 from prereise.gather.demanddata.bldg_electrification import const
 from prereise.gather.demanddata.bldg_electrification.const import (
     iso_name,
+    iso_states,
     iso_zone_name_shps,
     iso_zone_names,
-    state_list,
 )
 from prereise.gather.demanddata.bldg_electrification.helper import (
     read_shapefile,
+    run_batch,
     state_shp_overlay,
-    zone_shp_overlay,
+    zones_shp_overlay,
 )
 
 
-def get_zone_floor_area(iso, zone_shape, pumas_shp):
+def get_zone_floor_area(
+    iso,
+    zone_shape,
+    pumas_shp,
+    puma_data_zones=None,
+    base_year=const.base_year,
+    output_dir="./Profiles/result_stats",
+):
     """Computes the zone floor area for each ISO.
 
     :param str iso: abbrev. name of ISO.
     :param geopandas.GeoDataFrame zone_shape: geo data frame of zone(BA) shape file
     :param geopandas.GeoDataFrame pumas_shp: geo data frame of pumas shape file
+    :param dict puma_data_zones: puma data within zones, output of
+        zones_shp_overlay(). Computed from the shape files if None.
+    :param int base_year: year of floor areas.
+    :param str output_dir: directory where results are saved.
     :return: (*pandas.DataFrame*) -- Floor area in square meters for all the zones
         with breakdowns of residential, commercial, total heated and total cooled
 
-    .. note:: zone floor area in square meters saved as csv into Profiles/result_stats
+    .. note:: zone floor area in square meters saved as csv into output_dir
     """
+    if puma_data_zones is None:
+        puma_data_zones = zones_shp_overlay(
+            iso_zone_name_shps[iso], zone_shape, pumas_shp
+        )
+
     zone_floor_area = pd.DataFrame()
     for zone in iso_zone_names[iso]:
-        puma_data_zone = zone_shp_overlay(
-            iso_zone_name_shps[iso][iso_zone_names[iso].index(zone)],
-            zone_shape,
-            pumas_shp,
-        )
+        puma_data_zone = puma_data_zones[
+            iso_zone_name_shps[iso][iso_zone_names[iso].index(zone)]
+        ]
         puma_data_zone = puma_data_zone[~(puma_data_zone["frac_in_zone"] < 0.05)]
 
         total_area_zone_cool_res = (
@@ -99,13 +114,43 @@ def get_zone_floor_area(iso, zone_shape, pumas_shp):
         )
 
     zone_floor_area.to_csv(
-        f"./Profiles/result_stats/{iso_name[iso]}_zone_floor_area_m2.csv"
+        os.path.join(output_dir, f"{iso_name[iso]}_zone_floor_area_m2.csv")
     )
     return zone_floor_area
 
 
+def read_dayhour_fits(zone, base_year=const.base_year, fits_dir=None):
+    """Read hourly fits of a zone.
+
+    :param str zone: name of load zone.
+    :param int base_year: data fitting year.
+    :param str fits_dir: directory of the fits, e.g. *dayhour_fits* in the output
+        directory of :func:`zone_profile_generator.run_zones`. Defaults to None, i.e.
+        read from blob storage.
+    :return: (*pandas.DataFrame*) -- hourly and week/weekend breakpoints and
+        coefficients for electricity use equations.
+    """
+    filename = f"{zone}_dayhour_fits_{base_year}.csv"
+    if fits_dir is None:
+        return pd.read_csv(
+            f"https://besciences.blob.core.windows.net/datasets/bldg_el/dayhour_fits/{filename}",
+            index_col=0,
+        )
+    return pd.read_csv(os.path.join(fits_dir, filename), index_col=0)
+
+
 def main_plots(
-    iso, zone_shape, pumas_shp, state_shp, country_shp, size, plot_show=True
+    iso,
+    zone_shape,
+    pumas_shp,
+    state_shp,
+    country_shp,
+    size,
+    plot_show=True,
+    puma_data_zones=None,
+    fits_dir=None,
+    base_year=const.base_year,
+    output_dir="./Profiles/result_stats",
 ):
     """Creats floor area avraged slopes for all zones within the ISO for one year.
 
@@ -116,22 +161,37 @@ def main_plots(
     :param geopandas.GeoDataFrame country_shp: geo data frame of nation shape file
     :param bool plot_show: show the plot or not, default to True.
     :param int size: defining the image size of plots in dpi.
+    :param dict puma_data_zones: puma data within zones, output of
+        zones_shp_overlay(). Computed from the shape files if None.
+    :param str fits_dir: directory of the hourly fits, see :func:`read_dayhour_fits`.
+    :param int base_year: data fitting year.
+    :param str output_dir: directory where results are saved.
+    :return: (*list*) -- paths of the csv files written.
 
     .. note:: Floor area avg. heating and cooling slope, error and map plots for all
-        zones in each ISO saved as png and csv into Profiles/result_stats/hourly_plots
+        zones in each ISO saved as png and csv into output_dir/hourly_plots
     """
+    zone_plots_dir = os.path.join(output_dir, "hourly_plots", "zone_plots")
+    error_plots_dir = os.path.join(output_dir, "hourly_plots", "iso plot with error")
+    os.makedirs(os.path.join(zone_plots_dir, "zone model"), exist_ok=True)
+    os.makedirs(error_plots_dir, exist_ok=True)
+
+    zone_floor_area = get_zone_floor_area(
+        iso, zone_shape, pumas_shp, puma_data_zones, base_year, output_dir
+    )
 
-    zone_floor_area = get_zone_floor_area(iso, zone_shape, pumas_shp)
+    # Read hourly slopes of all zones in the ISO
+    zone_dayhour_fits = {
+        zone: read_dayhour_fits(zone, base_year, fits_dir)
+        for zone in iso_zone_names[iso]
+    }
 
     # Slope plots for all zones in each ISO in btu/m2/C
 
     fig1, ax1 = plt.subplots()
     fig2, ax2 = plt.subplots()
     for zone in iso_zone_names[iso]:
-        dayhour_fits = pd.read_csv(
-            f"https://besciences.blob.core.windows.net/datasets/bldg_el/dayhour_fits/{zone}_dayhour_fits_{base_year}.csv",
-            index_col=0,
-        )
+        dayhour_fits = zone_dayhour_fits[zone].copy()
         for wk_wknd in ["wk", "wknd"]:
             dayhour_fits[f"s.heat.{wk_wknd}"] = (
                 abs(dayhour_fits[f"s.heat.{wk_wknd}"])
@@ -187,11 +247,11 @@ def main_plots(
     ax2.legend()
     if plot_show:
         fig1.savefig(
-            f"./Profiles/result_stats/hourly_plots/zone_plots/{iso_name[iso]}_heating.png",
+            os.path.join(zone_plots_dir, f"{iso_name[iso]}_heating.png"),
             dpi=size,
         )
         fig2.savefig(
-            f"./Profiles/result_stats/hourly_plots/zone_plots/{iso_name[iso]}_cooling.png",
+            os.path.join(zone_plots_dir, f"{iso_name[iso]}_cooling.png"),
             dpi=size,
         )
 
@@ -203,13 +263,9 @@ def main_plots(
     for wk_wknd in ["wk", "wknd"]:
         iso_floor_area = zone_floor_area.loc[iso_zone_names[iso]].sum()
 
-        # read hourly slopes
+        # hourly slopes
         dayhour_fits = {
-            i: pd.read_csv(
-                f"https://besciences.blob.core.windows.net/datasets/bldg_el/dayhour_fits/{zone}_dayhour_fits_{base_year}.csv",
-                index_col=0,
-            )
-            for i, zone in enumerate(iso_zone_names[iso])
+            i: zone_dayhour_fits[zone] for i, zone in enumerate(iso_zone_names[iso])
         }
 
         iso_dayhour_fits[f"s.heat.{wk_wknd}"] = (
@@ -293,7 +349,7 @@ def main_plots(
                 fontsize=12,
             )
             plt.savefig(
-                f"./Profiles/result_stats/hourly_plots/iso plot with error/{iso}_{wk_wknd}.png",
+                os.path.join(error_plots_dir, f"{iso}_{wk_wknd}.png"),
                 dpi=size,
             )
 
@@ -346,7 +402,7 @@ def main_plots(
             fontsize=14,
         )
         plt.savefig(
-            f"./Profiles/result_stats/hourly_plots/iso plot with error/{iso}.png",
+            os.path.join(error_plots_dir, f"{iso}.png"),
             dpi=size,
         )
 
@@ -359,18 +415,16 @@ def main_plots(
         np.sqrt(np.sum(iso_dayhour["s.cool.db.stderr"] ** 2)) / 24
     )
 
-    iso_slope.to_csv(
-        f"./Profiles/result_stats/hourly_plots/iso plot with error/{iso_name[iso]}_iso_slope_with_error.csv"
+    iso_slope_path = os.path.join(
+        error_plots_dir, f"{iso_name[iso]}_iso_slope_with_error.csv"
     )
+    iso_slope.to_csv(iso_slope_path)
 
     # Creating the zone and iso level heating and cooling load in mw/C and btu/m2/C
 
     zone_slope_df = pd.DataFrame()
     for zone in iso_zone_names[iso]:
-        hourly_data = pd.read_csv(
-            f"https://besciences.blob.core.windows.net/datasets/bldg_el/dayhour_fits/{zone}_dayhour_fits_{base_year}.csv",
-            index_col=0,
-        )
+        hourly_data = zone_dayhour_fits[zone]
 
         htg_mean = (
             np.mean(hourly_data.loc[:, "s.heat.wk"]) * 5
@@ -387,7 +441,8 @@ def main_plots(
             ]
         )
 
-    zone_slope_df.to_csv(f"./Profiles/result_stats/{iso_name[iso]}_zone_elec_mw_c.csv")
+    zone_slope_path = os.path.join(output_dir, f"{iso_name[iso]}_zone_elec_mw_c.csv")
+    zone_slope_df.to_csv(zone_slope_path)
     zone_elec_btu_m2_c = pd.DataFrame()
     zone_elec_btu_m2_c["Heating"] = (
         zone_slope_df["Heating"] / zone_floor_area["heat"] * const.conv_mw_to_btu
@@ -395,9 +450,8 @@ def main_plots(
     zone_elec_btu_m2_c["Cooling"] = (
         zone_slope_df["Cooling"] / zone_floor_area["cool"] * const.conv_mw_to_btu
     )
-    zone_elec_btu_m2_c.to_csv(
-        f"./Profiles/result_stats/{iso_name[iso]}_zone_elec_btu_m2_c.csv"
-    )
+    zone_elec_path = os.path.join(output_dir, f"{iso_name[iso]}_zone_elec_btu_m2_c.csv")
+    zone_elec_btu_m2_c.to_csv(zone_elec_path)
 
     # Creating ISO map plots containing load zones with the heating and cooling slope in btu/m2/C
     if iso in {"NY", "CA", "PJM", "SPP", "NW", "SE"}:
@@ -418,7 +472,9 @@ def main_plots(
     zone_shp = pd.DataFrame()
 
     if iso in {"NE", "PJM", "SPP", "MISO", "SW", "NW", "SE"}:
-        zone_shp = pd.concat([s for s in iso_state_overlay[iso]])
+        zone_shp = pd.concat(
+            [state_shp_overlay(s, state_shp, zone_shape) for s in iso_states[iso]]
+        )
 
     elif iso == "USA" or iso == "Outliers":
         zone_shp = state_shp_overlay("United States", country_shp, zone_shape)
@@ -468,28 +524,73 @@ def main_plots(
             )
 
             plt.savefig(
-                f"./Profiles/result_stats/hourly_plots/zone_plots/zone model/{iso}_{use}_zone_model.png",
+                os.path.join(
+                    zone_plots_dir, "zone model", f"{iso}_{use}_zone_model.png"
+                ),
                 dpi=size,
             )
 
+    return [
+        os.path.join(output_dir, f"{iso_name[iso]}_zone_floor_area_m2.csv"),
+        iso_slope_path,
+        zone_slope_path,
+        zone_elec_path,
+    ]
+
+
+def run_isos(
+    isos,
+    zone_shape,
+    pumas_shp,
+    state_shp,
+    country_shp,
+    size,
+    output_dir,
+    fits_dir=None,
+    plot_show=True,
+    base_year=const.base_year,
+    max_workers=None,
+):
+    """Creates floor area averaged slopes for several ISOs in parallel. The puma
+    overlay of all zones is computed once.
 
-if __name__ == "__main__":
-    os.makedirs(
-        os.path.join(
-            os.path.dirname(__file__),
-            "Profiles/result_stats/hourly_plots/zone_plots/zone model",
-        ),
-        exist_ok=True,
-    )
+    :param list isos: abbrev. names of ISOs.
+    :param geopandas.GeoDataFrame zone_shape: geo data frame of zone(BA) shape file
+    :param geopandas.GeoDataFrame pumas_shp: geo data frame of pumas shape file
+    :param geopandas.GeoDataFrame state_shp: geo data frame of state shape file
+    :param geopandas.GeoDataFrame country_shp: geo data frame of nation shape file
+    :param int size: defining the image size of plots in dpi.
+    :param str output_dir: directory where results and the run manifest are saved.
+    :param str fits_dir: directory of the hourly fits, see :func:`read_dayhour_fits`.
+    :param bool plot_show: show the plot or not, default to True.
+    :param int base_year: data fitting year.
+    :param int max_workers: number of processes. Defaults to the number of processors
+        on the machine.
+    :return: (*pandas.DataFrame*) -- run manifest, see :func:`helper.run_batch`.
+    """
+    zone_name_shps = sorted({z for iso in isos for z in iso_zone_name_shps[iso]})
+    puma_data_zones = zones_shp_overlay(zone_name_shps, zone_shape, pumas_shp)
+
+    tasks = {
+        iso: {
+            "iso": iso,
+            "zone_shape": zone_shape,
+            "pumas_shp": pumas_shp,
+            "state_shp": state_shp,
+            "country_shp": country_shp,
+            "size": size,
+            "plot_show": plot_show,
+            "puma_data_zones": {z: puma_data_zones[z] for z in iso_zone_name_shps[iso]},
+            "fits_dir": fits_dir,
+            "base_year": base_year,
+            "output_dir": output_dir,
+        }
+        for iso in isos
+    }
+    return run_batch(main_plots, tasks, output_dir, max_workers=max_workers)
 
-    os.makedirs(
-        os.path.join(
-            os.path.dirname(__file__),
-            "Profiles/result_stats/hourly_plots/iso plot with error",
-        ),
-        exist_ok=True,
-    )
 
+if __name__ == "__main__":
     # Reading Balancing Authority, Pumas, state and country Boundary shapefiles for overlaying
     zone_shape = read_shapefile(
         "https://besciences.blob.core.windows.net/shapefiles/USA/balancing-authorities/ba_area/ba_area.zip"
@@ -504,123 +605,42 @@ if __name__ == "__main__":
         "https://besciences.blob.core.windows.net/shapefiles/USA/nation-outlines/cb_2018_us_nation_20m.zip"
     )
 
-    # Executing the state overlay for all states in the US
-    zone_shp_state = {
-        s: state_shp_overlay(s, state_shp, zone_shape) for s in state_list
-    }
-
-    iso_state_overlay = {
-        "NE": [
-            zone_shp_state["MA"],
-            zone_shp_state["ME"],
-            zone_shp_state["NH"],
-            zone_shp_state["VT"],
-            zone_shp_state["CT"],
-            zone_shp_state["RI"],
-        ],
-        "PJM": [
-            zone_shp_state["DE"],
-            zone_shp_state["IL"],
-            zone_shp_state["IN"],
-            zone_shp_state["KY"],
-            zone_shp_state["MD"],
-            zone_shp_state["NC"],
-            zone_shp_state["MI"],
-            zone_shp_state["NJ"],
-            zone_shp_state["OH"],
-            zone_shp_state["PA"],
-            zone_shp_state["VA"],
-            zone_shp_state["WV"],
-            zone_shp_state["TN"],
-            zone_shp_state["DC"],
-        ],
-        "SPP": [
-            zone_shp_state["KS"],
-            zone_shp_state["OK"],
-            zone_shp_state["NM"],
-            zone_shp_state["TX"],
-            zone_shp_state["AR"],
-            zone_shp_state["LA"],
-            zone_shp_state["MO"],
-            zone_shp_state["SD"],
-            zone_shp_state["ND"],
-            zone_shp_state["MT"],
-            zone_shp_state["MN"],
-            zone_shp_state["IA"],
-            zone_shp_state["WY"],
-            zone_shp_state["NE"],
-        ],
-        "MISO": [
-            zone_shp_state["LA"],
-            zone_shp_state["AR"],
-            zone_shp_state["MS"],
-            zone_shp_state["MI"],
-            zone_shp_state["MO"],
-            zone_shp_state["KY"],
-            zone_shp_state["IN"],
-            zone_shp_state["IL"],
-            zone_shp_state["IA"],
-            zone_shp_state["MN"],
-            zone_shp_state["WI"],
-            zone_shp_state["ND"],
-            zone_shp_state["SD"],
-            zone_shp_state["TX"],
-            zone_shp_state["MT"],
-        ],
-        "SW": [
-            zone_shp_state["AZ"],
-            zone_shp_state["NM"],
-            zone_shp_state["CO"],
-            zone_shp_state["NV"],
-            zone_shp_state["WY"],
-            zone_shp_state["SD"],
-            zone_shp_state["NE"],
-        ],
-        "NW": [
-            zone_shp_state["CA"],
-            zone_shp_state["WA"],
-            zone_shp_state["OR"],
-            zone_shp_state["ID"],
-            zone_shp_state["NV"],
-            zone_shp_state["UT"],
-            zone_shp_state["WY"],
-            zone_shp_state["MT"],
-        ],
-        "SE": [
-            zone_shp_state["MO"],
-            zone_shp_state["KY"],
-            zone_shp_state["MS"],
-            zone_shp_state["TN"],
-            zone_shp_state["AL"],
-            zone_shp_state["GA"],
-            zone_shp_state["NC"],
-            zone_shp_state["SC"],
-            zone_shp_state["FL"],
-            zone_shp_state["VA"],
-        ],
-    }
-
     # Use base_year for model results
     base_year = const.base_year
 
     # Plot size in dpi
     size = 700
 
-    for iso in [
-        "NY",
-        "TX",
-        "CA",
-        "NE",
-        "PJM",
-        "SPP",
-        "MISO",
-        "SW",
-        "NW",
-        "SE",
-        "USA",
-        "Outliers",
-    ]:
-        main_plots(iso, zone_shape, pumas_shp, state_shp, country_shp, size)
+    # Directory to save results and run manifest
+    output_dir = os.path.join(os.path.dirname(__file__), "Profiles", "result_stats")
+
+    # Directory of hourly fits, None to read them from blob storage
+    fits_dir = None
+
+    run_isos(
+        [
+            "NY",
+            "TX",
+            "CA",
+            "NE",
+            "PJM",
+            "SPP",
+            "MISO",
+            "SW",
+            "NW",
+            "SE",
+            "USA",
+            "Outliers",
+        ],
+        zone_shape,
+        pumas_shp,
+        state_shp,
+        country_shp,
+        size,
+        output_dir,
+        fits_dir,
+        base_year=base_year,
+    )
 
     # Delete the tmp folder that holds the shapefiles localy after the script is run to completion
     shutil.rmtree(os.path.join("tmp"), ignore_errors=False, onerror=None)
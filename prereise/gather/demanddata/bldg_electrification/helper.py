@@ -1,6 +1,9 @@
 import io
 import os
+import time
 import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 
 import geopandas as gpd
 import pandas as pd
@@ -29,30 +32,24 @@ def read_shapefile(url):
     return shapefile_df
 
 
-def zone_shp_overlay(zone_name_shp, zone_shp, pumas_shp):
-    """Select pumas within a zonal load area
+def zones_shp_overlay(zone_name_shps, zone_shp, pumas_shp):
+    """Select pumas within several zonal load areas with a single overlay
 
-    :param str zone_name_shp: name of the zone in ba_area.shp
+    :param iterable zone_name_shps: names of the zones in ba_area.shp
     :param geopandas.GeoDataFrame zone_shp: geo data frame of zone(BA) shape file
     :param geopandas.GeoDataFrame pumas_shp: geo data frame of pumas shape file
-    :return: (*pandas.DataFrame*) -- puma data of all pumas within the zone,
-        including fraction within the zone
+    :return: (*dict*) -- keys are zone names, values are data frames of puma data of
+        all pumas within the zone, including fraction within the zone
     """
-    zone_shp = zone_shp[zone_shp["BA"] == zone_name_shp].copy()
+    zone_name_shps = list(zone_name_shps)
+    zone_shp = zone_shp[zone_shp["BA"].isin(zone_name_shps)].copy()
     pumas_shp["area"] = pumas_shp["geometry"].to_crs({"proj": "cea"}).area
     puma_zone = gpd.overlay(pumas_shp, zone_shp.to_crs("EPSG:4269"))
     puma_zone["area"] = puma_zone["geometry"].to_crs({"proj": "cea"}).area
     puma_zone["puma"] = "puma_" + puma_zone["GEOID10"]
 
-    puma_zone["area_frac"] = [
-        puma_zone["area"][i]
-        / list(pumas_shp[pumas_shp["puma"] == puma_zone["puma"][i]]["area"])[0]
-        for i in range(len(puma_zone))
-    ]
-
-    puma_data_zone = pd.DataFrame(
-        {"puma": puma_zone["puma"], "frac_in_zone": puma_zone["area_frac"]}
-    )
+    puma_area = pumas_shp.drop_duplicates("puma").set_index("puma")["area"]
+    puma_zone["area_frac"] = puma_zone["area"] / puma_zone["puma"].map(puma_area)
 
     puma_data = pd.read_csv(
         os.path.join(os.path.dirname(__file__), "data", "puma_data.csv"),
@@ -62,11 +59,30 @@ def zone_shp_overlay(zone_name_shp, zone_shp, pumas_shp):
         os.path.join(os.path.dirname(__file__), "data", "puma_hp_data.csv"),
         index_col="puma",
     )
-    puma_data_zone = puma_data_zone.join(puma_data, on="puma")
-    puma_data_zone = puma_data_zone.join(puma_hp.drop(columns=["state"]), on="puma")
-    puma_data_zone = puma_data_zone.set_index("puma")
 
-    return puma_data_zone
+    puma_data_zones = {}
+    for zone_name_shp in zone_name_shps:
+        puma_zone_it = puma_zone[puma_zone["BA"] == zone_name_shp]
+        puma_data_zone = pd.DataFrame(
+            {"puma": puma_zone_it["puma"], "frac_in_zone": puma_zone_it["area_frac"]}
+        ).reset_index(drop=True)
+        puma_data_zone = puma_data_zone.join(puma_data, on="puma")
+        puma_data_zone = puma_data_zone.join(puma_hp.drop(columns=["state"]), on="puma")
+        puma_data_zones[zone_name_shp] = puma_data_zone.set_index("puma")
+
+    return puma_data_zones
+
+
+def zone_shp_overlay(zone_name_shp, zone_shp, pumas_shp):
+    """Select pumas within a zonal load area
+
+    :param str zone_name_shp: name of the zone in ba_area.shp
+    :param geopandas.GeoDataFrame zone_shp: geo data frame of zone(BA) shape file
+    :param geopandas.GeoDataFrame pumas_shp: geo data frame of pumas shape file
+    :return: (*pandas.DataFrame*) -- puma data of all pumas within the zone,
+        including fraction within the zone
+    """
+    return zones_shp_overlay([zone_name_shp], zone_shp, pumas_shp)[zone_name_shp]
 
 
 def state_shp_overlay(state, state_shp, zone_shp):
@@ -95,3 +111,55 @@ def state_shp_overlay(state, state_shp, zone_shp):
     zone_state = zone_state.drop(zone_state[zone_state["area_frac"] <= 0.00001].index)
 
     return zone_state
+
+
+def _run_task(func, kwargs):
+    """Run a task of a batch, catching errors.
+
+    :param callable func: function to run.
+    :param dict kwargs: keyword arguments of the function.
+    :return: (*dict*) -- status, run time, files written and error message, if any.
+    """
+    start = time.time()
+    try:
+        files = func(**kwargs)
+        status, error = "ok", ""
+    except Exception as e:
+        files, status, error = [], "failed", repr(e)
+    return {
+        "status": status,
+        "seconds": round(time.time() - start, 3),
+        "files": ";".join(files or []),
+        "error": error,
+    }
+
+
+def run_batch(func, tasks, output_dir, max_workers=None, initializer=None, initargs=()):
+    """Run independent tasks in a process pool and write a run manifest into the output
+    directory. A failing task does not stop the batch, its error is recorded in the
+    manifest.
+
+    :param callable func: module level function to run, returning the list of files
+        it writes.
+    :param dict tasks: keys are task names, values are dictionaries of keyword
+        arguments of ``func``.
+    :param str output_dir: directory where the manifest is saved.
+    :param int max_workers: number of processes. Defaults to the number of processors
+        on the machine. Tasks are run in the current process if 1.
+    :param callable initializer: function run at the start of each process.
+    :param tuple initargs: arguments of the initializer.
+    :return: (*pandas.DataFrame*) -- manifest with status, run time, files written and
+        error message of each task.
+    """
+    if max_workers == 1:
+        results = [_run_task(func, kwargs) for kwargs in tasks.values()]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=max_workers, initializer=initializer, initargs=initargs
+        ) as executor:
+            results = list(executor.map(_run_task, repeat(func), list(tasks.values())))
+
+    manifest = pd.DataFrame(results, index=pd.Index(list(tasks), name="task"))
+    os.makedirs(output_dir, exist_ok=True)
+    manifest.to_csv(os.path.join(output_dir, "manifest.csv"))
+    return manifest
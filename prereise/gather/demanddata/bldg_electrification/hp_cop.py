@@ -0,0 +1,173 @@
+from functools import lru_cache
+
+import numpy as np
+
+from prereise.gather.demanddata.bldg_electrification import const
+
+
+@lru_cache(maxsize=None)
+def get_hp_param(model, end_use="htg"):
+    """Return the parameters of a heat pump model.
+
+    :param str model: type of heat pump.
+    :param str end_use: either *'htg'* for space heating or *'dhw'* for hot water.
+    :return: (*dict*) -- parameters of the model.
+    """
+    hp_param = const.hp_param if end_use == "htg" else const.hp_param_dhw
+    return hp_param.set_index("model").loc[model].astype(float).to_dict()
+
+
+def calculate_cop_base_cr_base(temp_c, model):
+    """Compute the base COP and capacity ratio of a space heating heat pump.
+
+    :param numpy.ndarray temp_c: temperatures, in C.
+    :param str model: type of heat pump.
+    :return: (*tuple*) -- arrays of base COPs and capacity ratios.
+    """
+    p = get_hp_param(model)
+    temp_k = np.asarray(temp_c, dtype=float) + 273.15
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cr_base = np.where(
+            temp_k + p["b"] > 0, p["a"] * np.log(temp_k + p["b"]) + p["c"], 0
+        )
+
+    cop_base = np.select(
+        [temp_k > p["T2_K"], temp_k > p["T3_K"], temp_k <= p["T3_K"]],
+        [
+            ((p["COP1"] - p["COP2"]) / (p["T1_K"] - p["T2_K"])) * temp_k
+            + (p["COP2"] * p["T1_K"] - p["COP1"] * p["T2_K"]) / (p["T1_K"] - p["T2_K"]),
+            ((p["COP2"] - p["COP3"]) / (p["T2_K"] - p["T3_K"])) * temp_k
+            + (p["COP3"] * p["T2_K"] - p["COP2"] * p["T3_K"]) / (p["T2_K"] - p["T3_K"]),
+            (cr_base / p["CR3"]) * p["COP3"],
+        ],
+        default=0,
+    )
+
+    return cop_base, cr_base
+
+
+def calculate_cop(temp_c, model):
+    """Compute the COP of a space heating heat pump, including auxiliary resistance
+    heating when the capacity ratio is low.
+
+    :param numpy.ndarray temp_c: temperatures, in C.
+    :param str model: type of heat pump.
+    :return: (*numpy.ndarray*) -- COPs.
+    """
+    cop_base, cr_base = calculate_cop_base_cr_base(temp_c, model)
+    eaux = np.maximum(0.75 - cr_base, 0)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cop = (cr_base + eaux) / (cr_base / cop_base + eaux)
+    return np.where(cr_base == 0, 1, np.maximum(cop, 1))
+
+
+def htg_to_cop(temp_c, model):
+    """Compute the COP of a space heating heat pump. The future heat pump performs at
+    least as well as the advanced performance heat pump.
+
+    :param numpy.ndarray temp_c: temperatures, in C.
+    :param str model: type of heat pump.
+    :return: (*numpy.ndarray*) -- COPs.
+    """
+    if model == "futurehp":
+        return np.maximum(
+            calculate_cop(temp_c, model), calculate_cop(temp_c, "advperfhp")
+        )
+    else:
+        return calculate_cop(temp_c, model)
+
+
+def dhw_cop(temp_c, model):
+    """Compute the COP of a heat pump water heater.
+
+    :param numpy.ndarray temp_c: temperatures, in C.
+    :param str model: type of heat pump.
+    :return: (*numpy.ndarray*) -- COPs.
+    """
+    p = get_hp_param(model, "dhw")
+    temp_c = np.asarray(temp_c, dtype=float)
+
+    cop_base = np.where(
+        temp_c <= p["t_cp"],
+        ((temp_c - p["t_low"]) / (p["t_cp"] - p["t_low"]))
+        * (p["cop_cp"] - p["cop_low"])
+        + p["cop_low"],
+        ((temp_c - p["t_cp"]) / (p["t_high"] - p["t_cp"]))
+        * (p["cop_high"] - p["cop_cp"])
+        + p["cop_cp"],
+    )
+    return np.maximum(cop_base, p["cop_er"])
+
+
+class CopTable:
+    """COP lookup table on a regular temperature grid.
+
+    :param numpy.ndarray temps: grid temperatures, in C, evenly spaced.
+    :param numpy.ndarray cops: COPs at the grid temperatures.
+    """
+
+    def __init__(self, temps, cops):
+        self.temps = np.asarray(temps, dtype=float)
+        self.cops = np.asarray(cops, dtype=float)
+        self.t_min = self.temps[0]
+        self.step = (self.temps[-1] - self.temps[0]) / (len(self.temps) - 1)
+
+    @classmethod
+    def from_frame(cls, cop_df):
+        """Build a lookup table from a data frame such as the
+        *cop_temp_htg_{model}.csv* tables.
+
+        :param pandas.DataFrame cop_df: COPs in a *cop* column, temperatures in a
+            *temp* column or as index.
+        :return: (*CopTable*) -- lookup table.
+        """
+        temps = cop_df["temp"] if "temp" in cop_df.columns else cop_df.index
+        return cls(temps, cop_df["cop"])
+
+    def get_index(self, temp_c):
+        """Return the indices of the nearest grid temperatures. Temperatures beyond the
+        grid are mapped to the closest end of the grid.
+
+        :param numpy.ndarray temp_c: temperatures, in C.
+        :return: (*numpy.ndarray*) -- indices in the grid.
+        """
+        index = np.rint((np.asarray(temp_c, dtype=float) - self.t_min) / self.step)
+        return np.clip(np.nan_to_num(index), 0, len(self.temps) - 1).astype(int)
+
+    def lookup(self, temp_c):
+        """Return the COPs at the nearest grid temperatures.
+
+        :param numpy.ndarray temp_c: temperatures, in C.
+        :return: (*numpy.ndarray*) -- COPs.
+        """
+        cop = self.cops[self.get_index(temp_c)]
+        return np.where(np.isnan(temp_c), np.nan, cop)
+
+
+@lru_cache(maxsize=None)
+def get_cop_table(
+    model, end_use="htg", t_min=-60.0, t_max=60.0, step=0.1, max_temp=None
+):
+    """Return a COP lookup table for a heat pump model.
+
+    :param str model: type of heat pump.
+    :param str end_use: either *'htg'* for space heating or *'dhw'* for hot water.
+    :param float t_min: lowest temperature of the grid, in C.
+    :param float t_max: highest temperature of the grid, in C.
+    :param float step: grid spacing, in C.
+    :param float max_temp: temperature above which the COP is held constant, in C.
+        The *cop_temp_htg_{model}.csv* tables use 25 C.
+    :return: (*CopTable*) -- lookup table.
+    """
+    temps = np.round(
+        np.linspace(t_min, t_max, int(round((t_max - t_min) / step)) + 1), 6
+    )
+    model_temps = temps if max_temp is None else np.minimum(temps, max_temp)
+    cops = (
+        htg_to_cop(model_temps, model)
+        if end_use == "htg"
+        else dhw_cop(model_temps, model)
+    )
+    return CopTable(temps, cops)
@@ -1,27 +1,36 @@
 import os
-from itertools import product
+from functools import lru_cache
 
 import numpy as np
 import pandas as pd
 
 from prereise.gather.demanddata.bldg_electrification import const
 from prereise.gather.demanddata.bldg_electrification.ff2elec_profile_generator_cook import (
-    generate_cook_profiles,
+    calculate_cook_profiles,
 )
 from prereise.gather.demanddata.bldg_electrification.ff2elec_profile_generator_dhw import (
-    generate_dhw_profiles,
+    calculate_dhw_profiles,
 )
 from prereise.gather.demanddata.bldg_electrification.ff2elec_profile_generator_htg import (
-    generate_htg_profiles,
+    calculate_htg_profiles,
 )
 from prereise.gather.demanddata.bldg_electrification.helper import (
     read_shapefile,
     zone_shp_overlay,
 )
+from prereise.gather.demanddata.bldg_electrification.hp_cop import CopTable
 from prereise.gather.demanddata.bldg_electrification.load_projection_scenario import (  # noqa: F401
     LoadProjectionScenario,
 )
+from prereise.gather.demanddata.bldg_electrification.weather_data import (
+    register_weather_cache,
+)
+from prereise.gather.demanddata.bldg_electrification.zone_operator import ZoneOperator
+from prereise.gather.demanddata.bldg_electrification.zone_profile_generator import (
+    calculate_energy as calculate_energy_base,
+)
 from prereise.gather.demanddata.bldg_electrification.zone_profile_generator import (
+    get_hourly_fit_coefficients,
     zonal_data,
 )
 
@@ -123,6 +132,50 @@ def temp_to_energy(temp_series, hourly_fits_df, db_wb_fit, base_scen, hp_heat_co
     return [base_eng, hp_eng, resist_eng, max(cool_eng, 0) + max(mid_cool_eng, 0)]
 
 
+def calculate_energy(temp_df, hourly_fits_df, db_wb_fit, base_scen, hp_heat_cop):
+    """Compute baseload, heating, and cooling electricity for all hours at once under
+    model base year scenario. This is the batched equivalent of
+    :func:`temp_to_energy`.
+
+    :param pandas.DataFrame temp_df: weather records for the given hours.
+    :param pandas.DataFrame hourly_fits_df: hourly and week/weekend breakpoints and
+        coefficients for electricity use equations.
+    :param pandas.DataFrame db_wb_fit: least-square estimators of the linear
+        relationship between WBT and DBT
+    :param LoadProjectionScenario base_scen: reference scenario instance
+    :param pandas.DataFrame/CopTable hp_heat_cop: heat pump COP against DBT with a
+        0.1 degree C interval
+    :return: (*numpy.ndarray*) -- (hours x 4) array of energy for baseload, heat pump
+        heating, resistance heating, and cooling.
+    """
+    coef = get_hourly_fit_coefficients(temp_df, hourly_fits_df)
+    base_eng, heat_eng, cool_eng = calculate_energy_base(
+        temp_df, hourly_fits_df, db_wb_fit, coef
+    ).T
+
+    # Separate resistance heat and heat pump energy by COP in heating hours
+    temp = temp_df["temp_c"].to_numpy(dtype=float)
+    heating = temp <= coef["t_bph"]
+    cop_hp = np.where(heating, _as_cop_table(hp_heat_cop).lookup(temp), 1)
+    hp_frac = base_scen.hp_heat_frac / cop_hp
+    denominator = base_scen.resist_heat_frac + hp_frac
+    hp_eng = np.where(heating, heat_eng * hp_frac / denominator, 0)
+    resist_eng = np.where(
+        heating, heat_eng * base_scen.resist_heat_frac / denominator, 0
+    )
+
+    return np.column_stack([base_eng, hp_eng, resist_eng, cool_eng])
+
+
+def _as_cop_table(hp_cop):
+    """Return a COP lookup table.
+
+    :param pandas.DataFrame/CopTable hp_cop: heat pump COP against DBT.
+    :return: (*CopTable*) -- lookup table.
+    """
+    return hp_cop if isinstance(hp_cop, CopTable) else CopTable.from_frame(hp_cop)
+
+
 def scale_energy(
     base_energy,
     temp_df,
@@ -139,9 +192,9 @@ def scale_energy(
     :param pandas.DataFrame temp_df: weather records the given hours
     :param LoadProjectionScenario base_scen: reference scenario instance
     :param LoadProjectionScenario new_scen: projection scenario instance
-    :param pandas.DataFrame midperfhp_cop: average performance heat pump COP against
-        DBT with a 0.1 degree C interval
-    :param pandas.DataFrame advperfhp_cop: advanced performance heat pump (90%
+    :param pandas.DataFrame/CopTable midperfhp_cop: average performance heat pump COP
+        against DBT with a 0.1 degree C interval
+    :param pandas.DataFrame/CopTable advperfhp_cop: advanced performance heat pump (90%
         percentile cold climate heat pump) COP against DBT with a 0.1 degree C interval
     :param str new_hp_profile: either "elec" or "ff". Choose either current electric
         heat pump heating demand profiles or current fossil fuel heating demand that the
@@ -154,33 +207,26 @@ def scale_energy(
         base_scen
     ) * new_scen.frac_cool_growth(base_scen)
     resist_load_scaler = new_scen.frac_resist_growth(base_scen)
-    if new_scen.compare_hp_heat_type(base_scen):
-        hp_load_scaler = new_scen.frac_hp_growth(base_scen)
-    else:
-        if base_scen.hp_type_heat == "midperfhp":
-            base_hp_heat_cop = midperfhp_cop
-        elif base_scen.hp_type_heat == "advperfhp":
-            base_hp_heat_cop = advperfhp_cop
-        if new_scen.hp_type_heat == "midperfhp":
-            new_hp_heat_cop = midperfhp_cop
-        elif new_scen.hp_type_heat == "advperfhp":
-            new_hp_heat_cop = advperfhp_cop
-
-        hp_cop_adv = base_hp_heat_cop / new_hp_heat_cop  # <1
-
-        hp_cop_scaler = pd.Series(dtype="float64")
-        for i in temp_df.index:
-            hp_cop_scaler.loc[i] = hp_cop_adv.loc[
-                round(temp_df.loc[i, "temp_c"], 1), "cop"
-            ]
-        hp_load_scaler = hp_cop_scaler * new_scen.frac_hp_growth(base_scen)
+
+    hp_load_scaler = new_scen.frac_hp_growth(base_scen)
+
+    # COPs of all hours are gathered from the 0.1 degree C tables at once
+    hp_cop_tables = {
+        "midperfhp": _as_cop_table(midperfhp_cop),
+        "advperfhp": _as_cop_table(advperfhp_cop),
+    }
+    temp = temp_df["temp_c"].to_numpy(dtype=float)
+    if not new_scen.compare_hp_heat_type(base_scen) or np.isinf(hp_load_scaler):
+        new_hp_cop_scaler = pd.Series(
+            hp_cop_tables[new_scen.hp_type_heat].lookup(temp), index=temp_df.index
+        )
+    if not new_scen.compare_hp_heat_type(base_scen):
+        hp_cop_scaler = (
+            hp_cop_tables[base_scen.hp_type_heat].lookup(temp) / new_hp_cop_scaler
+        )  # <1
+        hp_load_scaler = hp_cop_scaler * hp_load_scaler
 
     if np.isinf(new_scen.frac_hp_growth(base_scen)):
-        new_hp_cop_scaler = pd.Series(dtype="float64")
-        for i in temp_df.index:
-            new_hp_cop_scaler.loc[i] = new_hp_heat_cop.loc[
-                round(temp_df.loc[i, "temp_c"], 1), "cop"
-            ]
         resist_hp_load_scaler = (
             new_scen.hp_heat_area_m2 / base_scen.resist_heat_area_m2 / new_hp_cop_scaler
         )
@@ -206,8 +252,102 @@ def scale_energy(
     return scen_load_mwh
 
 
+@register_weather_cache
+@lru_cache(maxsize=128)
+def get_ff2hp_state_profiles(end_use, clas, state, year, hp_model):
+    """Compute hourly electricity loads from converting fossil fuel space or water
+    heating to heat pumps for all pumas within a state. Profiles are held in memory as
+    read-only float32 arrays, computed once and shared by all projection scenarios.
+    Each profile takes 8760 x 4 bytes per puma, i.e. about 10 MB for the state with the
+    most pumas, and the 128 most recently used ones are kept. The cache is cleared when
+    the weather data are configured with :func:`weather_data.set_weather_data` and can
+    be cleared manually with ``get_ff2hp_state_profiles.cache_clear()``.
+
+    :param str end_use: either *'dhw'* for hot water or *'htg'* for space heating.
+    :param str clas: type of building.
+    :param str state: abbrev. of state.
+    :param int year: weather year.
+    :param str hp_model: type of heat pump.
+    :return: (*tuple*) -- a pandas.Index of pumas and a (hours x pumas)
+        numpy.ndarray of loads in MW.
+    """
+    if end_use == "dhw":
+        profiles = calculate_dhw_profiles(year, state, clas, hp_model)
+    else:
+        profiles = calculate_htg_profiles(year, state, clas, hp_model)
+    values = profiles.to_numpy(dtype=np.float32)
+    values.setflags(write=False)
+    return profiles.columns, values
+
+
+def zone_ff2hp_profiles(
+    end_use, clas, puma_data, weather_years, hp_model, output_dir=None
+):
+    """Compute hourly electricity loads of a zone from converting fossil fuel space or
+    water heating to heat pumps.
+
+    :param str end_use: either *'dhw'* for hot water or *'htg'* for space heating.
+    :param str clas: type of building.
+    :param pandas.DataFrame puma_data: puma data within zone,
+        output of :func:`zone_shp_overlay`
+    :param list weather_years: weather years.
+    :param str hp_model: type of heat pump.
+    :param str output_dir: directory where puma profiles of states are written as csv
+        files, as done by the ff2elec profile generators. Defaults to None, i.e. no
+        file is written.
+    :return: (*numpy.ndarray*) -- hourly loads in MW for all weather years.
+    """
+    operator = ZoneOperator.from_puma_data(puma_data)
+    profiles = []
+    for year in weather_years:
+        zone_load = 0
+        for state in sorted(set(puma_data["state"])):
+            pumas, values = get_ff2hp_state_profiles(
+                end_use, clas, state, year, hp_model
+            )
+            if output_dir is not None:
+                filename = os.path.join(
+                    output_dir,
+                    f"elec_{end_use}_ff2hp_{clas}_{state}_{year}_{hp_model}_mw.csv",
+                )
+                if not os.path.isfile(filename):
+                    os.makedirs(output_dir, exist_ok=True)
+                    pd.DataFrame(values, columns=pumas).to_csv(filename, index=False)
+            zone_load = zone_load + operator.sum(pd.DataFrame(values.T, index=pumas))
+        profiles.append(zone_load.iloc[0].to_numpy())
+    return np.concatenate(profiles)
+
+
+def zone_ff2hp_cook(clas, puma_data, cook_eff, output_dir=None):
+    """Compute electricity loads of a zone from converting fossil fuel cooking to
+    electric cooking.
+
+    :param str clas: type of building.
+    :param pandas.DataFrame puma_data: puma data within zone,
+        output of :func:`zone_shp_overlay`
+    :param str cook_eff: efficiency of cooking.
+    :param str output_dir: directory where puma loads of states are written as csv
+        files. Defaults to None, i.e. no file is written.
+    :return: (*float*) -- constant hourly load in MW.
+    """
+    operator = ZoneOperator.from_puma_data(puma_data)
+    zone_load = 0
+    for state in sorted(set(puma_data["state"])):
+        cook_elec = calculate_cook_profiles(state, clas, cook_eff)
+        if output_dir is not None:
+            filename = os.path.join(
+                output_dir,
+                f"elec_cook_ff2hp_{clas}_{state}_{const.base_year}_{cook_eff}_mw.csv",
+            )
+            if not os.path.isfile(filename):
+                os.makedirs(output_dir, exist_ok=True)
+                cook_elec.to_csv(filename)
+        zone_load += operator.sum(cook_elec).iloc[0]
+    return zone_load
+
+
 def ff_electrify_profiles(
-    weather_years, puma_data, base_scen, new_scen, new_hp_profile
+    weather_years, puma_data, base_scen, new_scen, new_hp_profile, output_dir=None
 ):
     """Calculate hourly electricity loads for a projection scenario from converting
     fossil fuel heating, dhw and cooking to electric ones
@@ -221,119 +361,12 @@ def ff_electrify_profiles(
     :param str new_hp_profile: either "elec" or "ff". Choose either current electric
         heat pump heating demand profiles or current fossil fuel heating demand that the
         projected newly electrified load will follow.
+    :param str output_dir: directory where puma profiles of states are written as csv
+        files. Defaults to None, i.e. profiles are only kept in memory.
     :return (*pandas.DataFrame*) -- hourly projection load from converting fossil fuel
         consumption to electricity for projection scenarios given weather conditions
         from selected weather years.
     """
-
-    def ff2hp_dhw_profiles(clas):
-        ff2hp_dhw_pumas_yrs = pd.DataFrame()
-        for weather_year, state in product(weather_years, zone_states):
-            if not os.path.isfile(
-                os.path.join(
-                    os.path.dirname(__file__),
-                    "Profiles",
-                    f"elec_dhw_ff2hp_{clas}_{state}_{weather_year}_{hp_type_dhw}_mw.csv",
-                )
-            ):
-                print(f"generating hot water profiles for {state}...")
-                generate_dhw_profiles(weather_year, [state], clas, hp_type_dhw)
-
-        for weather_year in weather_years:
-            ff2hp_dhw_pumas = pd.concat(
-                list(
-                    pd.Series(data=zone_states).apply(
-                        lambda x: pd.read_csv(
-                            os.path.join(
-                                os.path.dirname(__file__),
-                                "Profiles",
-                                f"elec_dhw_ff2hp_{clas}_{x}_{weather_year}_{hp_type_dhw}_mw.csv",
-                            )
-                        )
-                    )
-                ),
-                axis=1,
-            )
-            ff2hp_dhw_pumas_yrs = pd.concat(
-                [ff2hp_dhw_pumas_yrs, ff2hp_dhw_pumas], ignore_index=True
-            )
-        ff2hp_dhw_yrs = (
-            ff2hp_dhw_pumas_yrs[puma_data.index]
-            .mul(puma_data["frac_in_zone"])
-            .sum(axis=1)
-        )
-        return ff2hp_dhw_yrs
-
-    def ff2hp_htg_profiles(clas):
-        ff2hp_htg_pumas_yrs = pd.DataFrame()
-        for weather_year, state in product(weather_years, zone_states):
-            if not os.path.isfile(
-                os.path.join(
-                    os.path.dirname(__file__),
-                    "Profiles",
-                    f"elec_htg_ff2hp_{clas}_{state}_{weather_year}_{hp_type_heat}_mw.csv",
-                )
-            ):
-                print(f"generating ff heating profiles for {state}...")
-                generate_htg_profiles(weather_year, [state], clas, hp_type_heat)
-
-        for weather_year in weather_years:
-            ff2hp_htg_pumas = pd.concat(
-                list(
-                    pd.Series(data=zone_states).apply(
-                        lambda x: pd.read_csv(
-                            os.path.join(
-                                os.path.dirname(__file__),
-                                "Profiles",
-                                f"elec_htg_ff2hp_{clas}_{x}_{weather_year}_{hp_type_heat}_mw.csv",
-                            )
-                        )
-                    )
-                ),
-                axis=1,
-            )
-            ff2hp_htg_pumas_yrs = pd.concat(
-                [ff2hp_htg_pumas_yrs, ff2hp_htg_pumas], ignore_index=True
-            )
-        ff2hp_htg_yrs = (
-            ff2hp_htg_pumas_yrs[puma_data.index]
-            .mul(puma_data["frac_in_zone"])
-            .sum(axis=1)
-        )
-        return ff2hp_htg_yrs
-
-    def ff2hp_cook_profiles(clas):
-        for state in zone_states:
-            if not os.path.isfile(
-                os.path.join(
-                    os.path.dirname(__file__),
-                    "Profiles",
-                    f"elec_cook_ff2hp_{clas}_{state}_{const.base_year}_{cook_eff}_mw.csv",
-                )
-            ):
-                print(f"generating ff cooking profiles for {state}...")
-                generate_cook_profiles(const.base_year, [state], clas, cook_eff)
-
-        ff2hp_cook_pumas = pd.concat(
-            list(
-                pd.Series(data=zone_states).apply(
-                    lambda x: pd.read_csv(
-                        os.path.join(
-                            os.path.dirname(__file__),
-                            "Profiles",
-                            f"elec_cook_ff2hp_{clas}_{x}_{const.base_year}_{cook_eff}_mw.csv",
-                        ),
-                        index_col=0,
-                    )
-                )
-            )
-        ).iloc[:, 0]
-        ff2hp_cook = (
-            ff2hp_cook_pumas.loc[puma_data.index].mul(puma_data["frac_in_zone"]).sum()
-        )
-        return ff2hp_cook
-
-    zone_states = list(set(puma_data["state"]))
     hours_utc_weather_years = pd.date_range(
         start=f"{weather_years[0]}-01-01",
         end=f"{weather_years[-1]+1}-01-01",
@@ -345,37 +378,47 @@ def ff_electrify_profiles(
     cook_eff = new_scen.cook_efficiency
     ff2hp_load_mwh = pd.DataFrame(index=hours_utc_weather_years)
     for clas in const.classes:
+        # scale energy consumption by floor area information
+        floor_area_growth = new_scen.floor_area_growth_type(base_scen, clas)
+
         frac_dhw_ff2hp = new_scen.frac_dhw_ff2hp(base_scen, clas)
         if frac_dhw_ff2hp != 0:
-            ff2hp_load_mwh[f"dhw_{clas}"] = ff2hp_dhw_profiles(clas).to_list()
             ff2hp_load_mwh[f"dhw_{clas}"] = (
-                ff2hp_load_mwh[f"dhw_{clas}"]
-                * new_scen.floor_area_growth_type(base_scen, clas)
+                zone_ff2hp_profiles(
+                    "dhw", clas, puma_data, weather_years, hp_type_dhw, output_dir
+                )
+                * floor_area_growth
                 * frac_dhw_ff2hp
-            )  # scale energy consumption by floor area information
+            )
 
         frac_htg_ff2hp = new_scen.frac_htg_ff2hp(base_scen, clas)
         if new_hp_profile == "ff" and frac_htg_ff2hp != 0:
-            ff2hp_load_mwh[f"htg_{clas}"] = ff2hp_htg_profiles(clas).to_list()
             ff2hp_load_mwh[f"htg_{clas}"] = (
-                ff2hp_load_mwh[f"htg_{clas}"]
-                * new_scen.floor_area_growth_type(base_scen, clas)
+                zone_ff2hp_profiles(
+                    "htg", clas, puma_data, weather_years, hp_type_heat, output_dir
+                )
+                * floor_area_growth
                 * frac_htg_ff2hp
             )
 
         frac_cook_ff2hp = new_scen.frac_cook_ff2hp(base_scen, clas)
         if frac_cook_ff2hp != 0:
-            ff2hp_load_mwh[f"cook_{clas}"] = ff2hp_cook_profiles(clas)
             ff2hp_load_mwh[f"cook_{clas}"] = (
-                ff2hp_load_mwh[f"cook_{clas}"]
-                * new_scen.floor_area_growth_type(base_scen, clas)
-                * new_scen.frac_cook_ff2hp(base_scen, clas)
+                zone_ff2hp_cook(clas, puma_data, cook_eff, output_dir)
+                * floor_area_growth
+                * frac_cook_ff2hp
             )
     return ff2hp_load_mwh
 
 
 def predict_scenario(
-    zone_name, zone_name_shp, base_scen, new_scens, weather_years, new_hp_profile
+    zone_name,
+    zone_name_shp,
+    base_scen,
+    new_scens,
+    weather_years,
+    new_hp_profile,
+    output_dir=None,
 ):
     """Load projection for one zone in all selected weather years.
 
@@ -388,6 +431,8 @@ def predict_scenario(
     :param str new_hp_profile: either "elec" or "ff". Choose either current electric
         heat pump heating demand profiles or current fossil fuel heating demand that
         the projected newly electrified load will follow.
+    :param str output_dir: directory where puma profiles of states are written as csv
+        files. Defaults to None, i.e. profiles are only kept in memory.
     :return (*dict*) -- hourly projected load breakdowns for all scenarios, keys are
         scenario names, values are data frames of load breakdowns.
     """
@@ -444,8 +489,8 @@ def predict_scenario(
             "cop_temp_htg_advperfhp.csv",
         )
     )
-    midperfhp_cop.index = midperfhp_cop["temp"]
-    advperfhp_cop.index = advperfhp_cop["temp"]
+    midperfhp_cop = CopTable.from_frame(midperfhp_cop)
+    advperfhp_cop = CopTable.from_frame(advperfhp_cop)
 
     if base_scen.hp_type_heat == "midperfhp":
         base_hp_heat_cop = midperfhp_cop
@@ -459,23 +504,15 @@ def predict_scenario(
         {"hour_utc": hours_utc_weather_years}
     )
 
-    energy_list = zone_profile_refload_MWh.hour_utc.apply(
-        lambda x: temp_to_energy(
-            temp_df.loc[x], hourly_fits_df, db_wb_fit, base_scen, base_hp_heat_cop
-        )
+    energy = calculate_energy(
+        temp_df, hourly_fits_df, db_wb_fit, base_scen, base_hp_heat_cop
     )
-
     (
         zone_profile_refload_MWh["base_load_mw"],
         zone_profile_refload_MWh["heat_hp_load_mw"],
         zone_profile_refload_MWh["heat_resist_load_mw"],
         zone_profile_refload_MWh["cool_load_mw"],
-    ) = (
-        energy_list.apply(lambda x: x[0]),
-        energy_list.apply(lambda x: x[1]),
-        energy_list.apply(lambda x: x[2]),
-        energy_list.apply(lambda x: x[3]),
-    )
+    ) = energy.T
     zone_profile_refload_MWh.set_index("hour_utc", inplace=True)
 
     # scale energy to each projection scenarios
@@ -494,7 +531,12 @@ def predict_scenario(
             new_hp_profile,
         )
         ff2hp_profile_load_mwh[id] = ff_electrify_profiles(
-            weather_years, puma_data_zone, base_scen, scenario, new_hp_profile
+            weather_years,
+            puma_data_zone,
+            base_scen,
+            scenario,
+            new_hp_profile,
+            output_dir,
         )
         zone_profile_load_mwh[id] = pd.concat(
             [elec_profile_load_mwh[id], ff2hp_profile_load_mwh[id]], axis=1
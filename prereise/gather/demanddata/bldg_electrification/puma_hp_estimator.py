@@ -28,34 +28,29 @@ def puma_county_shp_overlay(pumas_shp, county_shp):
 
     # read AHS metropolitan data on HP
     hp_metro_ahs = pd.read_excel(
-        os.path.join(os.path.dirname("__file__"), "data", "hp_ahs.xlsx"), dtype=str
-    )
-    hp_metro_ahs["counties"] = (
-        hp_metro_ahs.filter(like="county").stack().groupby(level=0).apply(list).tolist()
+        os.path.join(os.path.dirname(__file__), "data", "hp_ahs.xlsx"), dtype=str
     )
 
-    for i in range(len(hp_metro_ahs)):
-        county_shp.loc[
-            county_shp.index.isin(hp_metro_ahs.loc[i, "counties"]), "metro_id"
-        ] = i
-        county_shp.loc[
-            county_shp.index.isin(hp_metro_ahs.loc[i, "counties"]), "HP rate"
-        ] = hp_metro_ahs.loc[i, "HP rate"]
+    # a county listed in several metropolitan areas is assigned to the last one
+    county_metro = hp_metro_ahs.filter(like="county").stack().reset_index(level=1)
+    county_metro = county_metro[0].drop_duplicates(keep="last")
+    county_shp["metro_id"] = county_shp.index.map(
+        pd.Series(county_metro.index, index=county_metro.to_numpy())
+    )
     county_shp = county_shp[~county_shp["metro_id"].isna()]
     county_shp = county_shp.copy()
-    county_shp["HP rate"] = county_shp["HP rate"].astype("float64")
     county_shp["metro_id"] = county_shp["metro_id"].astype("int64")
+    county_shp["HP rate"] = (
+        county_shp["metro_id"].map(hp_metro_ahs["HP rate"]).astype("float64")
+    )
     county_shp = county_shp.dissolve(by="metro_id")
     county_shp["metro_id"] = county_shp.index
 
     puma_metro = gpd.overlay(pumas_shp, county_shp, keep_geom_type=True)
     puma_metro["area"] = puma_metro["geometry"].to_crs({"proj": "cea"}).area
 
-    puma_metro["area_frac"] = [
-        puma_metro["area"][i]
-        / list(pumas_shp[pumas_shp["puma"] == puma_metro["puma"][i]]["area"])[0]
-        for i in range(len(puma_metro))
-    ]
+    puma_area = pumas_shp.drop_duplicates("puma").set_index("puma")["area"]
+    puma_metro["area_frac"] = puma_metro["area"] / puma_metro["puma"].map(puma_area)
     puma_metro = puma_metro.drop(puma_metro[puma_metro["area_frac"] <= 0.01].index)
     puma_data_metro = pd.DataFrame(
         {
@@ -76,9 +71,7 @@ def puma_county_shp_overlay(pumas_shp, county_shp):
         ),
         index_col=0,
     )
-    puma_data_metro["ng_price"] = puma_data_metro.apply(
-        lambda x: ng_price.loc[x.loc["state"], "$/kWh"], axis=1
-    )
+    puma_data_metro["ng_price"] = puma_data_metro["state"].map(ng_price["$/kWh"])
     return puma_data_metro
 
 
@@ -94,27 +87,25 @@ def metro_data(puma_data):
         of floor area that use electricity for space heating, average natural gas
         price for year 2019, normal year HDD, and AHS heat pump penetration rate.
     """
-    puma_fuel = const.puma_fuel
-    stats = pd.DataFrame()
-    for id, puma_df in puma_data.groupby("metro_id"):
-        puma_fuel_metro = puma_fuel[puma_fuel.index.isin(puma_df.index)]
-        puma_pop_weights = (puma_df["pop"] * puma_df["frac_in_zone"]) / sum(
-            puma_df["pop"] * puma_df["frac_in_zone"]
-        )
+    metro_id = puma_data["metro_id"]
+    puma_fuel = const.puma_fuel.reindex(puma_data.index)
+    puma_pop = puma_data["pop"] * puma_data["frac_in_zone"]
+    puma_pop_weights = puma_pop / puma_pop.groupby(metro_id).transform("sum")
 
-        stats.loc[id, "frac_elec_htg"] = puma_fuel_metro["hh_elec"].mul(
-            puma_pop_weights, axis=0
-        ).sum(axis=0) / puma_fuel_metro["hh_total"].mul(puma_pop_weights, axis=0).sum(
-            axis=0
-        )
-        stats.loc[id, "frac_elec_htg_sq"] = stats.loc[id, "frac_elec_htg"] ** 2
-        stats.loc[id, "log_hdd"] = np.log(
-            (puma_df["hdd65_normals"] * puma_pop_weights).sum()
-        )
-        stats.loc[id, "natgas_price"] = (
-            puma_data["ng_price"].mul(puma_pop_weights, axis=0).sum(axis=0)
-        )
-        stats.loc[id, "hp_penetration"] = puma_df["hp_penetration"][0]
+    def weighted_sum(values):
+        return (values * puma_pop_weights).groupby(metro_id).sum()
+
+    stats = pd.DataFrame(
+        {
+            "frac_elec_htg": weighted_sum(puma_fuel["hh_elec"])
+            / weighted_sum(puma_fuel["hh_total"])
+        }
+    )
+    stats["frac_elec_htg_sq"] = stats["frac_elec_htg"] ** 2
+    stats["log_hdd"] = np.log(weighted_sum(puma_data["hdd65_normals"]))
+    stats["natgas_price"] = weighted_sum(puma_data["ng_price"])
+    stats["hp_penetration"] = puma_data.groupby("metro_id")["hp_penetration"].first()
+    stats.index.name = None
     return stats
 
 
@@ -270,29 +261,36 @@ def estimate_puma_hp_penetration(hp_fit_df, hp_fit_df_low_elec, puma_data_metro)
             "state": puma_fuel["state"],
             "frac_elec_htg": puma_fuel["hh_elec"] / puma_fuel["hh_total"],
             "log_hdd": np.log(puma_data["hdd65_normals"]),
-            "natgas_price": puma_fuel.apply(
-                lambda x: natgas_price.loc[x.loc["state"], "$/kWh"], axis=1
-            ),
+            "natgas_price": puma_fuel["state"].map(natgas_price["$/kWh"]),
             "hh_total": puma_fuel["hh_total"],
         },
         index=puma_data.index,
     )
-    puma_hp_df["frac_hp_fitted"] = puma_hp_df.apply(
-        lambda x: (
-            x["frac_elec_htg"] * hp_fit_df["s_frac_elec_htg"]
-            + x["log_hdd"] * hp_fit_df["s_log_hdd"]
-            + x["natgas_price"] * hp_fit_df["s_natgas_price"]
-            + hp_fit_df["const"]
+
+    # predict penetration of all pumas with both models, the simpler one being used
+    # below 0.27, an empirical threshold
+    frac_elec_htg = puma_hp_df["frac_elec_htg"].to_numpy()
+    fitted = (
+        sm.add_constant(
+            puma_hp_df[["frac_elec_htg", "log_hdd", "natgas_price"]].to_numpy(),
+            has_constant="add",
         )
-        if x["frac_elec_htg"] > 0.27
-        else (
-            x["frac_elec_htg"] * hp_fit_df_low_elec["s_frac_elec_htg"]
-            + x["frac_elec_htg"] ** 2 * hp_fit_df_low_elec["s_frac_elec_htg_sq"]
-            + hp_fit_df_low_elec["const"]
-        ),
-        axis=1,
-    )  # 0.27 is an empirical threshold
-    puma_hp_df["frac_hp_fitted"].clip(lower=0, inplace=True)
+        @ hp_fit_df[
+            ["const", "s_frac_elec_htg", "s_log_hdd", "s_natgas_price"]
+        ].to_numpy()
+    )
+    fitted_low_elec = (
+        sm.add_constant(
+            np.column_stack([frac_elec_htg, frac_elec_htg**2]), has_constant="add"
+        )
+        @ hp_fit_df_low_elec[
+            ["const", "s_frac_elec_htg", "s_frac_elec_htg_sq"]
+        ].to_numpy()
+    )
+    puma_hp_df["frac_hp_fitted"] = np.where(
+        frac_elec_htg > 0.27, fitted, fitted_low_elec
+    )
+    puma_hp_df["frac_hp_fitted"] = puma_hp_df["frac_hp_fitted"].clip(lower=0)
     puma_hp_df["hh_hp"] = puma_hp_df["frac_hp_fitted"] * puma_hp_df["hh_total"]
 
     # scale hp penetration to align with AHS metropolitan area data
@@ -315,9 +313,9 @@ def estimate_puma_hp_penetration(hp_fit_df, hp_fit_df_low_elec, puma_data_metro)
     puma_data_metro = puma_data_metro[~puma_data_metro.index.duplicated(keep="first")]
     puma_data_metro = puma_data_metro.sort_index()
 
-    puma_data_metro["frac_hp_scaled"] = puma_data_metro.apply(
-        lambda x: x.loc["frac_hp_fitted"] * scaler[x.loc["metro_id"]], axis=1
-    )
+    puma_data_metro["frac_hp_scaled"] = puma_data_metro[
+        "frac_hp_fitted"
+    ] * puma_data_metro["metro_id"].map(scaler)
     puma_hp_df.loc[
         puma_hp_df.index.isin(puma_data_metro.index), "frac_hp_fitted"
     ] = puma_data_metro["frac_hp_scaled"]
@@ -332,23 +330,20 @@ def estimate_puma_hp_penetration(hp_fit_df, hp_fit_df_low_elec, puma_data_metro)
             index_col=0,
         )
 
-        puma_hp_df[f"census_region_{clas}"] = puma_hp_df.apply(
-            lambda x: [
-                i
-                for i in const.recs_cbecs_census_region[clas]
-                if x["state"] in const.recs_cbecs_census_region[clas][i]
-            ][0],
-            axis=1,
-        )
+        state_region = {}
+        for region, states in const.recs_cbecs_census_region[clas].items():
+            for state in states:
+                state_region.setdefault(state, region)
+        puma_hp_df[f"census_region_{clas}"] = puma_hp_df["state"].map(state_region)
 
         census_df = puma_hp_df.groupby(f"census_region_{clas}")[
             ["hh_hp", "hh_total"]
         ].sum()
         census_df["hh_hp_target"] = hp_target["hp_target"] * census_df["hh_total"]
         scaler = census_df["hh_hp_target"] / census_df["hh_hp"]
-        puma_hp_df[f"frac_hp_{clas}"] = puma_hp_df.apply(
-            lambda x: (x["frac_hp_fitted"] * scaler[x[f"census_region_{clas}"]]), axis=1
-        )
+        puma_hp_df[f"frac_hp_{clas}"] = puma_hp_df["frac_hp_fitted"] * puma_hp_df[
+            f"census_region_{clas}"
+        ].map(scaler)
         puma_hp_df[f"hh_hp_{clas}"] = (
             puma_hp_df[f"frac_hp_{clas}"] * puma_hp_df["hh_total"]
         )
@@ -0,0 +1,47 @@
+import os
+import subprocess
+import sys
+
+import pandas as pd
+import pytest
+
+from prereise.gather.demanddata.bldg_electrification import const
+
+
+def test_get_table():
+    puma_data = pd.read_csv(
+        os.path.join(const.dir_path, "data", "puma_data.csv"), index_col="puma"
+    )
+    pd.testing.assert_frame_equal(const.get_table("puma_data"), puma_data)
+    assert const.puma_data is const.get_table("puma_data")
+    with pytest.raises(ValueError):
+        const.get_table("foo")
+    with pytest.raises(AttributeError):
+        const.foo
+
+
+def test_table_cache(tmp_path):
+    expected = {name: const.get_table(name) for name in const.tables}
+    try:
+        const.set_table_cache(str(tmp_path))
+        for name in const.tables:
+            pd.testing.assert_frame_equal(const.get_table(name), expected[name])
+            assert os.path.isfile(tmp_path / f"{name}.parquet")
+        assert sorted(os.listdir(tmp_path)) == sorted(
+            f"{n}.parquet" for n in const.tables
+        )
+        const.get_table.cache_clear()
+        pd.testing.assert_frame_equal(const.puma_fuel, expected["puma_fuel"])
+    finally:
+        const.set_table_cache(None)
+
+
+def test_import_does_not_read_tables():
+    code = (
+        "import pandas as pd\n"
+        "def read_csv(*args, **kwargs):\n"
+        "    raise AssertionError('table read at import')\n"
+        "pd.read_csv = read_csv\n"
+        "from prereise.gather.demanddata.bldg_electrification import const\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
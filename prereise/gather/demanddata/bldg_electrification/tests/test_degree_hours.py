@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+
+from prereise.gather.demanddata.bldg_electrification import degree_hours
+from prereise.gather.demanddata.bldg_electrification.degree_hours import (
+    cooling_degree_hours,
+    heating_degree_hours,
+    read_puma_temps,
+    state_weighted_sums,
+)
+
+
+def get_test_temps(seed=0):
+    rng = np.random.default_rng(seed)
+    pumas = [f"puma_{i}" for i in range(7)]
+    temps = pd.DataFrame(rng.normal(15, 10, (len(pumas), 48)), index=pumas)
+    puma_state = pd.Series(["CA", "AZ", "CA", "NV", "AZ", "CA", "NV"], index=pumas)
+    return temps, puma_state
+
+
+def test_degree_hours():
+    temps, _ = get_test_temps()
+    temps.iloc[0, 0] = np.nan
+    hdh = heating_degree_hours(temps, 18.3)
+    cdh = cooling_degree_hours(temps, 16.7)
+    pd.testing.assert_frame_equal(
+        pd.DataFrame(hdh, index=temps.index),
+        temps.applymap(lambda x: max(18.3 - x, 0)),
+    )
+    pd.testing.assert_frame_equal(
+        pd.DataFrame(cdh, index=temps.index),
+        temps.applymap(lambda x: max(x - 16.7, 0)),
+    )
+
+
+def test_state_weighted_sums():
+    temps, puma_state = get_test_temps()
+    weights = pd.Series(np.arange(1.0, 7.0), index=temps.index[1:])
+    hdh = heating_degree_hours(temps, 18.3)
+    sums = state_weighted_sums(hdh, puma_state, weights)
+    for state in ["AZ", "CA", "NV"]:
+        temps_it = temps.loc[puma_state == state]
+        expected = (
+            temps_it.applymap(lambda x: max(18.3 - x, 0))
+            .mul(weights, axis=0)
+            .sum(axis=0)
+        )
+        np.testing.assert_allclose(sums.loc[state], expected)
+    np.testing.assert_allclose(
+        state_weighted_sums(hdh, puma_state).to_numpy(),
+        pd.DataFrame(hdh, index=temps.index).groupby(puma_state).sum(),
+    )
+
+
+def test_read_puma_temps(monkeypatch):
+    temps, puma_state = get_test_temps()
+
+    def read(variable, state, year):
+        return temps.loc[puma_state == state].T
+
+    monkeypatch.setattr(degree_hours, "read_puma_weather", read)
+    stacked, stacked_state = read_puma_temps(["NV", "CA"], 2019)
+    assert list(stacked_state) == ["NV", "NV", "CA", "CA", "CA"]
+    pd.testing.assert_frame_equal(stacked, temps.loc[stacked_state.index])
@@ -0,0 +1,49 @@
+import numpy as np
+from scipy.optimize import least_squares
+
+from prereise.gather.demanddata.bldg_electrification import const
+from prereise.gather.demanddata.bldg_electrification.ff_model import (
+    _fit_monthly_fuel_use,
+    _fit_state_slopes_res,
+)
+
+hours_in_month = np.array([744, 672, 744, 720, 744, 720, 744, 744, 720, 744, 720, 744])
+
+
+def test_fit_monthly_fuel_use():
+    rng = np.random.default_rng(0)
+    design = np.column_stack(
+        [rng.uniform(0, 10, 12), np.ones(12), rng.uniform(0, 5, 12)]
+    )
+    ff = design @ [2, 5, 0.5] + rng.normal(0, 0.1, 12)
+    bounds = ([0, 0, 0], [np.inf, 4, np.inf])
+    par, residuals = _fit_monthly_fuel_use(design, ff, hours_in_month, bounds)
+
+    expected = least_squares(
+        lambda p: np.sqrt(hours_in_month) * (ff - design @ p), bounds[0], bounds=bounds
+    )
+    np.testing.assert_allclose(par, expected.x, rtol=1e-6)
+    np.testing.assert_allclose(residuals, ff - design @ par)
+    assert 0 <= par[1] <= 4
+
+
+def test_fit_state_slopes_res():
+    rng = np.random.default_rng(1)
+    hd_sh = rng.uniform(0, 1e7, 12)
+    hd_dhw = rng.uniform(-1e5, 1e5, 12)
+    sum_areas = {"dhw": 1e6, "cook": 0, "other": 5e5}
+    par = [2e-7, 1.2e-5, 5e-6]
+    ff = (
+        par[0] * hd_sh
+        + par[1] * (sum_areas["dhw"] + const.dhw_lin_scalar * hd_dhw)
+        + par[2] * sum_areas["other"]
+    )
+    row, residuals = _fit_state_slopes_res(
+        "XX", hd_sh, hd_dhw, ff, hours_in_month, sum_areas
+    )
+    assert row[0] == "XX"
+    assert row[1] > 0.999
+    np.testing.assert_allclose(
+        row[2:], [*par[:2], par[1] * const.dhw_lin_scalar, par[2]], rtol=1e-4
+    )
+    assert np.abs(residuals).max() < 1e-4 * ff.mean()
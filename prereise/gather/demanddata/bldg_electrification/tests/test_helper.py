@@ -0,0 +1,87 @@
+import os
+
+import geopandas as gpd
+import pandas as pd
+import pytest
+from shapely.geometry import box
+
+from prereise.gather.demanddata.bldg_electrification.helper import (
+    run_batch,
+    zone_shp_overlay,
+    zones_shp_overlay,
+)
+
+
+def get_test_shapes():
+    pumas_shp = gpd.GeoDataFrame(
+        {
+            "GEOID10": ["0100100", "0100200", "0100301"],
+            "geometry": [
+                box(-90, 30, -89, 31),
+                box(-89, 30, -88, 31),
+                box(-90, 31, -88, 32),
+            ],
+        },
+        crs="EPSG:4269",
+    )
+    pumas_shp["puma"] = "puma_" + pumas_shp["GEOID10"]
+    zone_shp = gpd.GeoDataFrame(
+        {
+            "BA": ["A", "B", "C"],
+            "geometry": [
+                box(-90, 30, -88.5, 32),
+                box(-88.5, 30, -88, 32),
+                box(0, 0, 1, 1),
+            ],
+        },
+        crs="EPSG:4269",
+    )
+    return pumas_shp, zone_shp
+
+
+def test_zones_shp_overlay():
+    pumas_shp, zone_shp = get_test_shapes()
+    puma_data_zones = zones_shp_overlay(["A", "B", "C"], zone_shp, pumas_shp)
+    assert puma_data_zones["C"].empty
+    assert set(puma_data_zones["A"].index) == set(pumas_shp["puma"])
+    assert set(puma_data_zones["B"].index) == {"puma_0100200", "puma_0100301"}
+    frac = puma_data_zones["A"]["frac_in_zone"] + puma_data_zones["B"][
+        "frac_in_zone"
+    ].reindex(puma_data_zones["A"].index, fill_value=0)
+    assert frac.to_numpy() == pytest.approx(1)
+    assert puma_data_zones["A"].loc["puma_0100100", "frac_in_zone"] == pytest.approx(1)
+    assert puma_data_zones["B"].loc["puma_0100200", "frac_in_zone"] == pytest.approx(
+        0.5, abs=1e-3
+    )
+    assert "state" in puma_data_zones["A"].columns
+    pd.testing.assert_frame_equal(
+        zone_shp_overlay("B", zone_shp, pumas_shp), puma_data_zones["B"]
+    )
+
+
+def write_task(path, value):
+    if value < 0:
+        raise ValueError("negative value")
+    pd.Series([value]).to_csv(path)
+    return [path]
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_run_batch(tmp_path, max_workers):
+    tasks = {
+        f"task_{i}": {"path": os.path.join(tmp_path, f"{i}.csv"), "value": i}
+        for i in [2, -1, 3]
+    }
+    manifest = run_batch(write_task, tasks, tmp_path, max_workers=max_workers)
+    assert list(manifest.index) == ["task_2", "task_-1", "task_3"]
+    assert list(manifest["status"]) == ["ok", "failed", "ok"]
+    assert "negative value" in manifest.loc["task_-1", "error"]
+    assert manifest.loc["task_3", "files"] == tasks["task_3"]["path"]
+    assert os.path.isfile(os.path.join(tmp_path, "3.csv"))
+    pd.testing.assert_frame_equal(
+        pd.read_csv(os.path.join(tmp_path, "manifest.csv"), index_col="task").fillna(
+            ""
+        ),
+        manifest,
+        check_dtype=False,
+    )
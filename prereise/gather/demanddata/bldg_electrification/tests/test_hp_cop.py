@@ -0,0 +1,53 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from prereise.gather.demanddata.bldg_electrification import hp_cop
+from prereise.gather.demanddata.bldg_electrification.hp_cop import (
+    dhw_cop,
+    get_cop_table,
+    htg_to_cop,
+)
+
+
+@pytest.mark.parametrize("model", ["midperfhp", "advperfhp"])
+def test_htg_to_cop_matches_cop_table_file(model):
+    cop_table = pd.read_csv(
+        os.path.join(
+            os.path.dirname(hp_cop.__file__), "data", f"cop_temp_htg_{model}.csv"
+        )
+    )
+    temps = np.minimum(cop_table["temp"].to_numpy(), 25)
+    np.testing.assert_allclose(htg_to_cop(temps, model), cop_table["cop"], atol=1e-7)
+
+    table = get_cop_table(model, max_temp=25)
+    np.testing.assert_allclose(
+        table.lookup(cop_table["temp"].to_numpy()), cop_table["cop"], atol=1e-7
+    )
+
+
+def test_htg_to_cop():
+    temps = np.array([[-40, -20, np.nan], [-8.4, 0, 30]])
+    cop = htg_to_cop(temps, "futurehp")
+    assert cop.shape == temps.shape
+    assert cop[0, 2] == 1
+    assert (cop >= htg_to_cop(temps, "advperfhp")).all()
+    assert (np.diff(cop[1]) > 0).all()
+
+
+def test_dhw_cop():
+    np.testing.assert_allclose(
+        dhw_cop(np.array([-30, -15, 20, 43]), "midperfhp"), [0.93, 1.65, 3.6, 3]
+    )
+
+
+def test_cop_table_lookup():
+    table = get_cop_table("advperfhp", "dhw", -50.0, 50.0, 0.1)
+    assert get_cop_table("advperfhp", "dhw", -50.0, 50.0, 0.1) is table
+    temps = np.array([-70, -12.34, 0.07, 21.26, 70])
+    np.testing.assert_allclose(
+        table.lookup(temps), dhw_cop(np.array([-50, -12.3, 0.1, 21.3, 50]), "advperfhp")
+    )
+    assert np.isnan(table.lookup(np.array([np.nan]))).all()
@@ -0,0 +1,212 @@
+import os
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from prereise.gather.demanddata.bldg_electrification import load_projection
+from prereise.gather.demanddata.bldg_electrification.load_projection import (
+    calculate_energy,
+    scale_energy,
+    temp_to_energy,
+)
+from prereise.gather.demanddata.bldg_electrification.tests.test_zone_profile_generator import (
+    get_test_inputs,
+)
+from prereise.gather.demanddata.bldg_electrification.weather_data import (
+    set_weather_data,
+)
+
+
+def _read_cop(model):
+    return pd.read_csv(
+        os.path.join(
+            os.path.dirname(load_projection.__file__),
+            "data",
+            f"cop_temp_htg_{model}.csv",
+        ),
+        index_col="temp",
+    )
+
+
+def _get_test_scenarios(hp_growth, same_hp_type):
+    base_scen = SimpleNamespace(
+        hp_type_heat="midperfhp", resist_heat_area_m2=2e6, hp_heat_frac=0.2
+    )
+    new_scen = SimpleNamespace(
+        hp_type_heat="midperfhp" if same_hp_type else "advperfhp",
+        hp_heat_area_m2=5e6,
+        floor_area_growth=lambda other: 1.1,
+        frac_cooling_eff_change=lambda other: 0.9,
+        frac_cool_growth=lambda other: 1.2,
+        frac_resist_growth=lambda other: 0.5,
+        frac_hp_growth=lambda other: hp_growth,
+        compare_hp_heat_type=lambda other: same_hp_type,
+    )
+    return base_scen, new_scen
+
+
+def test_calculate_energy():
+    temp_df, hourly_fits_df, db_wb_fit = get_test_inputs()
+    base_scen = SimpleNamespace(hp_heat_frac=0.2, resist_heat_frac=0.3)
+    hp_heat_cop = _read_cop("midperfhp")
+    expected = np.array(
+        [
+            temp_to_energy(
+                temp_df.loc[i], hourly_fits_df, db_wb_fit, base_scen, hp_heat_cop
+            )
+            for i in temp_df.index
+        ]
+    )
+    energy = calculate_energy(
+        temp_df, hourly_fits_df, db_wb_fit, base_scen, hp_heat_cop
+    )
+    assert energy.shape == (len(temp_df), 4)
+    np.testing.assert_allclose(energy, expected, rtol=1e-10, atol=1e-8)
+
+
+@pytest.mark.benchmark
+def test_calculate_energy_benchmark():
+    temp_df, hourly_fits_df, db_wb_fit = get_test_inputs(n_hours=8760)
+    base_scen = SimpleNamespace(hp_heat_frac=0.2, resist_heat_frac=0.3)
+    hp_heat_cop = _read_cop("midperfhp")
+
+    start = time.perf_counter()
+    expected = np.array(
+        [
+            temp_to_energy(
+                temp_df.loc[i], hourly_fits_df, db_wb_fit, base_scen, hp_heat_cop
+            )
+            for i in temp_df.index
+        ]
+    )
+    scalar_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    energy = calculate_energy(
+        temp_df, hourly_fits_df, db_wb_fit, base_scen, hp_heat_cop
+    )
+    batched_time = time.perf_counter() - start
+
+    print(f"scalar: {scalar_time:.3f} s, batched: {batched_time:.3f} s")
+    np.testing.assert_allclose(energy, expected, rtol=1e-10, atol=1e-8)
+    assert batched_time * 10 < scalar_time
+
+
+def test_scale_energy():
+    temp_df, _, _ = get_test_inputs()
+    temp_df.index = pd.date_range("2019-06-24", periods=len(temp_df), freq="H")
+    rng = np.random.default_rng(1)
+    base_energy = pd.DataFrame(
+        rng.uniform(0, 100, (len(temp_df), 4)),
+        index=temp_df.index,
+        columns=[
+            "base_load_mw",
+            "heat_hp_load_mw",
+            "heat_resist_load_mw",
+            "cool_load_mw",
+        ],
+    )
+    midperfhp_cop, advperfhp_cop = _read_cop("midperfhp"), _read_cop("advperfhp")
+    temp = temp_df["temp_c"].round(1)
+    cop_ratio = (
+        midperfhp_cop.loc[temp, "cop"].to_numpy()
+        / advperfhp_cop.loc[temp, "cop"].to_numpy()
+    )
+
+    base_scen, new_scen = _get_test_scenarios(2.0, same_hp_type=False)
+    load = scale_energy(
+        base_energy, temp_df, base_scen, new_scen, midperfhp_cop, advperfhp_cop, "elec"
+    )
+    np.testing.assert_allclose(
+        load["heat_hp_load_mw"], base_energy["heat_hp_load_mw"] * cop_ratio * 2.0
+    )
+    np.testing.assert_allclose(load["base_load_mw"], base_energy["base_load_mw"] * 1.1)
+    np.testing.assert_allclose(
+        load["heat_resist_load_mw"], base_energy["heat_resist_load_mw"] * 0.5
+    )
+    np.testing.assert_allclose(
+        load["cool_load_mw"], base_energy["cool_load_mw"] * 0.9 * 1.2
+    )
+
+    base_scen, new_scen = _get_test_scenarios(2.0, same_hp_type=True)
+    load = scale_energy(
+        base_energy, temp_df, base_scen, new_scen, midperfhp_cop, advperfhp_cop, "elec"
+    )
+    np.testing.assert_allclose(
+        load["heat_hp_load_mw"], base_energy["heat_hp_load_mw"] * 2.0
+    )
+
+    base_scen, new_scen = _get_test_scenarios(np.inf, same_hp_type=True)
+    load = scale_energy(
+        base_energy, temp_df, base_scen, new_scen, midperfhp_cop, advperfhp_cop, "elec"
+    )
+    np.testing.assert_allclose(
+        load["heat_hp_load_mw"],
+        base_energy["heat_resist_load_mw"]
+        * 2.5
+        / midperfhp_cop.loc[temp, "cop"].to_numpy(),
+    )
+
+
+def test_zone_ff2hp_profiles(monkeypatch, tmp_path):
+    pumas = {"CA": ["puma_0", "puma_1"], "NV": ["puma_2"]}
+    calls = []
+
+    def calculate(year, state, clas, hp_model):
+        calls.append((year, state))
+        rng = np.random.default_rng(year + len(state) + len(pumas[state]))
+        return pd.DataFrame(
+            rng.uniform(0, 10, (24, len(pumas[state]))), columns=pumas[state]
+        )
+
+    monkeypatch.setattr(load_projection, "calculate_htg_profiles", calculate)
+    load_projection.get_ff2hp_state_profiles.cache_clear()
+    puma_data = pd.DataFrame(
+        {"state": ["CA", "NV"], "frac_in_zone": [0.5, 0.25]},
+        index=["puma_1", "puma_2"],
+    )
+
+    expected = np.concatenate(
+        [
+            calculate(year, "CA", "res", "midperfhp")["puma_1"] * 0.5
+            + calculate(year, "NV", "res", "midperfhp")["puma_2"] * 0.25
+            for year in [2018, 2019]
+        ]
+    )
+    calls.clear()
+    for _ in range(2):
+        profile = load_projection.zone_ff2hp_profiles(
+            "htg", "res", puma_data, [2018, 2019], "midperfhp", tmp_path
+        )
+        np.testing.assert_allclose(profile, expected, rtol=1e-6)
+    assert sorted(calls) == [(2018, "CA"), (2018, "NV"), (2019, "CA"), (2019, "NV")]
+
+    written = pd.read_csv(tmp_path / "elec_htg_ff2hp_res_CA_2019_midperfhp_mw.csv")
+    assert list(written.columns) == pumas["CA"]
+    np.testing.assert_allclose(
+        written, calculate(2019, "CA", "res", "midperfhp"), rtol=1e-6
+    )
+    load_projection.get_ff2hp_state_profiles.cache_clear()
+
+
+def test_ff2hp_state_profiles_cleared_with_weather_data(monkeypatch):
+    calls = []
+
+    def calculate(year, state, clas, hp_model):
+        calls.append((year, state))
+        return pd.DataFrame(np.ones((24, 1)), columns=["puma_0"])
+
+    monkeypatch.setattr(load_projection, "calculate_dhw_profiles", calculate)
+    load_projection.get_ff2hp_state_profiles.cache_clear()
+    try:
+        for _ in range(2):
+            load_projection.get_ff2hp_state_profiles("dhw", "res", "CO", 2019, "hp")
+        assert len(calls) == 1
+        set_weather_data(False)
+        load_projection.get_ff2hp_state_profiles("dhw", "res", "CO", 2019, "hp")
+        assert len(calls) == 2
+    finally:
+        load_projection.get_ff2hp_state_profiles.cache_clear()
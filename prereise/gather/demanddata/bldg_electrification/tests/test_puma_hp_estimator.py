@@ -0,0 +1,155 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from prereise.gather.demanddata.bldg_electrification import const
+from prereise.gather.demanddata.bldg_electrification.puma_hp_estimator import (
+    estimate_puma_hp_penetration,
+    metro_data,
+)
+
+
+def get_test_puma_data_metro(seed=0):
+    rng = np.random.default_rng(seed)
+    pumas = rng.choice(const.puma_data.index, 200, replace=False)
+    puma_data_metro = pd.DataFrame(
+        {
+            "frac_in_zone": rng.uniform(0.02, 1, len(pumas)),
+            "metro_id": rng.integers(0, 10, len(pumas)),
+            "ng_price": rng.uniform(0.02, 0.05, len(pumas)),
+        },
+        index=pd.Index(pumas, name="puma"),
+    )
+    puma_data_metro["hp_penetration"] = puma_data_metro["metro_id"] / 40
+    return puma_data_metro.join(const.puma_data)
+
+
+def test_metro_data():
+    puma_data_metro = get_test_puma_data_metro()
+    stats = metro_data(puma_data_metro)
+    assert list(stats.index) == list(range(10))
+
+    puma_df = puma_data_metro.query("metro_id == 3")
+    weights = puma_df["pop"] * puma_df["frac_in_zone"]
+    weights /= weights.sum()
+    puma_fuel = const.puma_fuel.loc[puma_df.index]
+    frac_elec_htg = (puma_fuel["hh_elec"] * weights).sum() / (
+        puma_fuel["hh_total"] * weights
+    ).sum()
+    np.testing.assert_allclose(
+        stats.loc[3],
+        [
+            frac_elec_htg,
+            frac_elec_htg**2,
+            np.log((puma_df["hdd65_normals"] * weights).sum()),
+            (puma_df["ng_price"] * weights).sum(),
+            3 / 40,
+        ],
+    )
+
+
+def _estimate_puma_hp_penetration_scalar(
+    hp_fit_df, hp_fit_df_low_elec, puma_data_metro, pumas
+):
+    """Reference implementation evaluating the fits puma by puma."""
+    data_dir = os.path.join(os.path.dirname(const.__file__), "data")
+    natgas_price = pd.read_csv(
+        os.path.join(data_dir, "state_ng_residential_price_2019.csv"), index_col=0
+    )["$/kWh"]
+    puma_fuel = const.puma_fuel
+    hdd = const.puma_data["hdd65_normals"]
+
+    fitted, hh_total, state = {}, {}, {}
+    for puma in const.puma_data.index:
+        state[puma] = puma_fuel.loc[puma, "state"]
+        hh_total[puma] = puma_fuel.loc[puma, "hh_total"]
+        frac_elec_htg = puma_fuel.loc[puma, "hh_elec"] / hh_total[puma]
+        if frac_elec_htg > 0.27:
+            value = (
+                frac_elec_htg * hp_fit_df["s_frac_elec_htg"]
+                + np.log(hdd[puma]) * hp_fit_df["s_log_hdd"]
+                + natgas_price[state[puma]] * hp_fit_df["s_natgas_price"]
+                + hp_fit_df["const"]
+            )
+        else:
+            value = (
+                frac_elec_htg * hp_fit_df_low_elec["s_frac_elec_htg"]
+                + frac_elec_htg**2 * hp_fit_df_low_elec["s_frac_elec_htg_sq"]
+                + hp_fit_df_low_elec["const"]
+            )
+        fitted[puma] = max(value, 0) if not np.isnan(value) else value
+
+    metro_scaler = {}
+    for metro_id, puma_df in puma_data_metro.groupby("metro_id"):
+        hh_hp_fitted = np.nansum([fitted[p] * hh_total[p] for p in puma_df.index])
+        hh_hp_target = np.nansum(
+            [puma_df.loc[p, "hp_penetration"] * hh_total[p] for p in puma_df.index]
+        )
+        metro_scaler[metro_id] = hh_hp_target / hh_hp_fitted
+    for puma, metro_id in puma_data_metro["metro_id"].items():
+        fitted[puma] *= metro_scaler[metro_id]
+
+    expected = {}
+    for clas in const.classes:
+        hp_target = pd.read_csv(
+            os.path.join(data_dir, f"frac_target_hp_{clas}.csv"), index_col=0
+        )["hp_target"]
+        regions = const.recs_cbecs_census_region[clas]
+        region = {p: [r for r in regions if state[p] in regions[r]][0] for p in fitted}
+        census_scaler = {}
+        for r in set(region.values()):
+            region_pumas = [p for p in fitted if region[p] == r]
+            total = np.nansum([hh_total[p] for p in region_pumas])
+            census_scaler[r] = (
+                hp_target[r]
+                * total
+                / np.nansum([fitted[p] * hh_total[p] for p in region_pumas])
+            )
+        expected[clas] = [
+            min(
+                fitted[p] * census_scaler[region[p]],
+                puma_fuel.loc[p, "hh_elec"] / hh_total[p],
+            )
+            for p in pumas
+        ]
+    return expected
+
+
+def test_estimate_puma_hp_penetration():
+    puma_data_metro = get_test_puma_data_metro()
+    hp_fit_df = pd.Series(
+        [0.1, 0.3, -0.01, -1.0],
+        index=["const", "s_frac_elec_htg", "s_log_hdd", "s_natgas_price"],
+    )
+    hp_fit_df_low_elec = pd.Series(
+        [0.0, 0.1, 0.2], index=["const", "s_frac_elec_htg", "s_frac_elec_htg_sq"]
+    )
+    hp_puma_df = estimate_puma_hp_penetration(
+        hp_fit_df, hp_fit_df_low_elec, puma_data_metro.copy()
+    )
+    assert hp_puma_df.index.equals(const.puma_data.index)
+    assert list(hp_puma_df.columns) == ["state", "frac_hp_res", "frac_hp_com"]
+    frac_elec_htg = const.puma_fuel["hh_elec"] / const.puma_fuel["hh_total"]
+    for clas in const.classes:
+        frac_hp = hp_puma_df[f"frac_hp_{clas}"].dropna()
+        assert (frac_hp >= 0).all()
+        assert (frac_hp <= frac_elec_htg[frac_hp.index] + 1e-12).all()
+
+    # pumas within and outside metropolitan areas, on both sides of the threshold
+    frac_elec_htg = frac_elec_htg.dropna()
+    in_metro = frac_elec_htg.index.isin(puma_data_metro.index)
+    pumas = [
+        p
+        for mask in [in_metro, ~in_metro]
+        for high in [True, False]
+        for p in frac_elec_htg[mask & ((frac_elec_htg > 0.27) == high)].index[:3]
+    ]
+    assert len(pumas) == 12
+    expected = _estimate_puma_hp_penetration_scalar(
+        hp_fit_df, hp_fit_df_low_elec, puma_data_metro, pumas
+    )
+    for clas in const.classes:
+        np.testing.assert_allclose(
+            hp_puma_df.loc[pumas, f"frac_hp_{clas}"], expected[clas], rtol=1e-10
+        )
@@ -0,0 +1,88 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from prereise.gather.demanddata.bldg_electrification.weather_data import (
+    CSVSource,
+    WeatherData,
+    get_weather_data,
+    weather_paths,
+)
+
+pytest.importorskip("pyarrow")
+
+
+class CountingSource(CSVSource):
+    def __init__(self, root):
+        super().__init__(root)
+        self.calls = []
+
+    def read(self, variable, state, year):
+        self.calls.append((variable, state, year))
+        return super().read(variable, state, year)
+
+
+def make_mirror(root, states, year):
+    rng = np.random.default_rng(0)
+    data = {}
+    for state in states:
+        path = os.path.join(
+            root, *weather_paths["temps"].format(state=state, year=year).split("/")
+        )
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data[state] = pd.DataFrame(
+            rng.uniform(-20, 40, (24, 3)).round(2),
+            columns=[f"puma_{state}{i}" for i in range(3)],
+        )
+        data[state].to_csv(path, index=False)
+    return data
+
+
+def test_get_uses_cache(tmp_path):
+    expected = make_mirror(tmp_path / "mirror", ["CO", "WY"], 2019)
+    source = CountingSource(str(tmp_path / "mirror"))
+    weather_data = WeatherData(str(tmp_path / "cache"), source)
+
+    for _ in range(2):
+        temps = weather_data.get("temps", "CO", 2019)
+        assert (temps.dtypes == "float32").all()
+        pd.testing.assert_index_equal(temps.columns, expected["CO"].columns)
+        np.testing.assert_allclose(temps.values, expected["CO"].values, rtol=1e-6)
+    assert source.calls == [("temps", "CO", 2019)]
+    assert (
+        pd.read_parquet(weather_data.get_cache_path("temps", "CO", 2019)).dtypes
+        == "float32"
+    ).all()
+    cache_dir = os.path.dirname(weather_data.get_cache_path("temps", "CO", 2019))
+    assert os.listdir(cache_dir) == ["temps_pumas_CO.parquet"]
+
+    temps = weather_data.get_states("temps", ["CO", "WY"], 2019)
+    assert temps.shape == (24, 6)
+
+
+def test_prefetch(tmp_path):
+    make_mirror(tmp_path / "mirror", ["CO", "WY", "UT"], 2019)
+    source = CountingSource(str(tmp_path / "mirror"))
+    weather_data = WeatherData(str(tmp_path / "cache"), source)
+
+    weather_data.prefetch(["CO", "WY", "UT"], [2019], max_workers=3)
+    assert sorted(source.calls) == [("temps", s, 2019) for s in ["CO", "UT", "WY"]]
+    weather_data.get_states("temps", ["CO", "WY", "UT"], 2019)
+    assert len(source.calls) == 3
+
+
+def test_get_without_cache(tmp_path):
+    make_mirror(tmp_path / "mirror", ["CO"], 2019)
+    source = CountingSource(str(tmp_path / "mirror"))
+    weather_data = WeatherData(False, source)
+    weather_data.get("temps", "CO", 2019)
+    weather_data.get("temps", "CO", 2019)
+    assert len(source.calls) == 2
+    with pytest.raises(ValueError):
+        weather_data.get("wind", "CO", 2019)
+
+
+def test_default_weather_data_is_uncached():
+    assert get_weather_data().cache_dir is False
@@ -0,0 +1,168 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from dateutil import tz
+from scipy.spatial import cKDTree
+
+from prereise.gather.demanddata.bldg_electrification import weather_data_agg
+from prereise.gather.demanddata.bldg_electrification.weather_data import (
+    CSVSource,
+    set_weather_data,
+    weather_paths,
+)
+from prereise.gather.demanddata.bldg_electrification.weather_data_agg import (
+    calculate_dark_fractions,
+    generate_wetbulb_temps,
+    get_era5_puma_operator,
+    lon_lat_to_cartesian,
+    t_to_twb,
+)
+
+
+def test_get_era5_puma_operator():
+    rng = np.random.default_rng(0)
+    lats_era5 = np.arange(50, 24, -0.25)
+    lons_era5 = np.arange(-128, -62, 0.25)
+    n_hours = 5
+    values = rng.uniform(250, 310, (n_hours, len(lats_era5), len(lons_era5)))
+    tract_data = pd.DataFrame(
+        {
+            "lat": rng.uniform(25, 49, 40),
+            "lon": rng.uniform(-127, -63, 40),
+            "pop_2010": rng.integers(100, 10000, 40).astype(float),
+            "puma": rng.choice(["puma_b", "puma_a", "puma_c"], 40),
+        },
+        index=[f"tract_{i}" for i in range(40)],
+    )
+
+    operator, pumas = get_era5_puma_operator(tract_data, lats_era5, lons_era5)
+    assert pumas == ["puma_a", "puma_b", "puma_c"]
+    assert operator.shape == (3, values[0].size)
+    np.testing.assert_allclose(operator.sum(axis=1), 1)
+    weighted_values = operator @ values.reshape(n_hours, -1).T
+
+    # Reference: 4 nearest neighbors inverse distance-squared weighting per hour and
+    # population weighting per puma
+    lons_2d, lats_2d = np.meshgrid(lons_era5, lats_era5)
+    tree = cKDTree(
+        np.column_stack(lon_lat_to_cartesian(lons_2d.flatten(), lats_2d.flatten()))
+    )
+    d, inds = tree.query(
+        np.column_stack(lon_lat_to_cartesian(tract_data["lon"], tract_data["lat"])),
+        k=4,
+    )
+    w = 1.0 / d**2
+    vals_tracts = pd.DataFrame(
+        [
+            (w * values[h].flatten()[inds]).sum(axis=1) / w.sum(axis=1)
+            for h in range(n_hours)
+        ],
+        columns=tract_data.index,
+    )
+    expected = tract_data.groupby("puma").apply(
+        lambda x: (vals_tracts[x.index] * x["pop_2010"]).sum(axis=1)
+        / x["pop_2010"].sum()
+    )
+    np.testing.assert_allclose(weighted_values, expected.values)
+
+
+def _dark_fractions_suntime(puma, puma_data, year):
+    suntime = pytest.importorskip("suntime")
+    sun = suntime.Sun(puma_data.loc[puma, "latitude"], puma_data.loc[puma, "longitude"])
+    puma_timezone = tz.gettz(puma_data.loc[puma, "timezone"])
+    hours_local = pd.date_range(
+        start=f"{year}-01-01", end=f"{year+1}-01-01", freq="H", tz="UTC"
+    )[:-1].tz_convert(puma_data.loc[puma, "timezone"])
+
+    sun_times = {}
+    for day in np.unique(hours_local.date):
+        sunrise = sun.get_sunrise_time(day).astimezone(puma_timezone)
+        sunset = sun.get_sunset_time(day).astimezone(puma_timezone)
+        sun_times[day] = (sunrise.hour, sunset.hour, sunrise.minute, sunset.minute)
+
+    dark_frac = []
+    for h in hours_local:
+        sunrise_hour, sunset_hour, sunrise_min, sunset_min = sun_times[h.date()]
+        if h.hour == sunrise_hour:
+            dark_frac.append(sunrise_min / 60)
+        elif h.hour == sunset_hour:
+            dark_frac.append(1 - sunset_min / 60)
+        elif sunrise_hour < h.hour < sunset_hour:
+            dark_frac.append(0)
+        else:
+            dark_frac.append(1)
+    return pd.Series(dark_frac, index=hours_local)
+
+
+def test_calculate_dark_fractions():
+    puma_data = pd.DataFrame(
+        {
+            "latitude": [34.649881, 47.6, 25.8],
+            "longitude": [-87.764577, -122.3, -80.2],
+            "timezone": ["America/Chicago", "America/Los_Angeles", "America/New_York"],
+        },
+        index=["puma_a", "puma_b", "puma_c"],
+    )
+    dark_frac = calculate_dark_fractions(puma_data, 2019)
+    assert dark_frac.shape == (8760, 3)
+    assert dark_frac.columns.tolist() == puma_data.index.tolist()
+    assert ((dark_frac >= 0) & (dark_frac <= 1)).all().all()
+
+    for puma in puma_data.index:
+        expected = _dark_fractions_suntime(puma, puma_data, 2019)
+        # Sunset times past midnight UTC are assigned the previous UTC offset by
+        # suntime on daylight saving time transition days
+        offset = expected.index.map(lambda x: x.utcoffset())
+        transition = pd.Series(offset).groupby(expected.index.date).transform("nunique")
+        kept = (transition == 1).to_numpy()
+        diff = np.abs(dark_frac[puma].to_numpy() - expected.to_numpy())[kept]
+        assert diff.max() <= 3 / 60
+        assert diff.mean() < 2e-3
+
+
+def test_t_to_twb():
+    psychrolib = pytest.importorskip("psychrolib")
+    psychrolib.SetUnitSystem(psychrolib.SI)
+    rng = np.random.default_rng(0)
+    temps = rng.uniform(-30, 45, (200, 3))
+    dwpts = temps - rng.uniform(-2, 30, (200, 3))
+    press = rng.uniform(70000, 103000, (200, 3))
+
+    twb = t_to_twb(temps, dwpts, press)
+    expected = np.vectorize(
+        lambda t, d, p: psychrolib.GetTWetBulbFromTDewPoint(t, min(t, d), p)
+    )(temps, dwpts, press)
+    assert twb.shape == temps.shape
+    np.testing.assert_allclose(twb, expected, atol=1e-3)
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_generate_wetbulb_temps(monkeypatch, tmp_path, max_workers):
+    rng = np.random.default_rng(0)
+    temps = rng.uniform(-20, 40, (24, 2))
+    data = {
+        "temps": temps,
+        "dewpts": temps - rng.uniform(0, 20, (24, 2)),
+        "press": rng.uniform(80000, 103000, (24, 2)),
+    }
+    mirror = tmp_path / "mirror"
+    for variable, values in data.items():
+        path = mirror / weather_paths[variable].format(state="CO", year=2019)
+        os.makedirs(path.parent, exist_ok=True)
+        pd.DataFrame(values, columns=["puma_0", "puma_1"]).to_csv(path, index=False)
+
+    monkeypatch.setattr(weather_data_agg.const, "state_list", ["CO"])
+    try:
+        set_weather_data(False, CSVSource(str(mirror)))
+        generate_wetbulb_temps(2019, str(tmp_path), max_workers=max_workers)
+    finally:
+        set_weather_data(False)
+
+    twb = pd.read_csv(
+        tmp_path / "pumas" / "temps_wetbulb" / "temps_wetbulb_pumas_CO_2019.csv"
+    )
+    np.testing.assert_allclose(
+        twb.to_numpy(), t_to_twb(data["temps"], data["dewpts"], data["press"])
+    )
@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+
+from prereise.gather.demanddata.bldg_electrification import const
+from prereise.gather.demanddata.bldg_electrification.zone_operator import ZoneOperator
+
+
+def get_test_zones(seed=0):
+    rng = np.random.default_rng(seed)
+    puma_data = const.puma_data[const.puma_data["state"].isin(["CA", "NV"])].copy()
+    puma_data["frac_hp_res"] = rng.uniform(0, 0.2, len(puma_data))
+    puma_data["frac_hp_com"] = rng.uniform(0, 0.2, len(puma_data))
+    puma_data["AC_penetration"] = rng.uniform(0.5, 1, len(puma_data))
+
+    zones = {}
+    for zone, n in [("A", 30), ("B", 50)]:
+        pumas = rng.choice(puma_data.index, n, replace=False)
+        zones[zone] = puma_data.loc[pumas].assign(frac_in_zone=rng.uniform(0.1, 1, n))
+    return zones
+
+
+def test_sum():
+    zones = get_test_zones()
+    operator = ZoneOperator(zones)
+    pumas = operator.pumas.append(pd.Index(["puma_other"]))
+    values = pd.DataFrame(
+        np.random.default_rng(1).normal(15, 10, (len(pumas), 24)), index=pumas
+    )
+    values.iloc[0, 0] = np.nan
+
+    sums = operator.sum(values, "pop")
+    means = operator.sum(values, "pop", normalize=True)
+    for zone, puma_data in zones.items():
+        weights = puma_data["pop"] * puma_data["frac_in_zone"]
+        expected = values.loc[puma_data.index].mul(weights, axis=0).sum()
+        np.testing.assert_allclose(sums.loc[zone], expected)
+        np.testing.assert_allclose(means.loc[zone], expected / weights.sum())
+
+    area = operator.sum(zones["A"][f"res_area_{const.base_year}_m2"])
+    assert list(area.index) == ["A", "B"]
+    np.testing.assert_allclose(
+        area["A"],
+        (
+            zones["A"][f"res_area_{const.base_year}_m2"] * zones["A"]["frac_in_zone"]
+        ).sum(),
+    )
+
+
+def test_stats():
+    zones = get_test_zones()
+    stats = ZoneOperator(zones).stats()
+    assert stats.shape == (2, 21)
+    for zone, puma_data in zones.items():
+        frac = puma_data["frac_in_zone"]
+        res_area = puma_data[f"res_area_{const.base_year}_m2"] * frac
+        com_area = puma_data[f"com_area_{const.base_year}_m2"] * frac
+        np.testing.assert_allclose(
+            stats.at[zone, "pop"], (puma_data["pop"] * frac).sum()
+        )
+        np.testing.assert_allclose(stats.at[zone, "res_area_m2"], res_area.sum())
+        np.testing.assert_allclose(
+            stats.at[zone, "frac_elec_res_hp"],
+            (res_area * puma_data["frac_hp_res"]).sum() / res_area.sum(),
+        )
+        np.testing.assert_allclose(
+            stats.at[zone, "frac_ff_cook_com"],
+            (com_area * puma_data[f"frac_ff_cook_com_{const.base_year}"]).sum()
+            / com_area.sum(),
+        )
+        np.testing.assert_allclose(
+            stats.at[zone, "hdd65"],
+            (puma_data["hdd65_normals"] * puma_data["pop"]).sum()
+            / puma_data["pop"].sum(),
+        )
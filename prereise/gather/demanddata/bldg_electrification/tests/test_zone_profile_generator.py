@@ -0,0 +1,215 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+import statsmodels.api as sm
+
+from prereise.gather.demanddata.bldg_electrification import zone_profile_generator
+from prereise.gather.demanddata.bldg_electrification.weather_data import (
+    get_weather_data,
+    set_weather_data,
+)
+from prereise.gather.demanddata.bldg_electrification.zone_profile_generator import (
+    batch_ols,
+    bkpt_scale,
+    calculate_energy,
+    hourly_load_fit,
+    temp_to_energy,
+)
+
+
+def _get_hourly_fits(rng):
+    fits = {}
+    for wk_wknd in ["wk", "wknd"]:
+        t_bpc = rng.uniform(5, 12, 24)
+        fits.update(
+            {
+                f"t.bpc.{wk_wknd}.c": t_bpc,
+                f"t.bph.{wk_wknd}.c": t_bpc + rng.uniform(3, 10, 24),
+                f"i.heat.{wk_wknd}": rng.uniform(1000, 2000, 24),
+                f"s.heat.{wk_wknd}": rng.uniform(-50, 0, 24),
+                f"s.dark.{wk_wknd}": rng.uniform(0, 100, 24),
+                f"i.cool.{wk_wknd}": rng.uniform(-1500, -500, 24),
+                f"s.cool.{wk_wknd}.db": rng.uniform(20, 80, 24),
+                f"s.cool.{wk_wknd}.wb": rng.uniform(-10, 10, 24),
+            }
+        )
+    return pd.DataFrame(fits)
+
+
+def get_test_inputs(seed=0, n_hours=24 * 21):
+    rng = np.random.default_rng(seed)
+    hours_local = pd.date_range("2019-06-24", periods=n_hours, freq="H")
+    temp_c = rng.uniform(-20, 40, n_hours).round(1)
+    temp_df = pd.DataFrame(
+        {
+            "temp_c": temp_c,
+            "temp_c_wb": temp_c - rng.uniform(0, 8, n_hours),
+            "hour_local": hours_local.hour,
+            "weekday": hours_local.weekday,
+            "holiday": pd.Series(hours_local.date).isin(
+                [pd.Timestamp("2019-07-04").date()]
+            ),
+            "hourly_dark_frac": rng.uniform(0, 1, n_hours),
+        }
+    )
+    return temp_df, _get_hourly_fits(rng), np.array([0.01, 0.5, 2.0])
+
+
+def test_calculate_energy():
+    temp_df, hourly_fits_df, db_wb_fit = get_test_inputs()
+    expected = np.array(
+        [
+            temp_to_energy(temp_df.loc[i], hourly_fits_df, db_wb_fit)
+            for i in temp_df.index
+        ]
+    )
+    energy = calculate_energy(temp_df, hourly_fits_df, db_wb_fit)
+    assert energy.shape == (len(temp_df), 3)
+    assert (energy[:, 1] != 0).any() and (energy[:, 2] != 0).any()
+    np.testing.assert_allclose(energy, expected, rtol=1e-10, atol=1e-8)
+
+
+@pytest.mark.benchmark
+def test_calculate_energy_benchmark():
+    temp_df, hourly_fits_df, db_wb_fit = get_test_inputs(n_hours=8760)
+
+    start = time.perf_counter()
+    expected = np.array(
+        [
+            temp_to_energy(temp_df.loc[i], hourly_fits_df, db_wb_fit)
+            for i in temp_df.index
+        ]
+    )
+    scalar_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    energy = calculate_energy(temp_df, hourly_fits_df, db_wb_fit)
+    batched_time = time.perf_counter() - start
+
+    print(f"scalar: {scalar_time:.3f} s, batched: {batched_time:.3f} s")
+    np.testing.assert_allclose(energy, expected, rtol=1e-10, atol=1e-8)
+    assert batched_time * 10 < scalar_time
+
+
+def test_bkpt_scale():
+    temp = np.array([5.0, 12.0, -3.0, 20.0, 8.0, 15.0])
+    index, bkpt = bkpt_scale(temp, 2, 10, "heat")
+    assert list(index) == [0, 2, 4] and bkpt == 10
+    index, bkpt = bkpt_scale(temp, 4, 10, "heat")
+    assert list(index) == [2, 0, 4, 1] and bkpt == 12
+    index, bkpt = bkpt_scale(temp, 3, 18.3, "cool")
+    assert list(index) == [1, 5, 3] and bkpt == 12
+
+
+def test_batch_ols():
+    rng = np.random.default_rng(0)
+    sizes = [30, 12, 25]
+    x = rng.normal(0, 1, (3, 30, 3))
+    x[..., 2] = 1
+    x[1, :, 1] = 0.5  # rank deficient
+    y = x @ [2, -1, 3] + rng.normal(0, 0.1, (3, 30))
+    mask = np.arange(30) < np.array(sizes)[:, None]
+    lm = batch_ols(x, np.where(mask, y, np.nan), mask)
+    for g, n in enumerate(sizes):
+        expected = sm.OLS(y[g, :n], x[g, :n]).fit()
+        np.testing.assert_allclose(lm["params"][g], expected.params, rtol=1e-8)
+        np.testing.assert_allclose(lm["bse"][g], expected.bse, rtol=1e-8)
+        np.testing.assert_allclose(lm["rsquared"][g], expected.rsquared)
+        assert lm["nobs"][g] == expected.nobs
+
+
+def test_hourly_load_fit():
+    temp_df, _, _ = get_test_inputs(n_hours=24 * 7 * 20)
+    temp_df["load_mw"] = (
+        1000
+        + 30 * np.maximum(10 - temp_df["temp_c"], 0)
+        + 100 * temp_df["hourly_dark_frac"]
+        + 50 * np.maximum(temp_df["temp_c"] - 20, 0)
+    )
+    hourly_fits_df, db_wb_fit = hourly_load_fit(temp_df, False)
+    assert hourly_fits_df.shape == (24, 38)
+    assert hourly_fits_df.columns[0] == "t.bpc.wk.c"
+    assert hourly_fits_df.columns[-1] == "r2.cool.wknd"
+    for wk_wknd in ["wk", "wknd"]:
+        assert (hourly_fits_df[f"s.heat.{wk_wknd}"] <= 0).all()
+        assert (hourly_fits_df[f"n.heat.{wk_wknd}"] >= 20).all()
+        # Heating and baseload are linear below the starting breakpoint
+        fits = hourly_fits_df[hourly_fits_df[f"t.bpc.{wk_wknd}.c"] == 10]
+        assert len(fits) > 0
+        np.testing.assert_allclose(fits[f"s.heat.{wk_wknd}"], -30)
+        np.testing.assert_allclose(fits[f"s.dark.{wk_wknd}"], 100)
+        np.testing.assert_allclose(fits[f"i.heat.{wk_wknd}"], 1300)
+    np.testing.assert_allclose(
+        db_wb_fit,
+        np.polyfit(
+            *temp_df.loc[temp_df["temp_c"] >= 10, ["temp_c", "temp_c_wb"]].T.to_numpy(),
+            2,
+        ),
+    )
+
+
+class LoggingSource:
+    """Weather data source logging each read in a file shared by all processes."""
+
+    def __init__(self, log_path):
+        self.log_path = log_path
+
+    def read(self, variable, state, year):
+        with open(self.log_path, "a") as f:
+            f.write(f"{variable},{state},{year}\n")
+        return pd.DataFrame(np.ones((24, 2)), columns=[f"{state}_0", f"{state}_1"])
+
+
+def _read_zone_weather(
+    zone_name, zone_name_shp, base_year, year, plot_boolean, puma_data_zone, output_dir
+):
+    states = sorted(set(puma_data_zone["state"]))
+    for variable in ["temps", "temps_wetbulb", "dark_frac"]:
+        for y in [base_year, year]:
+            get_weather_data().get_states(variable, states, y)
+    return []
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_run_zones_reads_weather_once(monkeypatch, tmp_path, max_workers):
+    puma_data_zones = {
+        "A": pd.DataFrame({"state": ["CO", "WY"]}, index=["p0", "p1"]),
+        "B": pd.DataFrame({"state": ["CO"]}, index=["p2"]),
+        "C": pd.DataFrame({"state": ["WY", "UT"]}, index=["p3", "p4"]),
+    }
+    monkeypatch.setattr(
+        zone_profile_generator,
+        "zones_shp_overlay",
+        lambda zone_name_shps, zone_shp, pumas_shp: puma_data_zones,
+    )
+    monkeypatch.setattr(zone_profile_generator, "main", _read_zone_weather)
+
+    log_path = tmp_path / "reads.log"
+    set_weather_data(False, LoggingSource(str(log_path)))
+    try:
+        manifest = zone_profile_generator.run_zones(
+            ["a", "b", "c"],
+            ["A", "B", "C"],
+            None,
+            None,
+            2016,
+            2019,
+            str(tmp_path / "output"),
+            max_workers=max_workers,
+        )
+        assert get_weather_data().cache_dir is False
+    finally:
+        set_weather_data(False)
+
+    assert (manifest["status"] == "ok").all()
+    reads = log_path.read_text().splitlines()
+    assert sorted(reads) == sorted(
+        f"{v},{s},{y}"
+        for v in ["temps", "temps_wetbulb", "dark_frac"]
+        for s in ["CO", "UT", "WY"]
+        for y in [2016, 2019]
+    )
+    assert os.path.isdir(tmp_path / "output" / "weather_cache")
@@ -0,0 +1,190 @@
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from itertools import product
+
+import pandas as pd
+
+blob_root = "https://besciences.blob.core.windows.net/datasets/bldg_el/pumas"
+
+weather_paths = {
+    "temps": "{year}/temps/temps_pumas_{state}_{year}.csv",
+    "temps_wetbulb": "{year}/temps_wetbulb/temps_wetbulb_pumas_{state}_{year}.csv",
+    "dark_frac": "{year}/dark_frac/dark_frac_pumas_{state}_{year}.csv",
+    "dewpts": "dewpoints/dewpts_pumas_{state}_{year}.csv",
+    "press": "press/press_pumas_{state}_{year}.csv",
+}
+
+
+class CSVSource:
+    """Read puma level hourly weather data from CSV files organized as in the blob
+    storage, i.e. one file per variable, state and year with pumas as columns.
+
+    :param str root: root of the file tree. Either an URL, the blob storage by
+        default, or the path to a local mirror.
+    """
+
+    def __init__(self, root=blob_root):
+        self.root = root
+
+    def read(self, variable, state, year):
+        """Read hourly weather data of all pumas within a state.
+
+        :param str variable: weather variable, one of the keys of ``weather_paths``.
+        :param str state: abbrev. of state.
+        :param int year: weather year.
+        :return: (*pandas.DataFrame*) -- hourly data, pumas as columns.
+        """
+        path = weather_paths[variable].format(state=state, year=year)
+        if "://" in self.root:
+            return pd.read_csv(f"{self.root.rstrip('/')}/{path}")
+        return pd.read_csv(os.path.join(self.root, *path.split("/")))
+
+
+class WeatherData:
+    """Access layer to puma level hourly weather data with a local cache. Data are
+    fetched once from the source and stored as float32 Parquet files in the cache
+    directory, one per variable, state and year.
+
+    :param str cache_dir: location of the cache. Defaults to
+        *~/ScenarioData/bldg_el/weather_cache*. Caching is disabled if False.
+    :param object source: object exposing a ``read(variable, state, year)`` method
+        returning a data frame with pumas as columns, e.g. :class:`CSVSource`. Defaults
+        to the blob storage.
+    """
+
+    def __init__(self, cache_dir=None, source=None):
+        if cache_dir is None:
+            cache_dir = os.path.join(
+                os.path.expanduser("~"), "ScenarioData", "bldg_el", "weather_cache"
+            )
+        self.cache_dir = cache_dir
+        self.source = CSVSource() if source is None else source
+
+    def get_cache_path(self, variable, state, year):
+        """Return the location of the cached data.
+
+        :param str variable: weather variable.
+        :param str state: abbrev. of state.
+        :param int year: weather year.
+        :return: (*str*) -- path to the Parquet file.
+        """
+        return os.path.join(
+            self.cache_dir, variable, str(year), f"{variable}_pumas_{state}.parquet"
+        )
+
+    def get(self, variable, state, year):
+        """Get hourly weather data of all pumas within a state.
+
+        :param str variable: weather variable, one of the keys of ``weather_paths``.
+        :param str state: abbrev. of state.
+        :param int year: weather year.
+        :return: (*pandas.DataFrame*) -- hourly data, pumas as columns. Data read from
+            the cache are float32, callers needing double precision upcast them.
+        :raises ValueError: if variable is unknown.
+        """
+        if variable not in weather_paths:
+            raise ValueError(f"variable must be one of: {', '.join(weather_paths)}")
+        if self.cache_dir is False:
+            return self.source.read(variable, state, year)
+
+        filename = self.get_cache_path(variable, state, year)
+        if not os.path.isfile(filename):
+            data = self.source.read(variable, state, year).astype("float32")
+            os.makedirs(os.path.dirname(filename), exist_ok=True)
+            # write to a file unique to this call so that concurrent processes filling
+            # the same entry do not overwrite each other's partial file
+            fd, tmp_filename = tempfile.mkstemp(
+                suffix=".tmp", dir=os.path.dirname(filename)
+            )
+            os.close(fd)
+            try:
+                data.to_parquet(tmp_filename, index=False)
+                os.replace(tmp_filename, filename)
+            finally:
+                if os.path.exists(tmp_filename):
+                    os.remove(tmp_filename)
+        return pd.read_parquet(filename, memory_map=True)
+
+    def get_states(self, variable, states, year):
+        """Get hourly weather data of all pumas within several states.
+
+        :param str variable: weather variable.
+        :param iterable states: abbrev. of states.
+        :param int year: weather year.
+        :return: (*pandas.DataFrame*) -- hourly data, pumas as columns.
+        """
+        return pd.concat([self.get(variable, s, year) for s in states], axis=1)
+
+    def prefetch(self, states, years, variables=("temps",), max_workers=8):
+        """Populate the cache concurrently.
+
+        :param iterable states: abbrev. of states.
+        :param iterable years: weather years.
+        :param iterable variables: weather variables.
+        :param int max_workers: number of concurrent downloads.
+        """
+        if self.cache_dir is False:
+            return
+
+        def fetch(key):
+            variable, state, year = key
+            if not os.path.isfile(self.get_cache_path(variable, state, year)):
+                self.get(variable, state, year)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            list(executor.map(fetch, product(variables, states, years)))
+
+
+_weather_data = WeatherData(cache_dir=False)
+_weather_caches = []
+
+
+def register_weather_cache(func):
+    """Register a cached function whose results depend on weather data. Its cache is
+    cleared whenever the access layer is configured with :func:`set_weather_data`.
+
+    :param function func: function wrapped by :func:`functools.lru_cache`.
+    :return: (*function*) -- the function, unchanged.
+    """
+    _weather_caches.append(func)
+    return func
+
+
+def get_weather_data():
+    """Return the weather data access layer used by the building electrification
+    modules. Data are read from the blob storage without caching unless configured
+    otherwise with :func:`set_weather_data`.
+
+    :return: (*WeatherData*) -- weather data access layer.
+    """
+    return _weather_data
+
+
+def set_weather_data(cache_dir=None, source=None):
+    """Configure the weather data access layer used by the building electrification
+    modules, e.g. to run offline from a local mirror of the blob storage. Results
+    computed from the previous weather data and held in memory are discarded.
+
+    :param str cache_dir: location of the cache. Defaults to
+        *~/ScenarioData/bldg_el/weather_cache*. Caching is disabled if False.
+    :param object source: source of the data. See :class:`WeatherData`.
+    :return: (*WeatherData*) -- weather data access layer.
+    """
+    global _weather_data
+    _weather_data = WeatherData(cache_dir, source)
+    for func in _weather_caches:
+        func.cache_clear()
+    return _weather_data
+
+
+def read_puma_weather(variable, state, year):
+    """Read hourly weather data of all pumas within a state through the configured
+    access layer.
+
+    :param str variable: weather variable, one of the keys of ``weather_paths``.
+    :param str state: abbrev. of state.
+    :param int year: weather year.
+    :return: (*pandas.DataFrame*) -- hourly data, pumas as columns.
+    """
+    return _weather_data.get(variable, state, year)
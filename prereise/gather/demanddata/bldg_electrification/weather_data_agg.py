@@ -5,19 +5,24 @@
 # https://confluence.ecmwf.int/display/CKB/How+to+download+ERA5
 
 import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 
 import cdsapi
 import numpy as np
 import pandas as pd
-import psychrolib
 import xarray as xr
-from dateutil import tz
+from scipy import sparse
 from scipy.spatial import cKDTree
-from suntime import Sun
 
 from prereise.gather.demanddata.bldg_electrification import const
+from prereise.gather.demanddata.bldg_electrification.weather_data import (
+    get_weather_data,
+    read_puma_weather,
+    set_weather_data,
+)
 
-psychrolib.SetUnitSystem(psychrolib.SI)
+min_hum_ratio = 1e-7
 
 variable_names = {
     "temp": {"era5": "2m_temperature", "nc": "t2m"},
@@ -96,8 +101,82 @@ def era5_download(years, directory, variable="temp"):
         )
 
 
+def lon_lat_to_cartesian(lon, lat):
+    """Convert longitude and latitude to cartesian coordinates
+
+    :param numpy.ndarray lon: longitudes, in degrees
+    :param numpy.ndarray lat: latitudes, in degrees
+    :return: (*tuple*) -- x, y and z coordinates, in km
+    """
+    # WGS 84 reference coordinate system parameters
+    a = 6378.137  # major axis [km]
+    e2 = 6.69437999014e-3  # eccentricity squared
+
+    lon_rad = np.radians(lon)
+    lat_rad = np.radians(lat)
+    # convert to cartesian coordinates
+    r_n = a / (np.sqrt(1 - e2 * (np.sin(lat_rad) ** 2)))
+    x = r_n * np.cos(lat_rad) * np.cos(lon_rad)
+    y = r_n * np.cos(lat_rad) * np.sin(lon_rad)
+    z = r_n * (1 - e2) * np.sin(lat_rad)
+    return x, y, z
+
+
+def get_era5_puma_operator(tract_data, lats_era5, lons_era5, k=4):
+    """Build the sparse operator aggregating ERA5 grid values to pumas. Tract values
+    are interpolated with inverse distance-squared weighting of the ``k`` nearest ERA5
+    grid cells and then weighted by population within each puma.
+
+    :param pandas.DataFrame tract_data: data frame, indexed by tract, with columns
+        "lat", "lon", "pop_2010" and "puma".
+    :param numpy.ndarray lats_era5: latitudes of the ERA5 grid.
+    :param numpy.ndarray lons_era5: longitudes of the ERA5 grid.
+    :param int k: number of nearest ERA5 grid cells used for interpolation.
+    :return: (*tuple*) -- (pumas x cells) scipy.sparse.csr_matrix operator, with cells
+        ordered as the flattened (latitude, longitude) grid, and the list of pumas.
+    """
+    tract_data = tract_data[tract_data["puma"].notna()]
+    lons_era5_2d, lats_era5_2d = np.meshgrid(lons_era5, lats_era5)
+    tree_era5 = cKDTree(
+        np.column_stack(
+            lon_lat_to_cartesian(lons_era5_2d.flatten(), lats_era5_2d.flatten())
+        )
+    )
+    d, inds = tree_era5.query(
+        np.column_stack(lon_lat_to_cartesian(tract_data["lon"], tract_data["lat"])),
+        k=k,
+    )
+    w = 1.0 / d**2
+    n_tracts = len(tract_data)
+    idw = sparse.csr_matrix(
+        (
+            (w / w.sum(axis=1, keepdims=True)).flatten(),
+            (np.repeat(np.arange(n_tracts), k), inds.flatten()),
+        ),
+        shape=(n_tracts, lons_era5_2d.size),
+    )
+
+    puma_codes, pumas = pd.factorize(tract_data["puma"], sort=True)
+    pop = tract_data["pop_2010"].fillna(0).to_numpy(dtype=float)
+    pop_weights = sparse.csr_matrix(
+        (
+            pop / np.bincount(puma_codes, weights=pop)[puma_codes],
+            (puma_codes, np.arange(n_tracts)),
+        ),
+        shape=(len(pumas), n_tracts),
+    )
+
+    return pop_weights @ idw, list(pumas)
+
+
 def create_era5_pumas(
-    years, tract_puma_mapping, tract_pop, tract_lat_lon, directory, variable="temp"
+    years,
+    tract_puma_mapping,
+    tract_pop,
+    tract_lat_lon,
+    directory,
+    variable="temp",
+    chunk_size=744,
 ):
     """Create {variable}s_pumas_{state}_{year}.csv or dewpt_pumas_{state}_{year} for all
         CONUS states and input year(s)
@@ -112,25 +191,11 @@ def create_era5_pumas(
         temp {Default} -- dry bulb temperataure, corresponds to ERA5 variable "2m_temperature"
         dewpt -- dew point temperature, corresponds to ERA5 variable "2m_dewpoint_temperature"
         pres -- surface pressure, corresponds to ERA5 variable "surface_pressure"
+    :param int chunk_size: number of hours of ERA5 data loaded in memory at once.
     :raises ValueError: if the ``variable`` name is invalid.
     :raises FileNotFoundError: if not all required files are present.
     """
 
-    # Function to convert latitude and longitude to cartesian coordinates
-    def lon_lat_to_cartesian(lon, lat):
-        # WGS 84 reference coordinate system parameters
-        a = 6378.137  # major axis [km]
-        e2 = 6.69437999014e-3  # eccentricity squared
-
-        lon_rad = np.radians(lon)
-        lat_rad = np.radians(lat)
-        # convert to cartesian coordinates
-        r_n = a / (np.sqrt(1 - e2 * (np.sin(lat_rad) ** 2)))
-        x = r_n * np.cos(lat_rad) * np.cos(lon_rad)
-        y = r_n * np.cos(lat_rad) * np.sin(lon_rad)
-        z = r_n * (1 - e2) * np.sin(lat_rad)
-        return x, y, z
-
     # Check variable input and get associated ERA5 variable name
     try:
         variable_era5 = variable_names[variable]["era5"]
@@ -166,47 +231,32 @@ def create_era5_pumas(
     # Loop through input years
     for year in years:
         print(f"Processing puma-level {variable} time series for {year}")
-        # Load ERA5 dataset
+        # Load ERA5 dataset lazily
         ds_era5 = xr.open_dataset(
             os.path.join(directory, variable, f"{variable}s_era5_{year}.nc")
         )
 
-        # Get latitude and longitude from ERA5 dataset and make 2D arrays
-        lats_era5 = ds_era5.variables["latitude"][:]
-        lons_era5 = ds_era5.variables["longitude"][:]
-        lons_era5_2d, lats_era5_2d = np.meshgrid(lons_era5, lats_era5)
-
-        x_era5, y_era5, z_era5 = lon_lat_to_cartesian(
-            lons_era5_2d.flatten(), lats_era5_2d.flatten()
-        )
-        x_tracts, y_tracts, z_tracts = lon_lat_to_cartesian(
-            tract_data["lon"], tract_data["lat"]
-        )
-
-        # Create KD-tree from ERA5 dataset coordinates
-        tree_era5 = cKDTree(np.column_stack((x_era5, y_era5, z_era5)))
-
-        # Create tracts values time series data frame with interpoltion using inverse distance-squared weighting for 4 nearest neighbors
-        d, inds = tree_era5.query(np.column_stack((x_tracts, y_tracts, z_tracts)), k=4)
-        w = 1.0 / d**2
-        vals_tracts = pd.Series(range(0, 8760)).apply(
-            lambda x: pd.Series(
-                (w * ds_era5[variable_nc][x].values.flatten()[inds]).sum(axis=1)
-                / w.sum(axis=1),
-                index=tract_data.index,
-            )
+        # Interpolation to tracts and population weighting to pumas in one operator
+        operator, pumas = get_era5_puma_operator(
+            tract_data,
+            ds_era5.variables["latitude"][:].values,
+            ds_era5.variables["longitude"][:].values,
         )
 
-        state_pumas = const.puma_data.groupby("state")
+        # Apply operator to (cells x hours) chunks of the ERA5 data
+        weighted_values = np.empty((len(pumas), 8760))
+        for start in range(0, 8760, chunk_size):
+            stop = min(start + chunk_size, 8760)
+            values = ds_era5[variable_nc][start:stop].values.reshape(stop - start, -1)
+            weighted_values[:, start:stop] = operator @ values.T
+        ds_era5.close()
+        weighted_values = pd.DataFrame(weighted_values, index=pumas)
 
-        weighted_values = tract_data.groupby("puma").apply(
-            lambda x: (vals_tracts[x.index] * x["pop_2010"]).sum(axis=1)
-            / x["pop_2010"].sum()
-        )
         # Convert units if needed (Kelvin to Celsius)
         if variable in {"temp", "dewpt"}:
             weighted_values -= 273.15
         # Loop through states
+        state_pumas = const.puma_data.groupby("state")
         for state in const.state_list:
             state_values = weighted_values.loc[state_pumas.get_group(state).index]
             state_values.T.to_csv(
@@ -220,76 +270,116 @@ def create_era5_pumas(
             )
 
 
-def dark_fractions(puma, puma_data, year):
-    """Compute annual time series of fraction of each hour that is dark for a given puma
+def sunrise_sunset_utc(dates, lat, lon):
+    """Compute sunrise and sunset times with the NOAA solar position equations
+
+    :param pandas.DatetimeIndex dates: dates.
+    :param numpy.ndarray lat: latitudes, in degrees.
+    :param numpy.ndarray lon: longitudes, in degrees.
+    :return: (*tuple*) -- (dates x locations) arrays of sunrise and sunset times, in
+        minutes from midnight UTC of each date.
+    """
+    # Fractional year at noon, in radians
+    gamma = (
+        2
+        * np.pi
+        / np.where(dates.is_leap_year, 366, 365)
+        * (dates.dayofyear.to_numpy() - 1 + 0.5)
+    )[:, None]
+
+    eqtime = 229.18 * (
+        0.000075
+        + 0.001868 * np.cos(gamma)
+        - 0.032077 * np.sin(gamma)
+        - 0.014615 * np.cos(2 * gamma)
+        - 0.040849 * np.sin(2 * gamma)
+    )
+    decl = (
+        0.006918
+        - 0.399912 * np.cos(gamma)
+        + 0.070257 * np.sin(gamma)
+        - 0.006758 * np.cos(2 * gamma)
+        + 0.000907 * np.sin(2 * gamma)
+        - 0.002697 * np.cos(3 * gamma)
+        + 0.00148 * np.sin(3 * gamma)
+    )
+
+    # Hour angle of sunrise, accounting for refraction and the solar disk radius
+    lat_rad = np.radians(np.asarray(lat, dtype=float))[None, :]
+    cos_ha = np.cos(np.radians(90.833)) / (np.cos(lat_rad) * np.cos(decl)) - np.tan(
+        lat_rad
+    ) * np.tan(decl)
+    ha = np.degrees(np.arccos(np.clip(cos_ha, -1, 1)))
+
+    lon = np.asarray(lon, dtype=float)[None, :]
+    return 720 - 4 * (lon + ha) - eqtime, 720 - 4 * (lon - ha) - eqtime
+
+
+def calculate_dark_fractions(puma_data, year):
+    """Compute annual time series of fraction of each hour that is dark for all pumas
 
-    :param str puma: puma name
     :param pandas.DataFrame puma_data: puma data for lat, long, and timezone
     :param int year: year of desired dark fractions
 
-    :return: (*list*) -- hourly dark fractions for the year
+    :return: (*pandas.DataFrame*) -- hourly dark fractions for the year, pumas as
+        columns.
     """
+    hours_utc = pd.date_range(
+        start=f"{year}-01-01", end=f"{year+1}-01-01", freq="H", tz="UTC"
+    )[:-1]
+    dark_frac = np.empty((len(hours_utc), len(puma_data)))
 
-    latitude = puma_data.loc[puma, "latitude"]
-    longitude = puma_data.loc[puma, "longitude"]
+    for puma_timezone, puma_data_tz in puma_data.groupby("timezone"):
+        hours_local = hours_utc.tz_convert(puma_timezone)
+        days, day_index = np.unique(
+            hours_local.tz_localize(None).normalize(), return_inverse=True
+        )
+        days = pd.DatetimeIndex(days)
+
+        # UTC offset of each local day, in minutes
+        noon = days + pd.Timedelta(hours=12)
+        offset = (
+            noon - noon.tz_localize(puma_timezone).tz_convert("UTC").tz_localize(None)
+        ) / pd.Timedelta(minutes=1)
+
+        # Local sunrise and sunset times rounded to the minute
+        sunrise, sunset = (
+            np.round(t + offset.to_numpy()[:, None]) % 1440
+            for t in sunrise_sunset_utc(
+                days, puma_data_tz["latitude"], puma_data_tz["longitude"]
+            )
+        )
+        sunrise_hour, sunset_hour = sunrise[day_index] // 60, sunset[day_index] // 60
+        sunrise_dark_frac = (sunrise[day_index] % 60) / 60
+        sunset_dark_frac = 1 - (sunset[day_index] % 60) / 60
+
+        hour = hours_local.hour.to_numpy()[:, None]
+        dark_frac[:, puma_data.index.get_indexer(puma_data_tz.index)] = np.select(
+            [
+                hour == sunrise_hour,
+                hour == sunset_hour,
+                (hour > sunrise_hour) & (hour < sunset_hour),
+            ],
+            [sunrise_dark_frac, sunset_dark_frac, 0],
+            default=1,
+        )
 
-    puma_timezone = puma_data.loc[puma, "timezone"]
-    hours_local = pd.date_range(
-        start=f"{year}-01-01", end=f"{year+1}-01-01", freq="H", tz="UTC"
-    )[:-1].tz_convert(puma_timezone)
+    return pd.DataFrame(dark_frac, columns=puma_data.index)
 
-    sun = Sun(latitude, longitude)
 
-    sunrise = pd.Series(hours_local).apply(
-        lambda x: sun.get_local_sunrise_time(x, local_time_zone=tz.gettz(puma_timezone))
-    )
-    sunset = pd.Series(hours_local).apply(
-        lambda x: sun.get_local_sunset_time(x, local_time_zone=tz.gettz(puma_timezone))
-    )
+def dark_fractions(puma, puma_data, year):
+    """Compute annual time series of fraction of each hour that is dark for a given puma
 
-    sun_df = pd.DataFrame(
-        {"sunrise": sunrise, "sunset": sunset, "hour_local": hours_local.hour}
-    )
+    :param str puma: puma name
+    :param pandas.DataFrame puma_data: puma data for lat, long, and timezone
+    :param int year: year of desired dark fractions
 
-    sun_df["sunrise_hour"] = sun_df["sunrise"].apply(lambda x: x.hour)
-    sun_df["sunset_hour"] = sun_df["sunset"].apply(lambda x: x.hour)
-
-    sun_df["sunrise_dark_frac"] = sun_df["sunrise"].apply(lambda x: x.minute / 60)
-    sun_df["sunset_dark_frac"] = sun_df["sunset"].apply(lambda x: 1 - x.minute / 60)
-
-    def dark_hour(local, sunrise, sunset, sunrise_frac, sunset_frac):
-        """Return fraction of hour that is dark. 0 if completely light, 1 if completely dark
-
-        :param pandas.DateTime local: local hour
-        :param pandas.DateTime sunrise: local sunrise time
-        :param pandas.DateTime sunset: local sunset time
-        :param float sunrise_frac: fraction of the day's sunrise hour that is dark
-        :param float sunset_frac: fraction of the day's sunset hour that is dark
-
-        :return: (*float*) -- hour darkness fraction
-        """
-        if local == sunrise:
-            return sunrise_frac
-        elif local == sunset:
-            return sunset_frac
-        elif local > sunrise and local < sunset:
-            return 0
-        else:
-            return 1
-
-    sun_df["dark_hour_frac"] = sun_df.apply(
-        lambda x: dark_hour(
-            x["hour_local"],
-            x["sunrise_hour"],
-            x["sunset_hour"],
-            x["sunrise_dark_frac"],
-            x["sunset_dark_frac"],
-        ),
-        axis=1,
+    :return: (*pandas.Series*) -- hourly dark fractions for the year
+    """
+    return calculate_dark_fractions(puma_data.loc[[puma]], year)[puma].rename(
+        "dark_hour_frac"
     )
 
-    return sun_df["dark_hour_frac"]
-
 
 def generate_dark_fracs(year, directory):
     """Generate puma level hourly time series of darkness fractions for all pumas within a state
@@ -304,15 +394,11 @@ def generate_dark_fracs(year, directory):
     os.makedirs(os.path.join(directory, "pumas", "dark_frac"), exist_ok=True)
 
     puma_data = pd.read_csv("data/puma_data.csv", index_col="puma")
+    puma_data = puma_data[puma_data["state"].isin(const.state_list)]
+    puma_dark_frac = calculate_dark_fractions(puma_data, year)
 
     for state in const.state_list:
-        puma_data_it = puma_data[puma_data["state"] == state]
-        puma_dark_frac = pd.DataFrame(columns=list(puma_data_it.index))
-
-        for i in list(puma_dark_frac.columns):
-            puma_dark_frac[i] = dark_fractions(i, puma_data, year)
-
-        puma_dark_frac.to_csv(
+        puma_dark_frac[puma_data.index[puma_data["state"] == state]].to_csv(
             os.path.join(
                 directory, "pumas", "dark_frac", f"dark_frac_pumas_{state}_{year}.csv"
             ),
@@ -320,28 +406,131 @@ def generate_dark_fracs(year, directory):
         )
 
 
-def t_to_twb(temp_values, dwpt_values, press_values):
-    """Compute wetbulb temperature from drybulb, dewpoint, and pressure
+def sat_vap_pres(temp):
+    """Compute saturation vapor pressure, ASHRAE Handbook - Fundamentals (2017) ch. 1
+    eqn 5 & 6, defined above and below the triple point of water
 
-    :param list temp_values: drybulb temperatures, C
-    :param list dwpt_values: dewpoint temperatures, C
-    :param list press_values: pressures, Pa
+    :param numpy.ndarray temp: drybulb temperatures, C
 
-    :return: (*list*) -- wetbulb temperatures
+    :return: (*numpy.ndarray*) -- saturation vapor pressures, Pa
     """
-    return [
-        psychrolib.GetTWetBulbFromTDewPoint(
-            temp_values[i], min(temp_values[i], dwpt_values[i]), press_values[i]
-        )
-        for i in range(len(dwpt_values))
-    ]
+    t = temp + 273.15
+    ln_pws = np.where(
+        temp <= 0.01,
+        -5.6745359e03 / t
+        + 6.3925247
+        - 9.677843e-03 * t
+        + 6.2215701e-07 * t**2
+        + 2.0747825e-09 * t**3
+        - 9.484024e-13 * t**4
+        + 4.1635019 * np.log(t),
+        -5.8002206e03 / t
+        + 1.3914993
+        - 4.8640239e-02 * t
+        + 4.1764768e-05 * t**2
+        - 1.4452093e-08 * t**3
+        + 6.5459673 * np.log(t),
+    )
+    return np.exp(ln_pws)
+
+
+def hum_ratio_from_pres(vap_pres, press_values):
+    """Compute humidity ratio, ASHRAE Handbook - Fundamentals (2017) ch. 1 eqn 20
+
+    :param numpy.ndarray vap_pres: partial pressures of water vapor, Pa
+    :param numpy.ndarray press_values: pressures, Pa
+
+    :return: (*numpy.ndarray*) -- humidity ratios, kg_H2O/kg_Air
+    """
+    return np.maximum(0.621945 * vap_pres / (press_values - vap_pres), min_hum_ratio)
+
+
+def hum_ratio_from_twb(temp_values, twb_values, press_values):
+    """Compute humidity ratio from drybulb and wetbulb temperatures, ASHRAE Handbook -
+    Fundamentals (2017) ch. 1 eqn 33 and 35
+
+    :param numpy.ndarray temp_values: drybulb temperatures, C
+    :param numpy.ndarray twb_values: wetbulb temperatures, C
+    :param numpy.ndarray press_values: pressures, Pa
+
+    :return: (*numpy.ndarray*) -- humidity ratios, kg_H2O/kg_Air
+    """
+    ws_star = hum_ratio_from_pres(sat_vap_pres(twb_values), press_values)
+    hum_ratio = np.where(
+        twb_values >= 0,
+        ((2501.0 - 2.326 * twb_values) * ws_star - 1.006 * (temp_values - twb_values))
+        / (2501.0 + 1.86 * temp_values - 4.186 * twb_values),
+        ((2830.0 - 0.24 * twb_values) * ws_star - 1.006 * (temp_values - twb_values))
+        / (2830.0 + 1.86 * temp_values - 2.1 * twb_values),
+    )
+    return np.maximum(hum_ratio, min_hum_ratio)
+
+
+def t_to_twb(temp_values, dwpt_values, press_values, tolerance=0.001):
+    """Compute wetbulb temperature from drybulb, dewpoint, and pressure. The wetbulb
+    temperature is found by bisection between the dewpoint and drybulb temperatures,
+    for all values at once.
+
+    :param numpy.ndarray temp_values: drybulb temperatures, C
+    :param numpy.ndarray dwpt_values: dewpoint temperatures, C
+    :param numpy.ndarray press_values: pressures, Pa
+    :param float tolerance: width of the final bisection interval, C
+
+    :return: (*numpy.ndarray*) -- wetbulb temperatures
+    """
+    temp_values = np.asarray(temp_values, dtype=float)
+    press_values = np.asarray(press_values, dtype=float)
+    dwpt_values = np.minimum(temp_values, np.asarray(dwpt_values, dtype=float))
 
+    hum_ratio = hum_ratio_from_pres(sat_vap_pres(dwpt_values), press_values)
 
-def generate_wetbulb_temps(year, directory):
+    twb_sup, twb_inf = temp_values.copy(), dwpt_values.copy()
+    width = np.nanmax(twb_sup - twb_inf, initial=0)
+    for _ in range(int(np.ceil(np.log2(max(width / tolerance, 1))))):
+        twb = (twb_sup + twb_inf) / 2
+        above = hum_ratio_from_twb(temp_values, twb, press_values) > hum_ratio
+        twb_sup = np.where(above, twb, twb_sup)
+        twb_inf = np.where(above, twb_inf, twb)
+
+    return (twb_sup + twb_inf) / 2
+
+
+def _generate_state_wetbulb_temps(state, year, directory):
+    """Generate puma level hourly time series of wetbulb temperatures for all pumas
+    within a state
+
+    :param str state: abbrev. of state
+    :param int year: year of desired wetbulb temperatures
+    :param str directory: path to local root directory for weather data
+    """
+    temps = read_puma_weather("temps", state, year)
+    dwpts = read_puma_weather("dewpts", state, year)[temps.columns]
+    press = read_puma_weather("press", state, year)[temps.columns]
+
+    temps_wetbulb = pd.DataFrame(
+        t_to_twb(temps.to_numpy(), dwpts.to_numpy(), press.to_numpy()),
+        columns=temps.columns,
+    )
+
+    temps_wetbulb.to_csv(
+        os.path.join(
+            directory,
+            "pumas",
+            "temps_wetbulb",
+            f"temps_wetbulb_pumas_{state}_{year}.csv",
+        ),
+        index=False,
+    )
+
+
+def generate_wetbulb_temps(year, directory, max_workers=None):
     """Generate puma level hourly time series of wetbulb temperatures for all pumas within a state
 
     :param int year: year of desired dark fractions
     :param str directory: path to local root directory for weather data
+    :param int max_workers: number of processes used to process states in parallel.
+        Defaults to the number of processors on the machine. States are processed in
+        the current process if 1.
 
     :export: (*csv*) -- statewide hourly wetbulb temperatures for every puma
     """
@@ -349,25 +538,23 @@ def generate_wetbulb_temps(year, directory):
     # Create folder to store dark_frac output if it doesn"t yet exist
     os.makedirs(os.path.join(directory, "pumas", "temps_wetbulb"), exist_ok=True)
 
-    for state in const.state_list:
-        temps = pd.read_csv(
-            f"https://besciences.blob.core.windows.net/datasets/bldg_el/pumas/temps/temps_pumas_{state}_{year}.csv"
-        )
-        dwpts = pd.read_csv(
-            f"https://besciences.blob.core.windows.net/datasets/bldg_el/pumas/dewpoints/dewpts_pumas_{state}_{year}.csv"
-        )
-        press = pd.read_csv(
-            f"https://besciences.blob.core.windows.net/datasets/bldg_el/pumas/press/press_pumas_{state}_{year}.csv"
-        )
-
-        temps_wetbulb = temps.apply(lambda x: t_to_twb(x, dwpts[x.name], press[x.name]))
-
-        temps_wetbulb.to_csv(
-            os.path.join(
-                directory,
-                "pumas",
-                "temps_wetbulb",
-                f"temps_wetbulb_pumas_{state}_{year}.csv",
-            ),
-            index=False,
+    if max_workers == 1:
+        for state in const.state_list:
+            _generate_state_wetbulb_temps(state, year, directory)
+        return
+
+    # Workers read weather data through the access layer configured in this process
+    weather_data = get_weather_data()
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        initializer=set_weather_data,
+        initargs=(weather_data.cache_dir, weather_data.source),
+    ) as executor:
+        list(
+            executor.map(
+                _generate_state_wetbulb_temps,
+                const.state_list,
+                repeat(year),
+                repeat(directory),
+            )
         )
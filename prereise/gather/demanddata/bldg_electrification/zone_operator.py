@@ -0,0 +1,170 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from prereise.gather.demanddata.bldg_electrification import const
+
+
+class ZoneOperator:
+    """Sparse (zones x pumas) operator aggregating puma level data into zones. The
+    operator holds the fraction of each puma within each zone and is built once from
+    the shapefile overlay.
+
+    :param dict puma_data_zones: keys are zone names, values are data frames of puma
+        data within the zone, output of :func:`helper.zones_shp_overlay`.
+    """
+
+    def __init__(self, puma_data_zones):
+        self.zones = list(puma_data_zones)
+        overlay = pd.concat(
+            [puma_data_zones[z].assign(zone=i) for i, z in enumerate(self.zones)]
+        )
+        self.puma_data = overlay[~overlay.index.duplicated()].drop(
+            columns=["frac_in_zone", "zone"]
+        )
+        self.pumas = self.puma_data.index
+        self.frac = sparse.csr_matrix(
+            (
+                overlay["frac_in_zone"].to_numpy(dtype=float),
+                (overlay["zone"].to_numpy(), self.pumas.get_indexer(overlay.index)),
+            ),
+            shape=(len(self.zones), len(self.pumas)),
+        )
+        self._operators = {}
+
+    @classmethod
+    def from_puma_data(cls, puma_data, zone_name="zone"):
+        """Build the operator of a single zone.
+
+        :param pandas.DataFrame puma_data: puma data within zone, output of
+            :func:`helper.zone_shp_overlay`.
+        :param str zone_name: name of the zone.
+        :return: (*ZoneOperator*) -- operator.
+        """
+        return cls({zone_name: puma_data})
+
+    def get_operator(self, weight=None, in_zone=True):
+        """Return the sparse operator weighting pumas by a puma attribute.
+
+        :param str weight: column of puma data used as weight, e.g. *'pop'* or
+            *'res_area_{base_year}_m2'*. Defaults to None, i.e. unit weights.
+        :param bool in_zone: weight pumas by their fraction within the zone. If False,
+            pumas overlapping the zone are fully counted.
+        :return: (*scipy.sparse.csr_matrix*) -- (zones x pumas) operator.
+        """
+        key = (weight, in_zone)
+        if key not in self._operators:
+            operator = self.frac.copy()
+            if not in_zone:
+                operator.data = np.ones_like(operator.data)
+            if weight is not None:
+                operator = operator @ sparse.diags(
+                    self.puma_data[weight].to_numpy(dtype=float)
+                )
+            self._operators[key] = sparse.csr_matrix(operator)
+        return self._operators[key]
+
+    def sum(self, values, weight=None, in_zone=True, normalize=False):
+        """Compute weighted sums of puma level values for all zones at once.
+
+        :param pandas.Series/pandas.DataFrame values: puma level values, e.g. static
+            attributes or (pumas x hours) time series, indexed by puma. Missing values
+            and pumas are ignored.
+        :param str weight: see :meth:`get_operator`.
+        :param bool in_zone: see :meth:`get_operator`.
+        :param bool normalize: divide by the sum of the weights, i.e. compute weighted
+            averages.
+        :return: (*pandas.Series/pandas.DataFrame*) -- zonal values, indexed by zone.
+        """
+        operator = self.get_operator(weight, in_zone)
+        values = values.reindex(self.pumas)
+        result = operator @ np.nan_to_num(values.to_numpy(dtype=float))
+        if normalize:
+            total = np.asarray(operator.sum(axis=1)).ravel()
+            result = result / (total if result.ndim == 1 else total[:, None])
+        if isinstance(values, pd.Series):
+            return pd.Series(result, index=self.zones)
+        return pd.DataFrame(result, index=self.zones, columns=values.columns)
+
+    def stats(self, base_year=const.base_year):
+        """Compute population, floor areas and fuel fractions of all zones.
+
+        :param int base_year: year of floor areas and fuel fractions.
+        :return: (*pandas.DataFrame*) -- zonal statistics, zones as index.
+        """
+        puma_data = self.puma_data
+        res_area = f"res_area_{base_year}_m2"
+        com_area = f"com_area_{base_year}_m2"
+
+        def total(column, weight=None, in_zone=True):
+            operator = self.get_operator(weight, in_zone)
+            return operator @ puma_data[column].to_numpy(dtype=float)
+
+        res_fractions = {
+            "frac_elec_res_heat": f"frac_elec_sh_res_{base_year}",
+            "frac_elec_res_hp": "frac_hp_res",
+            "frac_elec_res_cool": "AC_penetration",
+            "frac_elec_dhw_res": f"frac_elec_dhw_res_{base_year}",
+            "frac_elec_other_res": f"frac_elec_other_res_{base_year}",
+            "frac_ff_res_heat": f"frac_ff_sh_res_{base_year}",
+            "frac_ff_dhw_res": f"frac_ff_dhw_res_{base_year}",
+            "frac_ff_other_res": f"frac_ff_other_res_{base_year}",
+        }
+        com_fractions = {
+            "frac_elec_com_heat": f"frac_elec_sh_com_{base_year}",
+            "frac_elec_com_hp": "frac_hp_com",
+            "frac_elec_dhw_com": f"frac_elec_dhw_com_{base_year}",
+            "frac_elec_cook_com": f"frac_elec_cook_com_{base_year}",
+            "frac_ff_com_heat": f"frac_ff_sh_com_{base_year}",
+            "frac_ff_dhw_com": f"frac_ff_dhw_com_{base_year}",
+            "frac_ff_cook_com": f"frac_ff_cook_com_{base_year}",
+        }
+
+        stats = {
+            "pop": total("pop"),
+            "res_area_m2": total(res_area),
+            "com_area_m2": total(com_area),
+            "ind_area_m2_gbs": total("ind_area_gbs_m2"),
+        }
+        stats.update(
+            {
+                k: total(v, res_area) / stats["res_area_m2"]
+                for k, v in res_fractions.items()
+            }
+        )
+        stats.update(
+            {
+                k: total(v, com_area) / stats["com_area_m2"]
+                for k, v in com_fractions.items()
+            }
+        )
+        # Degree days are weighted by the population of overlapping pumas
+        pop = total("pop", in_zone=False)
+        stats["hdd65"] = total("hdd65_normals", "pop", in_zone=False) / pop
+        stats["cdd65"] = total("cdd65_normals", "pop", in_zone=False) / pop
+
+        return pd.DataFrame(stats, index=self.zones)[
+            [
+                "pop",
+                "res_area_m2",
+                "com_area_m2",
+                "ind_area_m2_gbs",
+                "frac_elec_res_heat",
+                "frac_elec_res_hp",
+                "frac_elec_res_cool",
+                "frac_elec_com_heat",
+                "frac_elec_com_hp",
+                "frac_elec_dhw_res",
+                "frac_elec_dhw_com",
+                "frac_elec_other_res",
+                "frac_elec_cook_com",
+                "frac_ff_res_heat",
+                "frac_ff_dhw_res",
+                "frac_ff_other_res",
+                "frac_ff_com_heat",
+                "frac_ff_dhw_com",
+                "frac_ff_cook_com",
+                "hdd65",
+                "cdd65",
+            ]
+        ]
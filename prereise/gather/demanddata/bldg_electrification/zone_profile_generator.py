@@ -4,7 +4,6 @@ import shutil
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
-import statsmodels.api as sm
 from pandas.tseries.holiday import USFederalHolidayCalendar as calendar  # noqa: N813
 
 from prereise.gather.demanddata.bldg_electrification import const
@@ -14,562 +13,393 @@ from prereise.gather.demanddata.bldg_electrification.const import (
 )
 from prereise.gather.demanddata.bldg_electrification.helper import (
     read_shapefile,
+    run_batch,
     zone_shp_overlay,
+    zones_shp_overlay,
 )
+from prereise.gather.demanddata.bldg_electrification.weather_data import (
+    get_weather_data,
+    set_weather_data,
+)
+from prereise.gather.demanddata.bldg_electrification.zone_operator import ZoneOperator
 
 
-def bkpt_scale(df, num_points, bkpt, heat_cool):
+def bkpt_scale(temp, num_points, bkpt, heat_cool):
     """Adjust heating or cooling breakpoint to ensure there are enough data points to fit.
 
-    :param pandas.DataFrame df: load and temperature for a certain hour of the day, wk or wknd.
-    :param int num_points: minimum number of points required in df to fit.
+    :param numpy.ndarray temp: temperatures for a certain hour of the day, wk or wknd.
+    :param int num_points: minimum number of points required to fit.
     :param float bkpt: starting temperature breakpoint value.
     :param str heat_cool: dictates if breakpoint is shifted warmer for heating or colder for cooling
 
-    :return: (*pandas.DataFrame*) dft -- adjusted dataframe filtered by new breakpoint. Original input df if size of initial df >= num_points
-    :return: (*float*) bkpt -- updated breakpoint. Original breakpoint if size of initial df >= num_points
+    :return: (*numpy.ndarray*) index -- positions of the points filtered by the new
+        breakpoint. Points below (heating) or above (cooling) the initial breakpoint if
+        there are at least num_points of them
+    :return: (*float*) bkpt -- updated breakpoint. Original breakpoint if there are at
+        least num_points points beyond the initial breakpoint
+    """
+    index = np.flatnonzero(temp <= bkpt if heat_cool == "heat" else temp >= bkpt)
+    if len(index) < num_points:
+        order = np.argsort(temp, kind="stable")
+        index = order[:num_points] if heat_cool == "heat" else order[-num_points:]
+        bkpt = temp[index[-1]] if heat_cool == "heat" else temp[index[0]]
+
+    return index, bkpt
+
+
+def batch_ols(x, y, mask):
+    """Fit ordinary least squares regressions on groups of observations at once. Groups
+    are padded to the same number of observations, padded entries being masked.
+
+    :param numpy.ndarray x: (groups x observations x regressors) design matrices.
+    :param numpy.ndarray y: (groups x observations) endogenous variables.
+    :param numpy.ndarray mask: (groups x observations) boolean array, True for actual
+        observations.
+    :return: (*dict*) -- keys are *'params'*, *'bse'*, *'nobs'* and *'rsquared'*,
+        values are arrays of parameters, standard errors of the parameters, number of
+        observations and r-squared values of the fits, as given by statsmodels OLS.
     """
+    x = np.where(mask[..., None], x, 0)
+    y = np.where(mask, y, 0)
 
-    dft = (
-        df[df["temp_c"] <= bkpt].reset_index()
-        if heat_cool == "heat"
-        else df[df["temp_c"] >= bkpt].reset_index()
-    )
-    if len(dft) < num_points:
-        dft = (
-            df.sort_values(by=["temp_c"]).head(num_points).reset_index()
-            if heat_cool == "heat"
-            else df.sort_values(by=["temp_c"]).tail(num_points).reset_index()
-        )
-        bkpt = (
-            dft["temp_c"][num_points - 1] if heat_cool == "heat" else dft["temp_c"][0]
-        )
+    # Padded entries are zero rows which leave the least squares solution unchanged
+    pinv_x = np.linalg.pinv(x)
+    params = np.einsum("gkn,gn->gk", pinv_x, y)
+    resid = np.where(mask, y - np.einsum("gnk,gk->gn", x, params), 0)
 
-    return dft.sort_index(), bkpt
+    nobs = mask.sum(axis=1).astype(float)
+    ssr = np.square(resid).sum(axis=1)
+    y_mean = y.sum(axis=1) / nobs
+    tss = np.square(np.where(mask, y - y_mean[:, None], 0)).sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scale = ssr / (nobs - np.linalg.matrix_rank(x))
+        bse = np.sqrt(np.einsum("gkn,gkn->gk", pinv_x, pinv_x) * scale[:, None])
+        rsquared = 1 - ssr / tss
 
+    return {"params": params, "bse": bse, "nobs": nobs, "rsquared": rsquared}
 
-def zonal_data(puma_data, hours_utc, year):
-    """Aggregate puma metrics to population weighted hourly zonal values
 
-    :param pandas.DataFrame puma_data: puma data within zone, output of zone_shp_overlay()
-    :param pandas.DatetimeIndex hours_utc: index of UTC hours.
-    :param int year: year of temperature data
+def _pad_groups(index):
+    """Stack row positions of groups of different sizes.
 
-    :return: (*pandas.DataFrame*) temp_df -- hourly zonal values of temperature, wetbulb temperature, and darkness fraction
+    :param list index: arrays of row positions, one per group.
+    :return: (*tuple*) -- (groups x max size) arrays of row positions, padded with
+        zeros, and of booleans, True for actual rows.
     """
-    puma_pop_weights = (puma_data["pop"] * puma_data["frac_in_zone"]) / sum(
-        puma_data["pop"] * puma_data["frac_in_zone"]
-    )
-    zone_states = list(set(puma_data["state"]))
-    timezone = max(
-        set(list(puma_data["timezone"])), key=list(puma_data["timezone"]).count
-    )
+    size = max(len(i) for i in index)
+    mask = np.arange(size) < np.array([len(i) for i in index])[:, None]
+    padded = np.zeros(mask.shape, dtype=int)
+    padded[mask] = np.concatenate(index)
+    return padded, mask
 
-    base_year = const.base_year
 
-    stats = pd.Series(
-        data=[
-            sum(puma_data["pop"] * puma_data["frac_in_zone"]),
-            sum(puma_data[f"res_area_{base_year}_m2"] * puma_data["frac_in_zone"]),
-            sum(puma_data[f"com_area_{base_year}_m2"] * puma_data["frac_in_zone"]),
-            sum(puma_data["ind_area_gbs_m2"] * puma_data["frac_in_zone"]),
-            sum(
-                puma_data[f"res_area_{base_year}_m2"]
-                * puma_data[f"frac_elec_sh_res_{base_year}"]
-                * puma_data["frac_in_zone"]
-            )
-            / sum(puma_data[f"res_area_{base_year}_m2"] * puma_data["frac_in_zone"]),
-            sum(
-                puma_data[f"res_area_{base_year}_m2"]
-                * puma_data["frac_hp_res"]
-                * puma_data["frac_in_zone"]
-            )
-            / sum(puma_data[f"res_area_{base_year}_m2"] * puma_data["frac_in_zone"]),
-            sum(
-                puma_data[f"res_area_{base_year}_m2"]
-                * puma_data["AC_penetration"]
-                * puma_data["frac_in_zone"]
-            )
-            / sum(puma_data[f"res_area_{base_year}_m2"] * puma_data["frac_in_zone"]),
-            sum(
-                puma_data[f"com_area_{base_year}_m2"]
-                * puma_data[f"frac_elec_sh_com_{base_year}"]
-                * puma_data["frac_in_zone"]
-            )
-            / sum(puma_data[f"com_area_{base_year}_m2"] * puma_data["frac_in_zone"]),
-            sum(
-                puma_data[f"com_area_{base_year}_m2"]
-                * puma_data["frac_hp_com"]
-                * puma_data["frac_in_zone"]
-            )
-            / sum(puma_data[f"com_area_{base_year}_m2"] * puma_data["frac_in_zone"]),
-            sum(
-                puma_data[f"res_area_{base_year}_m2"]
-                * puma_data[f"frac_elec_dhw_res_{base_year}"]
-                * puma_data["frac_in_zone"]
-            )
-            / sum(puma_data[f"res_area_{base_year}_m2"] * puma_data["frac_in_zone"]),
-            sum(
-                puma_data[f"com_area_{base_year}_m2"]
-                * puma_data[f"frac_elec_dhw_com_{base_year}"]
-                * puma_data["frac_in_zone"]
-            )
-            / sum(puma_data[f"com_area_{base_year}_m2"] * puma_data["frac_in_zone"]),
-            sum(
-                puma_data[f"res_area_{base_year}_m2"]
-                * puma_data[f"frac_elec_other_res_{base_year}"]
-                * puma_data["frac_in_zone"]
-            )
-            / sum(puma_data[f"res_area_{base_year}_m2"] * puma_data["frac_in_zone"]),
-            sum(
-                puma_data[f"com_area_{base_year}_m2"]
-                * puma_data[f"frac_elec_cook_com_{base_year}"]
-                * puma_data["frac_in_zone"]
-            )
-            / sum(puma_data[f"com_area_{base_year}_m2"] * puma_data["frac_in_zone"]),
-            sum(
-                puma_data[f"res_area_{base_year}_m2"]
-                * puma_data[f"frac_ff_sh_res_{base_year}"]
-                * puma_data["frac_in_zone"]
-            )
-            / sum(puma_data[f"res_area_{base_year}_m2"] * puma_data["frac_in_zone"]),
-            sum(
-                puma_data[f"res_area_{base_year}_m2"]
-                * puma_data[f"frac_ff_dhw_res_{base_year}"]
-                * puma_data["frac_in_zone"]
-            )
-            / sum(puma_data[f"res_area_{base_year}_m2"] * puma_data["frac_in_zone"]),
-            sum(
-                puma_data[f"res_area_{base_year}_m2"]
-                * puma_data[f"frac_ff_other_res_{base_year}"]
-                * puma_data["frac_in_zone"]
-            )
-            / sum(puma_data[f"res_area_{base_year}_m2"] * puma_data["frac_in_zone"]),
-            sum(
-                puma_data[f"com_area_{base_year}_m2"]
-                * puma_data[f"frac_ff_sh_com_{base_year}"]
-                * puma_data["frac_in_zone"]
-            )
-            / sum(puma_data[f"com_area_{base_year}_m2"] * puma_data["frac_in_zone"]),
-            sum(
-                puma_data[f"com_area_{base_year}_m2"]
-                * puma_data[f"frac_ff_dhw_com_{base_year}"]
-                * puma_data["frac_in_zone"]
-            )
-            / sum(puma_data[f"com_area_{base_year}_m2"] * puma_data["frac_in_zone"]),
-            sum(
-                puma_data[f"com_area_{base_year}_m2"]
-                * puma_data[f"frac_ff_cook_com_{base_year}"]
-                * puma_data["frac_in_zone"]
-            )
-            / sum(puma_data[f"com_area_{base_year}_m2"] * puma_data["frac_in_zone"]),
-            sum(puma_data["hdd65_normals"] * puma_data["pop"] / sum(puma_data["pop"])),
-            sum(puma_data["cdd65_normals"] * puma_data["pop"] / sum(puma_data["pop"])),
-        ],
-        index=[
-            "pop",
-            "res_area_m2",
-            "com_area_m2",
-            "ind_area_m2_gbs",
-            "frac_elec_res_heat",
-            "frac_elec_res_hp",
-            "frac_elec_res_cool",
-            "frac_elec_com_heat",
-            "frac_elec_com_hp",
-            "frac_elec_dhw_res",
-            "frac_elec_dhw_com",
-            "frac_elec_other_res",
-            "frac_elec_cook_com",
-            "frac_ff_res_heat",
-            "frac_ff_dhw_res",
-            "frac_ff_other_res",
-            "frac_ff_com_heat",
-            "frac_ff_dhw_com",
-            "frac_ff_cook_com",
-            "hdd65",
-            "cdd65",
-        ],
-    )
+def _masked_mean(values, mask):
+    """Average values of groups, ignoring padded entries.
 
-    puma_hourly_temps = pd.concat(
-        list(
-            pd.Series(data=zone_states).apply(
-                lambda x: pd.read_csv(
-                    f"https://besciences.blob.core.windows.net/datasets/bldg_el/pumas/{year}/temps/temps_pumas_{x}_{year}.csv"
-                ).T
-            )
+    :param numpy.ndarray values: (groups x observations) values.
+    :param numpy.ndarray mask: (groups x observations) boolean array.
+    :return: (*numpy.ndarray*) -- average for each group, NaN if a group is empty.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(mask, values, 0).sum(axis=1) / mask.sum(axis=1)
+
+
+def zones_data(puma_data_zones, hours_utc, year):
+    """Aggregate puma metrics to population weighted hourly zonal values of several
+    zones at once
+
+    :param dict puma_data_zones: keys are zone names, values are puma data within the
+        zone, output of zones_shp_overlay()
+    :param pandas.DatetimeIndex hours_utc: index of UTC hours.
+    :param int year: year of temperature data
+
+    :return: (*dict*) -- keys are zone names, values are tuples of hourly zonal values
+        and zonal statistics as returned by :func:`zonal_data`.
+    """
+    operator = ZoneOperator(puma_data_zones)
+    stats = operator.stats(const.base_year)
+
+    weather_data = get_weather_data()
+    states = sorted(set(operator.puma_data["state"]))
+    zonal_weather = {
+        variable: operator.sum(
+            weather_data.get_states(variable, states, year).T, "pop", normalize=True
         )
-    )
-    puma_hourly_temps_wb = pd.concat(
-        list(
-            pd.Series(data=zone_states).apply(
-                lambda x: pd.read_csv(
-                    f"https://besciences.blob.core.windows.net/datasets/bldg_el/pumas/{year}/temps_wetbulb/temps_wetbulb_pumas_{x}_{year}.csv"
-                ).T
-            )
+        for variable in ["temps", "temps_wetbulb", "dark_frac"]
+    }
+
+    zones = {}
+    for zone, puma_data in puma_data_zones.items():
+        timezone = max(
+            set(list(puma_data["timezone"])), key=list(puma_data["timezone"]).count
         )
-    )
-    puma_hourly_dark_frac = pd.concat(
-        list(
-            pd.Series(data=zone_states).apply(
-                lambda x: pd.read_csv(
-                    f"https://besciences.blob.core.windows.net/datasets/bldg_el/pumas/{year}/dark_frac/dark_frac_pumas_{x}_{year}.csv"
-                ).T
+        hours_local = hours_utc.tz_convert(timezone)
+        is_holiday = pd.Series(hours_local).dt.date.isin(
+            list(
+                pd.Series(
+                    calendar().holidays(start=hours_local.min(), end=hours_local.max())
+                ).dt.date
             )
         )
-    )
 
-    hours_local = hours_utc.tz_convert(timezone)
-    is_holiday = pd.Series(hours_local).dt.date.isin(
-        list(
-            pd.Series(
-                calendar().holidays(start=hours_local.min(), end=hours_local.max())
-            ).dt.date
+        temp_df = pd.DataFrame(
+            {
+                "temp_c": zonal_weather["temps"].loc[zone].to_numpy(),
+                "temp_c_wb": zonal_weather["temps_wetbulb"].loc[zone].to_numpy(),
+                "date_local": hours_local,
+                "hour_local": hours_local.hour,
+                "weekday": hours_local.weekday,
+                "holiday": is_holiday,
+                "hourly_dark_frac": zonal_weather["dark_frac"].loc[zone].to_numpy(),
+            }
         )
-    )
+        zones[zone] = (temp_df, stats.loc[zone].rename(None))
 
-    temp_df = pd.DataFrame(
-        {
-            "temp_c": puma_hourly_temps[puma_hourly_temps.index.isin(puma_data.index)]
-            .mul(puma_pop_weights, axis=0)
-            .sum(axis=0),
-            "temp_c_wb": puma_hourly_temps_wb[
-                puma_hourly_temps_wb.index.isin(puma_data.index)
-            ]
-            .mul(puma_pop_weights, axis=0)
-            .sum(axis=0),
-            "date_local": hours_local,
-            "hour_local": hours_local.hour,
-            "weekday": hours_local.weekday,
-            "holiday": is_holiday,
-            "hourly_dark_frac": puma_hourly_dark_frac[
-                puma_hourly_dark_frac.index.isin(puma_data.index)
-            ]
-            .mul(puma_pop_weights, axis=0)
-            .sum(axis=0),
-        }
-    )
+    return zones
 
-    return temp_df, stats
 
+def zonal_data(puma_data, hours_utc, year):
+    """Aggregate puma metrics to population weighted hourly zonal values
 
-def hourly_load_fit(load_temp_df, plot_boolean):
-    """Fit hourly heating, cooling, and baseload functions to load data
+    :param pandas.DataFrame puma_data: puma data within zone, output of zone_shp_overlay()
+    :param pandas.DatetimeIndex hours_utc: index of UTC hours.
+    :param int year: year of temperature data
+
+    :return: (*pandas.DataFrame*) temp_df -- hourly zonal values of temperature, wetbulb temperature, and darkness fraction
+    :return: (*pandas.Series*) stats -- zonal population, floor areas and fuel fractions
+    """
+    return zones_data({"zone": puma_data}, hours_utc, year)["zone"]
+
+
+def hourly_load_fit(
+    load_temp_df,
+    plot_boolean,
+    zone_name=None,
+    base_year=const.base_year,
+    output_dir=None,
+):
+    """Fit hourly heating, cooling, and baseload functions to load data. Regressions of
+    the 48 (hour of day, wk/wknd) groups are solved together.
 
     :param pandas.DataFrame load_temp_df: hourly load and temperature data
     :param boolean plot_boolean: whether or not create profile plots.
+    :param str zone_name: name of load zone used to save plots.
+    :param int base_year: data fitting year, used to save plots.
+    :param str output_dir: directory where plots are saved. Defaults to the directory
+        of this module.
 
     :return: (*pandas.DataFrame*) hourly_fits_df -- hourly and week/weekend breakpoints and coefficients for electricity use equations
-    :return: (*float*) s_wb_db, i_wb_db -- slope and intercept of fit between dry and wet bulb temperatures of zone
+    :return: (*numpy.ndarray*) db_wb_fit -- coefficients of the quadratic fit between dry and wet bulb temperatures of zone
     """
+    t_bpc_start = 10
+    t_bph_start = 18.3
+    daily_points = 10
 
-    def make_hourly_series(load_temp_df, i):
-        daily_points = 10
-        result = {}
-        for wk_wknd in ["wk", "wknd"]:
-            if wk_wknd == "wk":
-                load_temp_hr = load_temp_df[
-                    (load_temp_df["hour_local"] == i)
-                    & (load_temp_df["weekday"] < 5)
-                    & ~load_temp_df["holiday"]  # boolean column
-                ].reset_index()
-                numpoints = daily_points * 5
-            elif wk_wknd == "wknd":
-                load_temp_hr = load_temp_df[
-                    (load_temp_df["hour_local"] == i)
-                    & (
-                        (load_temp_df["weekday"] >= 5)
-                        | load_temp_df["holiday"]  # boolean column
-                    )
-                ].reset_index()
-                numpoints = daily_points * 2
-
-            load_temp_hr_heat, t_bpc = bkpt_scale(
-                load_temp_hr, numpoints, t_bpc_start, "heat"
-            )
+    db_wb_regr_df = load_temp_df[load_temp_df["temp_c"] >= t_bpc_start]
 
-            load_temp_hr_cool, t_bph = bkpt_scale(
-                load_temp_hr, numpoints, t_bph_start, "cool"
-            )
+    db_wb_fit = np.polyfit(db_wb_regr_df["temp_c"], db_wb_regr_df["temp_c_wb"], 2)
 
-            lm_heat = sm.OLS(
-                load_temp_hr_heat["load_mw"],
-                np.array(
-                    [
-                        [
-                            load_temp_hr_heat["temp_c"][j],
-                            load_temp_hr_heat["hourly_dark_frac"][j],
-                            1,
-                        ]
-                        for j in range(len(load_temp_hr_heat))
-                    ]
-                ),
-            ).fit()
-
-            s_heat, s_dark, i_heat = (
-                lm_heat.params[0],
-                lm_heat.params[1],
-                lm_heat.params[2],
-            )
-            s_heat_stderr, s_dark_stderr, n_heat, r_squared_heat = (
-                lm_heat.bse[0],
-                lm_heat.bse[1],
-                lm_heat.nobs,
-                lm_heat.rsquared,
-            )
+    temp = load_temp_df["temp_c"].to_numpy(dtype=float)
+    temp_wb = load_temp_df["temp_c_wb"].to_numpy(dtype=float)
+    dark_frac = load_temp_df["hourly_dark_frac"].to_numpy(dtype=float)
+    load = load_temp_df["load_mw"].to_numpy(dtype=float)
+    wb_diff = temp_wb - np.polyval(db_wb_fit, temp)
+    hour = load_temp_df["hour_local"].to_numpy()
+    is_wk = (load_temp_df["weekday"].to_numpy() < 5) & ~load_temp_df[
+        "holiday"
+    ].to_numpy(dtype=bool)
+
+    # Select the points of each group used in the heating and cooling fits
+    groups = [(i, wk_wknd) for i in range(24) for wk_wknd in ["wk", "wknd"]]
+    group_index, heat_index, cool_index, t_bpc, t_bph = [], [], [], [], []
+    for i, wk_wknd in groups:
+        rows = np.flatnonzero((hour == i) & (is_wk if wk_wknd == "wk" else ~is_wk))
+        numpoints = daily_points * (5 if wk_wknd == "wk" else 2)
+        heat, bpc = bkpt_scale(temp[rows], numpoints, t_bpc_start, "heat")
+        cool, bph = bkpt_scale(temp[rows], numpoints, t_bph_start, "cool")
+        group_index.append(rows)
+        heat_index.append(rows[heat])
+        cool_index.append(rows[cool])
+        t_bpc.append(bpc)
+        t_bph.append(bph)
+    group_index, group_mask = _pad_groups(group_index)
+    heat_index, heat_mask = _pad_groups(heat_index)
+    cool_index, cool_mask = _pad_groups(cool_index)
+    t_bpc, t_bph = np.array(t_bpc), np.array(t_bph)
+
+    # Heating: fit load against temperature and dark fraction, dropping regressors
+    # whose slopes have the wrong sign or when dark fraction barely varies
+    def heat_fit(*columns):
+        ones = np.ones(heat_index.shape)
+        x = np.stack([c[heat_index] if c is not None else ones for c in columns], -1)
+        return batch_ols(x, load[heat_index], heat_mask)
+
+    lm_heat = heat_fit(temp, dark_frac, None)
+    s_heat, s_dark, i_heat = lm_heat["params"].T
+    s_heat_stderr, s_dark_stderr = lm_heat["bse"][:, 0], lm_heat["bse"][:, 1]
+    n_heat, r_squared_heat = lm_heat["nobs"], lm_heat["rsquared"]
+
+    refit = s_heat > 0
+    lm_heat = heat_fit(dark_frac, None)
+    s_heat = np.where(refit, 0, s_heat)
+    s_dark = np.where(refit, lm_heat["params"][:, 0], s_dark)
+    i_heat = np.where(refit, lm_heat["params"][:, 1], i_heat)
+
+    dark_frac_heat = np.ma.masked_array(dark_frac[heat_index], ~heat_mask)
+    refit = (s_dark < 0) | (
+        dark_frac_heat.max(axis=1) - dark_frac_heat.min(axis=1) < 0.3
+    ).filled(True)
+    lm_heat = heat_fit(temp, None)
+    s_dark = np.where(refit, 0, s_dark)
+    s_heat = np.where(refit, lm_heat["params"][:, 0], s_heat)
+    i_heat = np.where(refit, lm_heat["params"][:, 1], i_heat)
+    s_heat_stderr = np.where(refit, lm_heat["bse"][:, 0], s_heat_stderr)
+    s_dark_stderr = np.where(refit, 0, s_dark_stderr)
+    n_heat = np.where(refit, lm_heat["nobs"], n_heat)
+    r_squared_heat = np.where(refit, lm_heat["rsquared"], r_squared_heat)
+
+    refit &= s_heat > 0
+    lm_heat = heat_fit(None)
+    s_heat = np.where(refit, 0, s_heat)
+    i_heat = np.where(refit, lm_heat["params"][:, 0], i_heat)
+
+    # Cooling: fit load above heating/baseload against dry and wet bulb temperatures
+    cool_load = load[cool_index] - (
+        (s_heat * t_bph + i_heat)[:, None] + s_dark[:, None] * dark_frac[cool_index]
+    )
+    lm_cool = batch_ols(
+        np.stack(
+            [temp[cool_index], wb_diff[cool_index], np.ones(cool_index.shape)], -1
+        ),
+        cool_load,
+        cool_mask,
+    )
+    s_cool_db, s_cool_wb, i_cool = lm_cool["params"].T
+    s_cool_db_stderr, s_cool_wb_stderr = lm_cool["bse"][:, 0], lm_cool["bse"][:, 1]
+    n_cool, r_squared_cool = lm_cool["nobs"], lm_cool["rsquared"]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t_bph = np.where(-i_cool / s_cool_db > t_bph, -i_cool / s_cool_db, t_bph)
+
+    # Fitted equations and mean relative absolute errors
+    def baseload(index):
+        return s_dark[:, None] * dark_frac[index] + i_heat[:, None]
+
+    def cool_eng(index, t):
+        return (
+            t * s_cool_db[:, None]
+            + wb_diff[index] * s_cool_wb[:, None]
+            + i_cool[:, None]
+        )
 
-            if s_heat > 0:
-                lm_heat = sm.OLS(
-                    load_temp_hr_heat["load_mw"],
-                    np.array(
-                        [
-                            [load_temp_hr_heat["hourly_dark_frac"][j], 1]
-                            for j in range(len(load_temp_hr_heat))
-                        ]
-                    ),
-                ).fit()
-
-                s_heat, s_dark, i_heat = (0, lm_heat.params[0], lm_heat.params[1])
-
-            if (
-                s_dark < 0
-                or (
-                    max(load_temp_hr_heat["hourly_dark_frac"])
-                    - min(load_temp_hr_heat["hourly_dark_frac"])
-                )
-                < 0.3
-            ):
-                lm_heat = sm.OLS(
-                    load_temp_hr_heat["load_mw"],
-                    np.array(
-                        [
-                            [load_temp_hr_heat["temp_c"][j], 1]
-                            for j in range(len(load_temp_hr_heat))
-                        ]
-                    ),
-                ).fit()
-
-                s_dark, s_heat, i_heat = (0, lm_heat.params[0], lm_heat.params[1])
-                s_heat_stderr, s_dark_stderr, n_heat, r_squared_heat = (
-                    lm_heat.bse[0],
-                    0,
-                    lm_heat.nobs,
-                    lm_heat.rsquared,
-                )
+    def mrae(eqn, index, mask):
+        return _masked_mean(np.abs(eqn - load[index]) / load[index], mask)
 
-                if s_heat > 0:
-                    lm_heat = sm.OLS(
-                        load_temp_hr_heat["load_mw"],
-                        np.array([[1] for j in range(len(load_temp_hr_heat))]),
-                    ).fit()
-                    s_dark, s_heat, i_heat = (0, 0, lm_heat.params[0])
-
-            load_temp_hr_cool["cool_load_mw"] = [
-                load_temp_hr_cool["load_mw"][j]
-                - (s_heat * t_bph + i_heat)
-                - s_dark * load_temp_hr_cool["hourly_dark_frac"][j]
-                for j in range(len(load_temp_hr_cool))
-            ]
-
-            load_temp_hr_cool["temp_c_wb_diff"] = load_temp_hr_cool["temp_c_wb"] - (
-                db_wb_fit[0] * load_temp_hr_cool["temp_c"] ** 2
-                + db_wb_fit[1] * load_temp_hr_cool["temp_c"]
-                + db_wb_fit[2]
-            )
+    heat_eqn = temp[heat_index] * s_heat[:, None] + baseload(heat_index)
 
-            lm_cool = sm.OLS(
-                load_temp_hr_cool["cool_load_mw"],
-                np.array(
-                    [
-                        [
-                            load_temp_hr_cool["temp_c"][i],
-                            load_temp_hr_cool["temp_c_wb_diff"][i],
-                            1,
-                        ]
-                        for i in range(len(load_temp_hr_cool))
-                    ]
-                ),
-            ).fit()
-
-            s_cool_db, s_cool_wb, i_cool = (
-                lm_cool.params[0],
-                lm_cool.params[1],
-                lm_cool.params[2],
-            )
+    cool_plot_mask = cool_mask & (temp[cool_index] >= t_bph[:, None])
+    cool_eqn = (
+        np.maximum(cool_eng(cool_index, temp[cool_index]), 0)
+        + (t_bph * s_heat)[:, None]
+        + baseload(cool_index)
+    )
 
-            s_cool_db_stderr = lm_cool.bse[0]
-            s_cool_wb_stderr = lm_cool.bse[1]
-            n_cool = lm_cool.nobs
-            r_squared_cool = lm_cool.rsquared
-
-            t_bph = -i_cool / s_cool_db if -i_cool / s_cool_db > t_bph else t_bph
-
-            #
-            if wk_wknd == "wk":
-                wk_graph = load_temp_df[
-                    (load_temp_df["hour_local"] == i)
-                    & (load_temp_df["weekday"] < 5)
-                    & ~load_temp_df["holiday"]  # boolean column
-                ]
-            else:
-                wk_graph = load_temp_df[
-                    (load_temp_df["hour_local"] == i)
-                    & (
-                        (load_temp_df["weekday"] >= 5)
-                        | load_temp_df["holiday"]  # boolean column
-                    )
-                ]
-
-            load_temp_hr_cool_func = wk_graph[
-                (wk_graph["temp_c"] < t_bph) & (wk_graph["temp_c"] > t_bpc)
-            ].reset_index()
-
-            heat_eqn = (
-                load_temp_hr_heat["temp_c"] * s_heat
-                + load_temp_hr_heat["hourly_dark_frac"] * s_dark
-                + i_heat
+    temp_group = temp[group_index]
+    cool_func_mask = (
+        group_mask & (temp_group < t_bph[:, None]) & (temp_group > t_bpc[:, None])
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cool_func_eqn = (
+            np.maximum(
+                ((temp_group - t_bpc[:, None]) / (t_bph - t_bpc)[:, None]) ** 2
+                * cool_eng(group_index, t_bph[:, None]),
+                0,
             )
-            load_temp_hr_cool_plot = load_temp_hr_cool[
-                load_temp_hr_cool["temp_c"] >= t_bph
-            ]
-            load_temp_hr_cool_plot = load_temp_hr_cool_plot.reset_index(drop=True)
-
-            cool_eqn = [
-                max(
-                    load_temp_hr_cool_plot["temp_c"][i] * s_cool_db
-                    + (
-                        load_temp_hr_cool_plot["temp_c_wb"][i]
-                        - (
-                            db_wb_fit[0] * load_temp_hr_cool_plot["temp_c"][i] ** 2
-                            + db_wb_fit[1] * load_temp_hr_cool_plot["temp_c"][i]
-                            + db_wb_fit[2]
-                        )
-                    )
-                    * s_cool_wb
-                    + i_cool,
-                    0,
-                )
-                + t_bph * s_heat
-                + load_temp_hr_cool_plot["hourly_dark_frac"][i] * s_dark
-                + i_heat
-                for i in range(len(load_temp_hr_cool_plot))
-            ]
-            cool_func_eqn = [
-                max(
-                    ((load_temp_hr_cool_func["temp_c"][i] - t_bpc) / (t_bph - t_bpc))
-                    ** 2
-                    * (
-                        t_bph * s_cool_db
-                        + (
-                            load_temp_hr_cool_func["temp_c_wb"][i]
-                            - (
-                                db_wb_fit[0] * load_temp_hr_cool_func["temp_c"][i] ** 2
-                                + db_wb_fit[1] * load_temp_hr_cool_func["temp_c"][i]
-                                + db_wb_fit[2]
-                            )
-                        )
-                        * s_cool_wb
-                        + i_cool
-                    ),
-                    0,
-                )
-                + load_temp_hr_cool_func["temp_c"][i] * s_heat
-                + load_temp_hr_cool_func["hourly_dark_frac"][i] * s_dark
-                + i_heat
-                for i in range(len(load_temp_hr_cool_func))
-            ]
-
-            # Generate hourly fit plot
-            if plot_boolean:
-                plt.rcParams.update({"font.size": 20})
-                fig, ax = plt.subplots(figsize=(20, 10))
-
-                plt.scatter(wk_graph["temp_c"], wk_graph["load_mw"], color="black")
-
-                plt.scatter(load_temp_hr_heat["temp_c"], heat_eqn, color="red")
-                plt.scatter(load_temp_hr_cool_plot["temp_c"], cool_eqn, color="blue")
-                plt.scatter(
-                    load_temp_hr_cool_func["temp_c"], cool_func_eqn, color="green"
-                )
+            + temp_group * s_heat[:, None]
+            + baseload(group_index)
+        )
 
-                plt.title(
-                    f"zone {zone_name}, hour {i}, {wk_wknd} \n t_bpc = "
-                    + str(round(t_bpc, 2))
-                    + "  t_bph = "
-                    + str(round(t_bph, 2))
-                )
-                plt.xlabel("Temp (°C)")
-                plt.ylabel("Load (MW)")
-                os.makedirs(
-                    os.path.join(
-                        os.path.dirname(__file__), "dayhour_fits", "dayhour_fits_graphs"
-                    ),
-                    exist_ok=True,
-                )
-                plt.savefig(
-                    os.path.join(
-                        os.path.dirname(__file__),
-                        "dayhour_fits",
-                        "dayhour_fits_graphs",
-                        f"{zone_name}_hour_{i}_{wk_wknd}_{base_year}.png",
-                    )
-                )
+    mrae_heat = mrae(heat_eqn, heat_index, heat_mask)
+    mrae_cool = mrae(cool_eqn, cool_index, cool_plot_mask)
+    mrae_cool_func = mrae(cool_func_eqn, group_index, cool_func_mask)
 
-            mrae_heat = np.mean(
-                [
-                    np.abs(heat_eqn[i] - load_temp_hr_heat["load_mw"][i])
-                    / load_temp_hr_heat["load_mw"][i]
-                    for i in range(len(load_temp_hr_heat))
-                ]
+    # Generate hourly fit plots
+    if plot_boolean:
+        graphs_dir = os.path.join(
+            os.path.dirname(__file__) if output_dir is None else output_dir,
+            "dayhour_fits",
+            "dayhour_fits_graphs",
+        )
+        os.makedirs(graphs_dir, exist_ok=True)
+        for g, (i, wk_wknd) in enumerate(groups):
+            plt.rcParams.update({"font.size": 20})
+            fig, ax = plt.subplots(figsize=(20, 10))
+
+            plt.scatter(
+                temp_group[g][group_mask[g]],
+                load[group_index[g]][group_mask[g]],
+                color="black",
             )
-            mrae_cool = np.mean(
-                [
-                    np.abs(cool_eqn[i] - load_temp_hr_cool_plot["load_mw"][i])
-                    / load_temp_hr_cool_plot["load_mw"][i]
-                    for i in range(len(load_temp_hr_cool_plot))
-                ]
+
+            plt.scatter(
+                temp[heat_index[g]][heat_mask[g]],
+                heat_eqn[g][heat_mask[g]],
+                color="red",
             )
-            mrae_cool_func = np.mean(
-                [
-                    np.abs(cool_func_eqn[i] - load_temp_hr_cool_func["load_mw"][i])
-                    / load_temp_hr_cool_func["load_mw"][i]
-                    for i in range(len(load_temp_hr_cool_func))
-                ]
+            plt.scatter(
+                temp[cool_index[g]][cool_plot_mask[g]],
+                cool_eqn[g][cool_plot_mask[g]],
+                color="blue",
+            )
+            plt.scatter(
+                temp_group[g][cool_func_mask[g]],
+                cool_func_eqn[g][cool_func_mask[g]],
+                color="green",
             )
 
-            result[wk_wknd] = {
-                f"t.bpc.{wk_wknd}.c": t_bpc,
-                f"t.bph.{wk_wknd}.c": t_bph,
-                f"i.heat.{wk_wknd}": i_heat,
-                f"s.heat.{wk_wknd}": s_heat,
-                f"s.dark.{wk_wknd}": s_dark,
-                f"i.cool.{wk_wknd}": i_cool,
-                f"s.cool.{wk_wknd}.db": s_cool_db,
-                f"s.cool.{wk_wknd}.wb": s_cool_wb,
-                f"s.heat.stderr.{wk_wknd}": s_heat_stderr,
-                f"s.dark.stderr.{wk_wknd}": s_dark_stderr,
-                f"n.heat.{wk_wknd}": n_heat,
-                f"s.cool.db.stderr.{wk_wknd}": s_cool_db_stderr,
-                f"s.cool.wb.stderr.{wk_wknd}": s_cool_wb_stderr,
-                f"n.cool.{wk_wknd}": n_cool,
-                f"mrae.heat.{wk_wknd}.mw": mrae_heat,
-                f"mrae.cool.{wk_wknd}.mw": mrae_cool,
-                f"mrae.mid.{wk_wknd}.mw": mrae_cool_func,
-                f"r2.heat.{wk_wknd}": r_squared_heat,
-                f"r2.cool.{wk_wknd}": r_squared_cool,
-            }
-
-        return pd.Series({**result["wk"], **result["wknd"]})
-
-    t_bpc_start = 10
-    t_bph_start = 18.3
-
-    db_wb_regr_df = load_temp_df[load_temp_df["temp_c"] >= t_bpc_start]
-
-    db_wb_fit = np.polyfit(db_wb_regr_df["temp_c"], db_wb_regr_df["temp_c_wb"], 2)
-
+            plt.title(
+                f"zone {zone_name}, hour {i}, {wk_wknd} \n t_bpc = "
+                + str(round(t_bpc[g], 2))
+                + "  t_bph = "
+                + str(round(t_bph[g], 2))
+            )
+            plt.xlabel("Temp (°C)")
+            plt.ylabel("Load (MW)")
+            plt.savefig(
+                os.path.join(
+                    graphs_dir, f"{zone_name}_hour_{i}_{wk_wknd}_{base_year}.png"
+                )
+            )
+            plt.close(fig)
+
+    results = {
+        "t.bpc.{}.c": t_bpc,
+        "t.bph.{}.c": t_bph,
+        "i.heat.{}": i_heat,
+        "s.heat.{}": s_heat,
+        "s.dark.{}": s_dark,
+        "i.cool.{}": i_cool,
+        "s.cool.{}.db": s_cool_db,
+        "s.cool.{}.wb": s_cool_wb,
+        "s.heat.stderr.{}": s_heat_stderr,
+        "s.dark.stderr.{}": s_dark_stderr,
+        "n.heat.{}": n_heat,
+        "s.cool.db.stderr.{}": s_cool_db_stderr,
+        "s.cool.wb.stderr.{}": s_cool_wb_stderr,
+        "n.cool.{}": n_cool,
+        "mrae.heat.{}.mw": mrae_heat,
+        "mrae.cool.{}.mw": mrae_cool,
+        "mrae.mid.{}.mw": mrae_cool_func,
+        "r2.heat.{}": r_squared_heat,
+        "r2.cool.{}": r_squared_cool,
+    }
+    # Groups alternate between wk and wknd
     hourly_fits_df = pd.DataFrame(
-        [make_hourly_series(load_temp_df, i) for i in range(24)]
+        {
+            k.format(wk_wknd): v[j::2]
+            for j, wk_wknd in enumerate(["wk", "wknd"])
+            for k, v in results.items()
+        }
     )
 
     return hourly_fits_df, db_wb_fit
@@ -651,12 +481,98 @@ def temp_to_energy(temp_series, hourly_fits_df, db_wb_fit):
     return [base_eng, heat_eng, max(cool_eng, 0) + max(mid_cool_eng, 0)]
 
 
-def plot_profile(profile, actual, plot_boolean):
+def get_hourly_fit_coefficients(temp_df, hourly_fits_df):
+    """Gather fit coefficients for all hours of the year by local hour of day and
+    wk/wknd type.
+
+    :param pandas.DataFrame temp_df: hourly data with *'hour_local'*, *'weekday'* and
+        *'holiday'* columns.
+    :param pandas.DataFrame hourly_fits_df: hourly and week/weekend breakpoints and
+        coefficients for electricity use equations.
+    :return: (*dict*) -- keys are coefficient names, i.e. *'t_bpc'*, *'t_bph'*,
+        *'i_heat'*, *'s_heat'*, *'s_dark'*, *'i_cool'*, *'s_cool_db'* and
+        *'s_cool_wb'*, values are arrays of coefficients for each hour.
+    """
+    zone_hour = temp_df["hour_local"].to_numpy()
+    is_wk = (temp_df["weekday"].to_numpy() < 5) & ~temp_df["holiday"].to_numpy(
+        dtype=bool
+    )
+    columns = {
+        "t_bpc": "t.bpc.{}.c",
+        "t_bph": "t.bph.{}.c",
+        "i_heat": "i.heat.{}",
+        "s_heat": "s.heat.{}",
+        "s_dark": "s.dark.{}",
+        "i_cool": "i.cool.{}",
+        "s_cool_db": "s.cool.{}.db",
+        "s_cool_wb": "s.cool.{}.wb",
+    }
+    return {
+        k: np.where(
+            is_wk,
+            hourly_fits_df.loc[zone_hour, v.format("wk")].to_numpy(dtype=float),
+            hourly_fits_df.loc[zone_hour, v.format("wknd")].to_numpy(dtype=float),
+        )
+        for k, v in columns.items()
+    }
+
+
+def calculate_energy(temp_df, hourly_fits_df, db_wb_fit, coef=None):
+    """Compute baseload, heating, and cooling electricity for all hours at once. This
+    is the batched equivalent of :func:`temp_to_energy`.
+
+    :param pandas.DataFrame temp_df: hourly data as returned by :func:`zonal_data`.
+    :param pandas.DataFrame hourly_fits_df: hourly and week/weekend breakpoints and
+        coefficients for electricity use equations.
+    :param numpy.ndarray db_wb_fit: coefficients of the quadratic fit between dry and
+        wet bulb temperatures of zone.
+    :param dict coef: coefficients gathered by :func:`get_hourly_fit_coefficients`.
+        Computed from ``temp_df`` and ``hourly_fits_df`` if None.
+    :return: (*numpy.ndarray*) -- (hours x 3) array of baseload, heating and cooling.
+    """
+    if coef is None:
+        coef = get_hourly_fit_coefficients(temp_df, hourly_fits_df)
+    temp = temp_df["temp_c"].to_numpy(dtype=float)
+    temp_wb = temp_df["temp_c_wb"].to_numpy(dtype=float)
+    dark_frac = temp_df["hourly_dark_frac"].to_numpy(dtype=float)
+    t_bpc, t_bph = coef["t_bpc"], coef["t_bph"]
+
+    base_eng = coef["s_heat"] * t_bph + coef["s_dark"] * dark_frac + coef["i_heat"]
+    heat_eng = np.where(temp <= t_bph, -coef["s_heat"] * (t_bph - temp), 0)
+
+    wb_diff = coef["s_cool_wb"] * (temp_wb - np.polyval(db_wb_fit, temp))
+    cool_eng = np.where(
+        temp >= t_bph, coef["s_cool_db"] * temp + wb_diff + coef["i_cool"], 0
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mid_cool_eng = np.where(
+            (temp > t_bpc) & (temp < t_bph),
+            ((temp - t_bpc) / (t_bph - t_bpc)) ** 2
+            * (coef["s_cool_db"] * t_bph + wb_diff + coef["i_cool"]),
+            0,
+        )
+
+    return np.column_stack(
+        [
+            base_eng,
+            heat_eng,
+            np.maximum(cool_eng, 0) + np.maximum(mid_cool_eng, 0),
+        ]
+    )
+
+
+def plot_profile(
+    profile, actual, plot_boolean, zone_name=None, year=None, output_dir=None
+):
     """Plot profile vs. actual load
 
     :param pandas.Series profile: total profile hourly load
     :param pandas.Series actual: zonal hourly load data
     :param boolean plot_boolean: whether or not create profile plots.
+    :param str zone_name: name of load zone used to save plot.
+    :param int year: profile year, used to save plot.
+    :param str output_dir: directory where plot is saved. Defaults to the directory
+        of this module.
 
     :return: (*plot*)
     """
@@ -685,18 +601,14 @@ def plot_profile(profile, actual, plot_boolean):
             + str(round(np.mean(profile), 2))
             + " MW"
         )
-        os.makedirs(
-            os.path.join(os.path.dirname(__file__), "Profiles", "Profiles_graphs"),
-            exist_ok=True,
-        )
-        plt.savefig(
-            os.path.join(
-                os.path.dirname(__file__),
-                "Profiles",
-                "Profiles_graphs",
-                f"{zone_name}_profile_{year}.png",
-            )
+        graphs_dir = os.path.join(
+            os.path.dirname(__file__) if output_dir is None else output_dir,
+            "Profiles",
+            "Profiles_graphs",
         )
+        os.makedirs(graphs_dir, exist_ok=True)
+        plt.savefig(os.path.join(graphs_dir, f"{zone_name}_profile_{year}.png"))
+        plt.close(fig)
 
     return (
         mrae_avg,
@@ -709,7 +621,15 @@ def plot_profile(profile, actual, plot_boolean):
     )
 
 
-def main(zone_name, zone_name_shp, base_year, year, plot_boolean=False):
+def main(
+    zone_name,
+    zone_name_shp,
+    base_year,
+    year,
+    plot_boolean=False,
+    puma_data_zone=None,
+    output_dir=None,
+):
     """Run profile generator for one zone for one year.
 
     :param str zone_name: name of load zone used to save profile.
@@ -717,7 +637,14 @@ def main(zone_name, zone_name_shp, base_year, year, plot_boolean=False):
     :param int base_year: data fitting year.
     :param int year: profile year to calculate.
     :param boolean plot_boolean: whether or not create profile plots.
+    :param pandas.DataFrame puma_data_zone: puma data within zone, output of
+        zone_shp_overlay(). Computed from the zone and puma shape files if None.
+    :param str output_dir: directory where fits, profiles and stats are saved.
+        Defaults to the directory of this module.
+    :return: (*list*) -- paths of the csv files written.
     """
+    if output_dir is None:
+        output_dir = os.path.dirname(__file__)
 
     zone_load = pd.read_csv(
         f"https://besciences.blob.core.windows.net/datasets/bldg_el/zone_loads_{year}/{zone_name}_demand_{year}_UTC.csv"
@@ -731,7 +658,8 @@ def main(zone_name, zone_name_shp, base_year, year, plot_boolean=False):
         start=f"{year}-01-01", end=f"{year+1}-01-01", freq="H", tz="UTC"
     )[:-1]
 
-    puma_data_zone = zone_shp_overlay(zone_name_shp, zone_shp, pumas_shp)
+    if puma_data_zone is None:
+        puma_data_zone = zone_shp_overlay(zone_name_shp, zone_shp, pumas_shp)
 
     temp_df_base_year, stats_base_year = zonal_data(
         puma_data_zone, hours_utc_base_year, year
@@ -739,15 +667,14 @@ def main(zone_name, zone_name_shp, base_year, year, plot_boolean=False):
 
     temp_df_base_year["load_mw"] = zone_load
 
-    hourly_fits_df, db_wb_fit = hourly_load_fit(temp_df_base_year, plot_boolean)
-    os.makedirs(os.path.join(os.path.dirname(__file__), "dayhour_fits"), exist_ok=True)
-    hourly_fits_df.to_csv(
-        os.path.join(
-            os.path.dirname(__file__),
-            "dayhour_fits",
-            f"{zone_name}_dayhour_fits_{base_year}.csv",
-        )
+    hourly_fits_df, db_wb_fit = hourly_load_fit(
+        temp_df_base_year, plot_boolean, zone_name, base_year, output_dir
     )
+    os.makedirs(os.path.join(output_dir, "dayhour_fits"), exist_ok=True)
+    fits_path = os.path.join(
+        output_dir, "dayhour_fits", f"{zone_name}_dayhour_fits_{base_year}.csv"
+    )
+    hourly_fits_df.to_csv(fits_path)
 
     zone_profile_load_MWh = pd.DataFrame(  # noqa: N806
         {"hour_utc": list(range(len(hours_utc)))}
@@ -755,29 +682,19 @@ def main(zone_name, zone_name_shp, base_year, year, plot_boolean=False):
 
     temp_df, stats = zonal_data(puma_data_zone, hours_utc, year)
 
-    energy_list = zone_profile_load_MWh.hour_utc.apply(
-        lambda x: temp_to_energy(temp_df.loc[x], hourly_fits_df, db_wb_fit)
-    )
+    energy = calculate_energy(temp_df, hourly_fits_df, db_wb_fit)
     (
         zone_profile_load_MWh["base_load_mw"],
         zone_profile_load_MWh["heat_load_mw"],
         zone_profile_load_MWh["cool_load_mw"],
         zone_profile_load_MWh["total_load_mw"],
-    ) = (
-        energy_list.apply(lambda x: x[0]),
-        energy_list.apply(lambda x: x[1]),
-        energy_list.apply(lambda x: x[2]),
-        energy_list.apply(lambda x: sum(x)),
-    )
+    ) = (energy[:, 0], energy[:, 1], energy[:, 2], energy.sum(axis=1))
     zone_profile_load_MWh.set_index("hour_utc", inplace=True)
-    os.makedirs(os.path.join(os.path.dirname(__file__), "Profiles"), exist_ok=True)
-    zone_profile_load_MWh.to_csv(
-        os.path.join(
-            os.path.dirname(__file__),
-            "Profiles",
-            f"{zone_name}_profile_load_mw_{year}.csv",
-        )
+    os.makedirs(os.path.join(output_dir, "Profiles"), exist_ok=True)
+    profile_path = os.path.join(
+        output_dir, "Profiles", f"{zone_name}_profile_load_mw_{year}.csv"
     )
+    zone_profile_load_MWh.to_csv(profile_path)
 
     (
         stats["mrae_avg_%"],
@@ -787,20 +704,99 @@ def main(zone_name, zone_name_shp, base_year, year, plot_boolean=False):
         stats["avg_actual_load_mw"],
         stats["max_profile_load_mw"],
         stats["max_actual_load_mw"],
-    ) = plot_profile(zone_profile_load_MWh["total_load_mw"], zone_load, plot_boolean)
+    ) = plot_profile(
+        zone_profile_load_MWh["total_load_mw"],
+        zone_load,
+        plot_boolean,
+        zone_name,
+        year,
+        output_dir,
+    )
 
-    os.makedirs(
-        os.path.join(os.path.dirname(__file__), "Profiles", "Profiles_stats"),
-        exist_ok=True,
+    os.makedirs(os.path.join(output_dir, "Profiles", "Profiles_stats"), exist_ok=True)
+    stats_path = os.path.join(
+        output_dir, "Profiles", "Profiles_stats", f"{zone_name}_stats_{year}.csv"
     )
-    stats.to_csv(
-        os.path.join(
-            os.path.dirname(__file__),
-            "Profiles",
-            "Profiles_stats",
-            f"{zone_name}_stats_{year}.csv",
+    stats.to_csv(stats_path)
+
+    return [fits_path, profile_path, stats_path]
+
+
+def run_zones(
+    zone_names,
+    zone_name_shps,
+    zone_shp,
+    pumas_shp,
+    base_year,
+    year,
+    output_dir,
+    plot_boolean=False,
+    max_workers=None,
+    cache_dir=None,
+):
+    """Run profile generator for several zones in parallel. The puma overlay of all
+    zones is computed once and the weather data of all the states involved are
+    fetched once into the local cache, from which the processes read them.
+
+    :param list zone_names: names of load zones used to save profiles.
+    :param list zone_name_shps: names of load zones within shapefile.
+    :param geopandas.GeoDataFrame zone_shp: geo data frame of zone(BA) shape file.
+    :param geopandas.GeoDataFrame pumas_shp: geo data frame of pumas shape file.
+    :param int base_year: data fitting year.
+    :param int year: profile year to calculate.
+    :param str output_dir: directory where fits, profiles, stats and the run manifest
+        are saved.
+    :param boolean plot_boolean: whether or not create profile plots.
+    :param int max_workers: number of processes. Defaults to the number of processors
+        on the machine.
+    :param str cache_dir: location of the weather data cache used for the run. Defaults
+        to the cache of the configured access layer, see
+        :func:`weather_data.set_weather_data`, or to *weather_cache* in ``output_dir``
+        if caching is disabled there.
+    :return: (*pandas.DataFrame*) -- run manifest, see :func:`helper.run_batch`.
+    """
+    puma_data_zones = zones_shp_overlay(zone_name_shps, zone_shp, pumas_shp)
+
+    configured = get_weather_data()
+    if cache_dir is None and configured.cache_dir is False:
+        cache_dir = os.path.join(output_dir, "weather_cache")
+    if cache_dir is None or cache_dir == configured.cache_dir:
+        weather_data = configured
+    else:
+        # Tasks run in this process when max_workers is 1, use the cache here as well
+        weather_data = set_weather_data(cache_dir, configured.source)
+
+    try:
+        states = set().union(*[set(p["state"]) for p in puma_data_zones.values()])
+        weather_data.prefetch(
+            sorted(states),
+            sorted({base_year, year}),
+            variables=("temps", "temps_wetbulb", "dark_frac"),
         )
-    )
+
+        tasks = {
+            zone_name: {
+                "zone_name": zone_name,
+                "zone_name_shp": zone_name_shp,
+                "base_year": base_year,
+                "year": year,
+                "plot_boolean": plot_boolean,
+                "puma_data_zone": puma_data_zones[zone_name_shp],
+                "output_dir": output_dir,
+            }
+            for zone_name, zone_name_shp in zip(zone_names, zone_name_shps)
+        }
+        return run_batch(
+            main,
+            tasks,
+            output_dir,
+            max_workers=max_workers,
+            initializer=set_weather_data,
+            initargs=(weather_data.cache_dir, weather_data.source),
+        )
+    finally:
+        if weather_data is not configured:
+            set_weather_data(configured.cache_dir, configured.source)
 
 
 if __name__ == "__main__":
@@ -821,9 +817,19 @@ if __name__ == "__main__":
     # If produce profile plots
     plot_boolean = False
 
-    for i in range(len(zone_names)):
-        zone_name, zone_name_shp = zone_names[i], zone_name_shps[i]
-        main(zone_name, zone_name_shp, base_year, year, plot_boolean)
+    # Directory to save fits, profiles, stats and run manifest
+    output_dir = os.path.dirname(__file__)
+
+    run_zones(
+        zone_names,
+        zone_name_shps,
+        zone_shp,
+        pumas_shp,
+        base_year,
+        year,
+        output_dir,
+        plot_boolean,
+    )
 
     # Delete the tmp folder that holds the shapefiles localy after the script is run to completion
     shutil.rmtree(os.path.join("tmp"), ignore_errors=False, onerror=None)
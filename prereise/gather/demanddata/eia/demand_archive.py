@@ -0,0 +1,159 @@
+import json
+import os
+
+import pandas as pd
+
+
+def _to_utc(timestamps):
+    """Convert timestamps to UTC, naive timestamps being interpreted as UTC.
+
+    :param pandas.Timestamp/pandas.DatetimeIndex timestamps: timestamps.
+    :return: (*pandas.Timestamp/pandas.DatetimeIndex*) -- UTC timestamps.
+    """
+    return (
+        timestamps.tz_localize("UTC")
+        if timestamps.tzinfo is None
+        else timestamps.tz_convert("UTC")
+    )
+
+
+def get_partition_path(archive_dir, ba, year):
+    """Return the location of the file storing the demand of a BA for a given year.
+
+    :param str archive_dir: location of the archive.
+    :param str ba: balancing authority.
+    :param int year: year.
+    :return: (*str*) -- path to the partition file.
+    """
+    return os.path.join(archive_dir, f"ba={ba}", f"year={year}", "demand.parquet")
+
+
+def to_archive(demand, archive_dir):
+    """Store demand profiles in a local archive partitioned by balancing authority
+    (BA) and year. Profiles are stored in UTC as float32 in Parquet files. Existing
+    partitions are updated, new values taking precedence over archived ones.
+
+    :param pandas.DataFrame demand: data frame with timestamps as indices and BA
+        names as column names, e.g. as returned by
+        :func:`prereise.gather.demanddata.eia.get_eia_data.from_excel`. Naive
+        timestamps are interpreted as UTC.
+    :param str archive_dir: location of the archive.
+    """
+    index = _to_utc(pd.DatetimeIndex(demand.index))
+    for ba in demand.columns:
+        profile = pd.Series(demand[ba].values, index=index, dtype="float32").dropna()
+        for year, data in profile.groupby(profile.index.year):
+            filename = get_partition_path(archive_dir, ba, year)
+            data = data.rename("demand").rename_axis("utc").to_frame()
+            if os.path.isfile(filename):
+                data = data.combine_first(
+                    pd.read_parquet(filename).set_index("utc")
+                ).astype("float32")
+            os.makedirs(os.path.dirname(filename), exist_ok=True)
+            data.sort_index().reset_index().to_parquet(filename, index=False)
+
+
+def excel_to_archive(directory, ba_list, archive_dir):
+    """Ingest pre-downloaded EIA-930 Excel spreadsheets in the local archive.
+
+    :param str directory: location of Excel files.
+    :param list ba_list: list of BA initials, e.g., ['PSE',BPAT','CISO'].
+    :param str archive_dir: location of the archive.
+    """
+    for ba in ba_list:
+        print(ba)
+        df = pd.read_excel(
+            io=os.path.join(directory, ba + ".xlsx"), header=0, usecols="B,U"
+        )
+        df = df.set_index(pd.to_datetime(df["UTC Time"])).drop(columns=["UTC Time"])
+        to_archive(df.rename(columns={"Published D": ba}), archive_dir)
+
+
+def csv_to_archive(filename, archive_dir):
+    """Ingest an EIA-930 balance CSV file in the local archive.
+
+    :param str filename: path to the CSV file, e.g. *EIA930_BALANCE_2020_Jan_Jun.csv*.
+    :param str archive_dir: location of the archive.
+    """
+    df = pd.read_csv(
+        filename,
+        usecols=["Balancing Authority", "UTC Time at End of Hour", "Demand (MW)"],
+        thousands=",",
+    )
+    df["UTC Time at End of Hour"] = pd.to_datetime(df["UTC Time at End of Hour"])
+    to_archive(
+        df.pivot_table(
+            index="UTC Time at End of Hour",
+            columns="Balancing Authority",
+            values="Demand (MW)",
+        ),
+        archive_dir,
+    )
+
+
+def json_to_archive(filename, archive_dir):
+    """Ingest demand series downloaded from the EIA API in the local archive.
+
+    :param str filename: path to a JSON file as returned by the EIA API, e.g. by
+        :meth:`prereise.gather.demanddata.eia.get_eia_data.EIAgov.raw`.
+    :param str archive_dir: location of the archive.
+    """
+    with open(filename) as f:
+        raw = json.load(f)
+
+    for series in raw["series"]:
+        ba = series["series_id"].replace("EBA.", "").replace("-ALL.D.H", "")
+        dates, values = zip(*series["data"])
+        to_archive(
+            pd.DataFrame(
+                {ba: pd.to_numeric(values)},
+                index=pd.to_datetime(dates, format="%Y%m%dT%HZ", utc=True),
+            ),
+            archive_dir,
+        )
+
+
+def from_archive(archive_dir, ba_list, start_date, end_date):
+    """Assemble demand of balancing authorities (BA) from the local archive. Only the
+    partitions and row groups overlapping the query are read.
+
+    :param str archive_dir: location of the archive.
+    :param list ba_list: list of BA initials, e.g., ['PSE',BPAT','CISO'].
+    :param pandas.Timestamp/numpy.datetime64/datetime.datetime start_date: desired
+        start of dataset. Naive timestamps are interpreted as UTC.
+    :param pandas.Timestamp/numpy.datetime64/datetime.datetime end_date: desired
+        end of dataset (inclusive). Naive timestamps are interpreted as UTC.
+    :return: (*pandas.DataFrame*) -- data frame with hourly UTC timestamps as indices
+        and BA names as column names. Missing hours are filled with NaN.
+    """
+    start, end = _to_utc(pd.Timestamp(start_date)), _to_utc(pd.Timestamp(end_date))
+    timespan = pd.date_range(start, end, freq="H")
+
+    available = [
+        ba for ba in ba_list if os.path.isdir(os.path.join(archive_dir, f"ba={ba}"))
+    ]
+    missing = set(ba_list) - set(available)
+    if len(missing) > 0:
+        print(f"No archived demand for {', '.join(sorted(missing))}")
+    if len(available) == 0:
+        return pd.DataFrame(index=timespan, columns=ba_list, dtype="float32")
+
+    df = pd.read_parquet(
+        archive_dir,
+        engine="pyarrow",
+        columns=["ba", "utc", "demand"],
+        filters=[
+            ("ba", "in", available),
+            ("year", ">=", start.year),
+            ("year", "<=", end.year),
+            ("utc", ">=", start),
+            ("utc", "<=", end),
+        ],
+        memory_map=True,
+    )
+    df["ba"] = df["ba"].astype(str)
+    demand = df.pivot(index="utc", columns="ba", values="demand")
+
+    return demand.reindex(index=timespan, columns=ba_list).rename_axis(
+        index=None, columns=None
+    )
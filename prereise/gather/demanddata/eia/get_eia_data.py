@@ -6,6 +6,8 @@ from urllib.request import urlopen
 import pandas as pd
 from pandas.tseries.offsets import DateOffset
 
+from prereise.gather.demanddata.eia import demand_archive
+
 
 def from_download(tok, start_date, end_date, offset_days, series_list):
     """Download and assemble dataset of demand data per balancing authority for desired
@@ -37,7 +39,7 @@ def from_download(tok, start_date, end_date, offset_days, series_list):
     return df_all
 
 
-def from_excel(directory, series_list, start_date, end_date):
+def from_excel(directory, series_list, start_date, end_date, archive_dir=None):
     """Assemble EIA balancing authority (BA) data from pre-downloaded Excel
     spreadsheets. The spreadsheets contain data from July 2015 to present.
 
@@ -45,9 +47,18 @@ def from_excel(directory, series_list, start_date, end_date):
     :param list series_list: list of BA initials, e.g., ['PSE',BPAT','CISO'].
     :param datetime.datetime start_date: desired start of dataset.
     :param datetime.datetime end_date: desired end of dataset.
+    :param str archive_dir: location of a local archive, see
+        :mod:`prereise.gather.demanddata.eia.demand_archive`. If given, spreadsheets of
+        BAs missing from the archive are ingested once and the data are then read from
+        the archive instead of the spreadsheets. Defaults to None.
     :return: (*pandas.DataFrame*) -- data frame with UTC timestamp as indices and
         BA series name as column names.
     """
+    if archive_dir is not None:
+        return _from_excel_archive(
+            directory, series_list, start_date, end_date, archive_dir
+        )
+
     timespan = pd.date_range(start_date, end_date, freq="H")
     df_all = pd.DataFrame(index=timespan)
 
@@ -67,6 +78,39 @@ def from_excel(directory, series_list, start_date, end_date):
     return df_all
 
 
+def _from_excel_archive(directory, series_list, start_date, end_date, archive_dir):
+    """Assemble EIA balancing authority (BA) data as :func:`from_excel` through a local
+    archive, parsing only the spreadsheets of BAs that are not archived yet.
+
+    :param str directory: location of Excel files.
+    :param list series_list: list of BA initials, e.g., ['PSE',BPAT','CISO'].
+    :param datetime.datetime start_date: desired start of dataset.
+    :param datetime.datetime end_date: desired end of dataset.
+    :param str archive_dir: location of the archive.
+    :return: (*pandas.DataFrame*) -- data frame with UTC timestamp as indices and
+        BA series name as column names.
+    """
+    missing = [
+        ba
+        for ba in series_list
+        if not os.path.isdir(os.path.join(archive_dir, f"ba={ba}"))
+    ]
+    if len(missing) > 0:
+        demand_archive.excel_to_archive(directory, missing, archive_dir)
+
+    df_all = demand_archive.from_archive(
+        archive_dir, series_list, start_date, end_date
+    ).astype(float)
+    df_all.index = df_all.index.tz_localize(None)
+
+    # Keep the hours covered by all BAs, as the inner join of the spreadsheets does
+    first = [df_all[ba].first_valid_index() for ba in series_list]
+    last = [df_all[ba].last_valid_index() for ba in series_list]
+    if None in first:
+        return df_all.iloc[:0]
+    return df_all.loc[max(first) : min(last)]
+
+
 def get_ba_demand(ba_code_list, start_date, end_date, api_key):
     """Download the demand between two dates for a list of balancing authorities.
 
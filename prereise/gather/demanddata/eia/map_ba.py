@@ -4,10 +4,10 @@ import os
 
 import pandas as pd
 import requests
-from powersimdata.utility.distance import find_closest_neighbor
 from tqdm import tqdm
 
 import prereise
+from prereise.gather.helpers import find_closest_neighbors
 
 
 def aggregate_ba_demand(demand, mapping):
@@ -145,13 +145,13 @@ def map_buses_to_ba(bus_df):
     bus_ba_map["BA"] = bus_ba_map["County"].map(county_ba_map)
     # assign BA to buses without county assigned based on the nearest neighbor
     neighbor = bus_ba_map.query("~County.isna()")
-    for bus_id in bus_no_county_match:
+    if len(bus_no_county_match) > 0:
         if neighbor.empty:
             print("No reference bus has BA assigned!")
-            break
-        ind = find_closest_neighbor(
-            (bus_ba_map.loc[bus_id, "lon"], bus_ba_map.loc[bus_id, "lat"]),
-            neighbor[["lon", "lat"]].values.tolist(),
-        )
-        bus_ba_map.loc[bus_id, "BA"] = neighbor.iloc[ind]["BA"]
+        else:
+            ind = find_closest_neighbors(
+                bus_ba_map.loc[bus_no_county_match, ["lon", "lat"]].values,
+                neighbor[["lon", "lat"]].values,
+            )
+            bus_ba_map.loc[bus_no_county_match, "BA"] = neighbor["BA"].values[ind]
     return bus_ba_map, bus_no_county_match
@@ -0,0 +1,130 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from prereise.gather.demanddata.eia import get_eia_data
+from prereise.gather.demanddata.eia.demand_archive import (
+    csv_to_archive,
+    excel_to_archive,
+    from_archive,
+    get_partition_path,
+    json_to_archive,
+    to_archive,
+)
+
+pytest.importorskip("pyarrow")
+
+
+def test_excel_to_archive(tmp_path):
+    directory = os.path.join(os.path.dirname(__file__), "data")
+    start = pd.to_datetime("2015-08-01 07:00:00")
+    end = pd.to_datetime("2015-10-01 07:00:00")
+    ba_list = ["BPAT", "CISO", "EPE"]
+
+    excel_to_archive(directory, ba_list, tmp_path)
+    assert os.path.isfile(get_partition_path(tmp_path, "CISO", 2015))
+
+    expected = get_eia_data.from_excel(directory, ba_list, start, end)
+    ba_from_archive = from_archive(tmp_path, ba_list, start, end)
+    assert ba_from_archive.columns.tolist() == ba_list
+    assert (ba_from_archive.dtypes == "float32").all()
+    assert ba_from_archive.index.tz is not None
+    assert len(ba_from_archive) == len(expected) > 0
+    np.testing.assert_allclose(ba_from_archive.values, expected.values, rtol=1e-6)
+
+
+def test_from_excel_with_archive(monkeypatch, tmp_path):
+    directory = os.path.join(os.path.dirname(__file__), "data")
+    start = pd.to_datetime("2018-07-01 07:00:00")
+    end = pd.to_datetime("2018-10-01 07:00:00")
+    ba_list = ["BPAT", "CISO", "EPE"]
+
+    expected = get_eia_data.from_excel(directory, ba_list, start, end)
+    demand = get_eia_data.from_excel(
+        directory, ba_list, start, end, archive_dir=tmp_path
+    )
+    pd.testing.assert_frame_equal(
+        demand, expected, check_dtype=False, check_freq=False, rtol=1e-6
+    )
+
+    # spreadsheets are not parsed again once archived
+    def read_excel(*args, **kwargs):
+        raise AssertionError("spreadsheet parsed")
+
+    monkeypatch.setattr(pd, "read_excel", read_excel)
+    demand = get_eia_data.from_excel(
+        directory, ba_list[:2], start, end, archive_dir=tmp_path
+    )
+    pd.testing.assert_frame_equal(
+        demand, expected[ba_list[:2]], check_dtype=False, check_freq=False, rtol=1e-6
+    )
+
+
+def test_to_archive_updates_partitions(tmp_path):
+    index = pd.date_range("2019-12-31 22:00", periods=4, freq="H", tz="UTC")
+    to_archive(pd.DataFrame({"A": [1, 2, np.nan, 4]}, index=index), tmp_path)
+    to_archive(pd.DataFrame({"A": [5, 6]}, index=index[1:3]), tmp_path)
+    assert os.path.isfile(get_partition_path(tmp_path, "A", 2019))
+    assert os.path.isfile(get_partition_path(tmp_path, "A", 2020))
+
+    demand = from_archive(
+        tmp_path, ["A", "B"], index[0], index[-1] + pd.Timedelta("1H")
+    )
+    assert demand["A"].tolist()[:4] == [1, 5, 6, 4]
+    assert demand["A"].isna().tolist()[4]
+    assert demand["B"].isna().all()
+
+    demand = from_archive(tmp_path, ["A"], "2020-01-01 01:00", "2020-01-01 01:00")
+    assert demand["A"].tolist() == [4]
+
+
+def test_csv_to_archive(tmp_path):
+    filename = os.path.join(tmp_path, "EIA930_BALANCE_2020_Jan_Jun.csv")
+    pd.DataFrame(
+        {
+            "Balancing Authority": ["A", "A", "B", "B"],
+            "UTC Time at End of Hour": [
+                "01/01/2020 7:00:00 AM",
+                "01/01/2020 8:00:00 AM",
+            ]
+            * 2,
+            "Demand (MW)": ["1,000", "1,100", "20", "30"],
+        }
+    ).to_csv(filename, index=False)
+    csv_to_archive(filename, os.path.join(tmp_path, "archive"))
+
+    demand = from_archive(
+        os.path.join(tmp_path, "archive"),
+        ["B", "A"],
+        "2020-01-01 07:00",
+        "2020-01-01 08:00",
+    )
+    assert demand.values.tolist() == [[20, 1000], [30, 1100]]
+
+
+def test_json_to_archive(tmp_path):
+    filename = os.path.join(tmp_path, "eia.json")
+    with open(filename, "w") as f:
+        json.dump(
+            {
+                "series": [
+                    {
+                        "series_id": "EBA.CISO-ALL.D.H",
+                        "data": [["20180701T08Z", 21000], ["20180701T07Z", 22000]],
+                    }
+                ]
+            },
+            f,
+        )
+    json_to_archive(filename, os.path.join(tmp_path, "archive"))
+
+    demand = from_archive(
+        os.path.join(tmp_path, "archive"),
+        ["CISO"],
+        pd.Timestamp("2018-07-01 00:00", tz="US/Pacific"),
+        pd.Timestamp("2018-07-01 01:00", tz="US/Pacific"),
+    )
+    assert demand["CISO"].tolist() == [22000, 21000]
@@ -1,3 +1,5 @@
+from unittest.mock import patch
+
 import pandas as pd
 import pytest
 from pandas.testing import assert_series_equal
@@ -96,3 +98,21 @@ def test_map_buses_to_ba():
     bus_ba, bus_no_county_match = map_buses_to_ba(bus_df)
     assert bus_ba["BA"].tolist() == expected_res
     assert bus_no_county_match == ["Beijing"]
+
+
+def test_map_buses_to_ba_nearest_neighbor():
+    bus_df = pd.DataFrame(
+        {
+            "lat": [34.0522, 29.7604, 39.9042, 30.2672],
+            "lon": [-118.2437, -95.3698, 116.4074, -97.7431],
+            "County": ["Los Angeles__CA", "Harris__TX", None, None],
+        },
+        index=["CA", "Texas", "Beijing", "Austin"],
+    )
+    with patch(
+        "prereise.gather.demanddata.eia.map_ba.map_buses_to_county",
+        return_value=(bus_df, ["Beijing", "Austin"]),
+    ):
+        bus_ba, bus_no_county_match = map_buses_to_ba(bus_df)
+    assert bus_ba["BA"].tolist() == ["LDWP", "ERCO-C", "LDWP", "ERCO-C"]
+    assert bus_no_county_match == ["Beijing", "Austin"]
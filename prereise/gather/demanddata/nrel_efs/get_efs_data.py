@@ -1,6 +1,7 @@
-import io
+import hashlib
 import os
 import platform
+import shutil
 import subprocess
 import zipfile
 
@@ -9,6 +10,12 @@ import requests
 
 from prereise.gather.const import abv2state
 
+try:
+    # Registers the Deflate64 compression method with the zipfile module
+    import zipfile_deflate64  # noqa: F401
+except ImportError:
+    pass
+
 
 def download_demand_data(
     es=None, ta=None, fpath="", sz_path="C:/Program Files/7-Zip/7z.exe"
@@ -42,16 +49,14 @@ def download_demand_data(
         raise TypeError("The 7-Zip path must be input as a str.")
 
     # Download each of the specified load profiles
-    z = {}
     for i in es:
-        z[i] = {}
         for j in ta:
             # Assign path and file names
             zip_name = f"EFSLoadProfile_{i}_{j}.zip"
             url = f"https://data.nrel.gov/system/files/126/{zip_name}"
 
-            # Store the data in memory to try extracting with Python's zipfile module
-            z[i][j] = _download_data(zip_name, url, fpath)
+            # Stream the data to disk
+            _download_data(zip_name, url, fpath)
 
     # Try to extract the .csv file from the .zip file
     zf_works = True
@@ -62,9 +67,7 @@ def download_demand_data(
             csv_name = f"EFSLoadProfile_{i}_{j}.csv"
 
             # Try to extract the .csv file from the .zip file
-            zf_works = _extract_data(
-                z[i][j], zf_works, zip_name, csv_name, fpath, sz_path
-            )
+            zf_works = _extract_data(zf_works, zip_name, csv_name, fpath, sz_path)
 
 
 def download_flexibility_data(
@@ -93,14 +96,13 @@ def download_flexibility_data(
         raise TypeError("The 7-Zip path must be input as a str.")
 
     # Download each of the specified load profiles
-    z = {}
     for i in es:
         # Assign path and file names
         zip_name = f"EFS Flexible Load Profiles - {i} Electrification.zip"
         url = f"https://data.nrel.gov/system/files/127/{zip_name}"
 
-        # Store the data in memory to try extracting with Python's zipfile module
-        z[i] = _download_data(zip_name, url, fpath)
+        # Stream the data to disk
+        _download_data(zip_name, url, fpath)
 
     # Try to extract the .csv file from the .zip file
     zf_works = True
@@ -110,7 +112,7 @@ def download_flexibility_data(
         csv_name = f"EFSFlexLoadProfiles_{i}.csv"
 
         # Try to extract the .csv file from the .zip file
-        zf_works = _extract_data(z[i], zf_works, zip_name, csv_name, fpath, sz_path)
+        zf_works = _extract_data(zf_works, zip_name, csv_name, fpath, sz_path)
 
 
 def _check_electrification_scenarios_for_download(es):
@@ -203,36 +205,86 @@ def _check_path(fpath):
     return fpath
 
 
-def _download_data(zip_name, url, fpath):
+def _download_data(zip_name, url, fpath, sha256=None, chunk_size=2**20):
     """Downloads the specified NREL EFS data for :py:func:`download_demand_data` and
-    :py:func:`download_flexibility_data`.
+    :py:func:`download_flexibility_data`. The data is streamed to disk in chunks so that
+    the .zip file is never held in memory. An interrupted download is resumed from the
+    partially downloaded file using a range request.
 
     :param str zip_name: The name of the specified .zip file.
     :param str url: The specified URL to access the desired .zip file.
     :param str fpath: The input file path.
-    :return: (*zipfile.ZipFile*) -- The .zip file stored in memory for attempted
-        extraction using Python's zipfile module.
+    :param str sha256: The expected SHA-256 hex digest of the .zip file. Defaults to
+        None, in which case only the size of the .zip file is verified.
+    :param int chunk_size: The number of bytes written to disk at once. Defaults to
+        1 MiB.
+    :return: (*str*) -- The path of the downloaded .zip file.
+    :raises IOError: if the size of the downloaded file does not match the size
+        announced by the server.
+    :raises ValueError: if the SHA-256 digest of the downloaded file does not match
+        sha256.
     """
 
-    # Save a local copy of the .zip file for extraction
-    r = requests.get(url, stream=True)
-    if r.status_code != requests.codes.ok:
-        r.raise_for_status()
-    with open(zip_name, "wb") as f:
-        f.write(r.content)
+    # Resume from the partially downloaded file, if any
+    zip_path = os.path.join(fpath, zip_name)
+    part_path = f"{zip_path}.part"
+    offset = os.path.getsize(part_path) if os.path.isfile(part_path) else 0
+    headers = {"Range": f"bytes={offset}-"} if offset > 0 else {}
+
+    # Stream the .zip file to disk
+    with requests.get(url, stream=True, headers=headers) as r:
+        if r.status_code == requests.codes.requested_range_not_satisfiable:
+            if "Content-Range" not in r.headers:
+                # The size of the file is unknown, restart the download from scratch
+                size = None
+            else:
+                # The partially downloaded file is already complete
+                size = int(r.headers["Content-Range"].split("/")[-1])
+        else:
+            if r.status_code not in {requests.codes.ok, requests.codes.partial_content}:
+                r.raise_for_status()
+            if r.status_code == requests.codes.partial_content:
+                size = int(r.headers["Content-Range"].split("/")[-1])
+                mode = "ab"
+            else:
+                size = int(r.headers.get("Content-Length", -1))
+                mode = "wb"
+            with open(part_path, mode) as f:
+                for chunk in r.iter_content(chunk_size=chunk_size):
+                    f.write(chunk)
+
+    if size is None:
+        os.remove(part_path)
+        return _download_data(zip_name, url, fpath, sha256, chunk_size)
+
+    # Verify the downloaded file
+    if size >= 0 and os.path.getsize(part_path) != size:
+        raise IOError(
+            f"{zip_name} is incomplete: {os.path.getsize(part_path)} out of {size} "
+            + "bytes were downloaded. Call again to resume the download."
+        )
+    if sha256 is not None:
+        digest = hashlib.sha256()
+        with open(part_path, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                digest.update(chunk)
+        if digest.hexdigest() != sha256.lower():
+            os.remove(part_path)
+            raise ValueError(f"{zip_name} does not match the expected SHA-256 digest.")
+    os.replace(part_path, zip_path)
     print(f"{zip_name} successfully downloaded!")
 
-    # Return the data to try extracting with Python's zipfile module
-    return zipfile.ZipFile(io.BytesIO(r.content))
+    # Return the path of the .zip file to extract the data from
+    return zip_path
 
 
-def _extract_data(z, zf_works, zip_name, csv_name, fpath, sz_path):
+def _extract_data(zf_works, zip_name, csv_name, fpath, sz_path):
     """Extracts the .csv file containing NREL EFS data from the downloaded .zip file.
-    First attempts extraction using Python's zipfile module, then attempts other
-    OS-dependent methods, as needed.
+    First attempts extraction from the .zip file on disk using Python's zipfile module,
+    then attempts other OS-dependent methods, as needed. The Deflate64 compression used
+    by some NREL EFS .zip files is supported by the zipfile module when the optional
+    zipfile-deflate64 package is installed, e.g. with ``pip install prereise[efs]``.
 
-    :param zipfile.ZipFile z: The .zip file stored in memory for attempted extraction
-        using Python's zipfile module.
     :param bool zf_works: An indicator flag that states whether or not Python's zipfile
         module works for extraction. True if Python's zipfile module works, else False.
     :param str zip_name: The name of the specified .zip file.
@@ -253,8 +305,9 @@ def _extract_data(z, zf_works, zip_name, csv_name, fpath, sz_path):
 
     try:
         if zf_works:
-            # Try the zipfile module first
-            z.extractall(fpath)
+            # Try the zipfile module first, members are streamed from the file on disk
+            with zipfile.ZipFile(zip_path) as z:
+                z.extractall(fpath)
             print(f"{csv_name} successfully extracted!")
         else:
             # Bypass the zipfile module if it does not work on the first file
@@ -305,7 +358,9 @@ def _extract_data(z, zf_works, zip_name, csv_name, fpath, sz_path):
     return zf_works
 
 
-def partition_demand_by_sector(es, ta, year, sect=None, fpath="", save=False):
+def partition_demand_by_sector(
+    es, ta, year, sect=None, fpath="", save=False, chunksize=10**6
+):
     """Creates .csv files for each of the specified sectors given a specified
     electrification scenario and technology advancement.
 
@@ -322,6 +377,9 @@ def partition_demand_by_sector(es, ta, year, sect=None, fpath="", save=False):
         the sectoral data will be saved.
     :param bool save: Determines whether or not the .csv file is saved. Defaults to
         False. If the file is saved, it is saved to the same location as fpath.
+    :param int chunksize: The number of rows read at once when the .csv file is
+        converted into a columnar store, see :py:func:`convert_efs_data`. Defaults to
+        1,000,000 rows. If None, the whole file is read at once.
     :return: (*dict*) -- A dict of pandas.DataFrame objects that contain demand data
         for each state and time step in the specified sectors.
     :raises TypeError: if save is not input as a bool.
@@ -345,33 +403,34 @@ def partition_demand_by_sector(es, ta, year, sect=None, fpath="", save=False):
     csv_path = os.path.join(fpath, csv_name)
 
     # Download the specified NREL EFS dataset if it is not already downloaded
-    if not os.path.isfile(csv_path):
+    if not os.path.isfile(csv_path) and not os.path.isdir(_get_store_path(csv_path)):
         download_demand_data({es}, {ta}, fpath)
 
-    # Load the data from the downloaded .csv file as a DataFrame
-    df = pd.read_csv(csv_path)
-
-    # Trim the DataFrame for only the specified year
-    df = df.loc[df["Year"] == year]
-
-    # Drop unnecessary "Year", "Electrification", and "TechnologyAdvancement" columns
-    df.drop(columns=["Year", "Electrification", "TechnologyAdvancement"], inplace=True)
+    # Load only the specified year from the columnar store of the .csv file
+    df = _load_efs_data(
+        csv_path,
+        year,
+        columns=["LocalHourID", "State", "Sector", "LoadMW"],
+        chunksize=chunksize,
+    )
 
     # Sum by sector and state
-    df = df.groupby(["LocalHourID", "State", "Sector"], as_index=False).sum()
+    df = df.groupby(
+        ["LocalHourID", "State", "Sector"], as_index=False, observed=True
+    ).sum()
 
     # Split the demand DataFrame by sector
     sect_dem = {
         i: df[df["Sector"] == i]
         .drop(columns=["Sector"])
-        .groupby(["LocalHourID", "State"], sort=True)
+        .groupby(["LocalHourID", "State"], sort=True, observed=True)
         .sum()
         .unstack()
         for i in sect
     }
     sect_dem = {
         i: sect_dem[i].set_axis(
-            sect_dem[i].columns.get_level_values("State"), axis="columns"
+            sect_dem[i].columns.get_level_values("State").astype(str), axis="columns"
         )
         for i in sect
     }
@@ -401,7 +460,7 @@ def partition_demand_by_sector(es, ta, year, sect=None, fpath="", save=False):
 
 
 def partition_flexibility_by_sector(
-    es, ta, flex, year, sect=None, fpath="", save=False
+    es, ta, flex, year, sect=None, fpath="", save=False, chunksize=10**6
 ):
     """Creates .csv files for each of the specified sectors given a specified
     electrification scenario and technology advancement.
@@ -421,6 +480,9 @@ def partition_flexibility_by_sector(
         the sectoral data will be saved.
     :param bool save: Determines whether or not the .csv file is saved. Defaults to
         False. If the file is saved, it is saved to the same location as fpath.
+    :param int chunksize: The number of rows read at once when the .csv file is
+        converted into a columnar store, see :py:func:`convert_efs_data`. Defaults to
+        1,000,000 rows. If None, the whole file is read at once.
     :return: (*dict*) -- A dict of pandas.DataFrame objects that contain flexibility
         data for each state and time step in the specified sectors.
     :raises TypeError: if save is not input as a bool.
@@ -445,39 +507,32 @@ def partition_flexibility_by_sector(
     csv_path = os.path.join(fpath, csv_name)
 
     # Download the specified NREL EFS dataset if it is not already downloaded
-    if not os.path.isfile(csv_path):
+    if not os.path.isfile(csv_path) and not os.path.isdir(_get_store_path(csv_path)):
         download_flexibility_data({es}, fpath)
 
-    # Load the data from the downloaded .csv file as a DataFrame
-    df = pd.read_csv(csv_path)
-
-    # Trim the DataFrame for only the specified year
-    df = df.loc[df["Year"] == year]
-
-    # Trim the DataFrame for only the specified technology advancement
-    df = df.loc[df["TechnologyAdvancement"] == ta]
-
-    # Trim the DataFrame for only the specified flexibility scenario
-    df = df.loc[df["Flexibility"] == flex]
-
-    # Drop unnecessary "Year", "Electrification", and "TechnologyAdvancement" columns
-    df.drop(
-        columns=["Year", "Electrification", "TechnologyAdvancement", "Flexibility"],
-        inplace=True,
+    # Load only the specified year, technology advancement, and flexibility scenario
+    # from the columnar store of the .csv file
+    df = _load_efs_data(
+        csv_path,
+        year,
+        columns=["LocalHourID", "State", "Sector", "LoadMW"],
+        filters=[("TechnologyAdvancement", "=", ta), ("Flexibility", "=", flex)],
+        chunksize=chunksize,
     )
 
     # Split the flexibility DataFrame by sector
     sect_flex = {
         i: df[df["Sector"] == i]
         .drop(columns=["Sector"])
-        .groupby(["LocalHourID", "State"], sort=True)
+        .groupby(["LocalHourID", "State"], sort=True, observed=True)
         .sum()
         .unstack()
         for i in sect
     }
     sect_flex = {
         i: sect_flex[i].set_axis(
-            sect_flex[i].columns.get_level_values("State"), axis="columns"
+            sect_flex[i].columns.get_level_values("State").astype(str),
+            axis="columns",
         )
         for i in sect
     }
@@ -506,6 +561,102 @@ def partition_flexibility_by_sector(
     return sect_flex
 
 
+def convert_efs_data(csv_path, chunksize=None):
+    """Converts a downloaded NREL EFS .csv file into a columnar store, partitioned by
+    year, that is saved next to the .csv file. The *'State'*, *'Sector'*, and scenario
+    columns are stored as categories while the *'Year'* and *'LocalHourID'* columns are
+    stored as 16-bit integers.
+
+    :param str csv_path: The path of the NREL EFS .csv file.
+    :param int chunksize: The number of rows read from the .csv file at once. Defaults
+        to None, in which case the whole file is read at once. Setting a chunk size
+        bounds the memory needed for the conversion on small machines.
+    :return: (*str*) -- The path of the columnar store.
+    :raises TypeError: if chunksize is not input as an int or None.
+    """
+
+    # Check the inputs
+    if chunksize is not None and not isinstance(chunksize, int):
+        raise TypeError("chunksize must be input as an int or None.")
+
+    # Read the .csv file, either at once or by chunks of rows
+    dtype = {
+        "Electrification": "category",
+        "TechnologyAdvancement": "category",
+        "Flexibility": "category",
+        "Year": "int16",
+        "LocalHourID": "int16",
+        "State": "category",
+        "Sector": "category",
+    }
+    if chunksize is None:
+        chunks = [pd.read_csv(csv_path, dtype=dtype)]
+    else:
+        chunks = pd.read_csv(csv_path, dtype=dtype, chunksize=chunksize)
+
+    # Write each chunk to its year partitions in a temporary location
+    store_path = _get_store_path(csv_path)
+    tmp_path = f"{store_path}.tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    for i, chunk in enumerate(chunks):
+        for year, df in chunk.groupby("Year"):
+            year_path = os.path.join(tmp_path, f"Year={year}")
+            os.makedirs(year_path, exist_ok=True)
+            df.drop(columns=["Year"]).to_parquet(
+                os.path.join(year_path, f"part-{i}.parquet"), index=False
+            )
+
+    # Replace any previous version of the columnar store
+    shutil.rmtree(store_path, ignore_errors=True)
+    os.rename(tmp_path, store_path)
+    print(f"{os.path.basename(csv_path)} successfully converted!")
+
+    # Return the path of the columnar store
+    return store_path
+
+
+def _get_store_path(csv_path):
+    """Returns the path of the columnar store built from an NREL EFS .csv file by
+    :py:func:`convert_efs_data`.
+
+    :param str csv_path: The path of the NREL EFS .csv file.
+    :return: (*str*) -- The path of the columnar store.
+    """
+
+    return f"{os.path.splitext(csv_path)[0]}.parquet"
+
+
+def _load_efs_data(csv_path, year, columns, filters=None, chunksize=None):
+    """Loads a single year of NREL EFS data for :py:func:`partition_demand_by_sector`
+    and :py:func:`partition_flexibility_by_sector`. The .csv file is converted into a
+    columnar store by :py:func:`convert_efs_data` if the store does not exist yet or if
+    the .csv file is more recent, then only the requested slice is read.
+
+    :param str csv_path: The path of the NREL EFS .csv file.
+    :param int year: The selected year's worth of data.
+    :param list columns: The columns to load.
+    :param list filters: Additional (column, operator, value) filters applied when
+        reading. Defaults to None.
+    :param int chunksize: The number of rows read at once when converting the .csv
+        file. Defaults to None, in which case the whole file is read at once.
+    :return: (*pandas.DataFrame*) -- The selected slice of the NREL EFS data.
+    """
+
+    # Convert the .csv file if needed
+    store_path = _get_store_path(csv_path)
+    if not os.path.isdir(store_path) or (
+        os.path.isfile(csv_path)
+        and os.path.getmtime(csv_path) > os.path.getmtime(store_path)
+    ):
+        convert_efs_data(csv_path, chunksize=chunksize)
+
+    # Read only the partition and rows that match the filters
+    filters = [("Year", "=", year)] + (filters if filters is not None else [])
+    return pd.read_parquet(
+        store_path, engine="pyarrow", columns=columns, filters=filters
+    )
+
+
 def _check_electrification_scenarios_for_partition(es):
     """Checks the electrification scenario input to
     :py:func:`partition_demand_by_sector` and
@@ -1,5 +1,6 @@
-from collections import defaultdict
+from functools import lru_cache
 
+import numpy as np
 import pandas as pd
 from powersimdata.input.grid import Grid
 from powersimdata.network.model import ModelImmutables
@@ -85,20 +86,13 @@ def decompose_demand_profile_by_state_to_loadzone(
         invalid_regions = regions - possible_regions
         raise ValueError(f'Invalid regions: {", ".join(invalid_regions)}')
 
-    # Grab the grid information
-    grid = Grid(["USA"])
-
-    # Find Pd for each load zone and determine the fraction of Pd per load zone by state
-    pd_by_lz = grid.bus.groupby("zone_id")["Pd"].sum()
-    pd_state_total = defaultdict(float)
-    for i, s in id2abv.items():
-        pd_state_total[s] += pd_by_lz[i]
-    pd_frac = {i: pd_by_lz[i] / pd_state_total[id2abv[i]] for i in id2abv}
-
     # Split states into load zones
-    df_lz = pd.DataFrame(index=df.index, columns=list(id2abv))
-    for i in df_lz.columns:
-        df_lz[i] = df[id2abv[i]] * pd_frac[i]
+    weights = get_state_to_loadzone_weights()
+    df_lz = pd.DataFrame(
+        df[weights.index].to_numpy() @ weights.to_numpy(),
+        index=df.index,
+        columns=weights.columns,
+    )
 
     # Convert from local hours to UTC time
     df_lz = shift_local_time_by_loadzone_to_utc(df_lz)
@@ -128,6 +122,57 @@ def decompose_demand_profile_by_state_to_loadzone(
     return df_lz
 
 
+@lru_cache(maxsize=None)
+def _get_state_to_loadzone_weights():
+    """Computes the fraction of the state demand attributed to each load zone, based on
+    the Pd of the buses in the load zones.
+
+    :return: (*pandas.DataFrame*) -- (states x load zones) weight matrix.
+    """
+
+    # Grab the grid information
+    grid = Grid(["USA"])
+
+    # Find Pd for each load zone and determine the fraction of Pd per load zone by state
+    zones = list(id2abv)
+    pd_by_lz = grid.bus.groupby("zone_id")["Pd"].sum().reindex(zones)
+    zone_state = pd.Series(id2abv).reindex(zones)
+    pd_frac = pd_by_lz / pd_by_lz.groupby(zone_state).transform("sum")
+
+    # Place the fractions in a (states x load zones) matrix
+    states = sorted(zone_state.unique())
+    weights = np.zeros((len(states), len(zones)))
+    rows = zone_state.map({s: i for i, s in enumerate(states)})
+    weights[rows, range(len(zones))] = pd_frac.to_numpy()
+
+    return pd.DataFrame(weights, index=states, columns=zones)
+
+
+def get_state_to_loadzone_weights():
+    """Returns the weight matrix used to split state profiles into load zone profiles.
+    Each column holds the fraction of the state demand attributed to the load zone,
+    based on the Pd of the buses in the load zones.
+
+    :return: (*pandas.DataFrame*) -- (states x load zones) weight matrix.
+    """
+    return _get_state_to_loadzone_weights().copy()
+
+
+@lru_cache(maxsize=None)
+def _get_utc_shift_index(columns, n_hours=8784):
+    """Computes the indices of the local time rows to gather in order to build UTC
+    profiles. The first hours of the year are populated with data from December 30,
+    which is the same day of the week.
+
+    :param tuple columns: load zone IDs.
+    :param int n_hours: number of hours in the profiles.
+    :return: (*numpy.ndarray*) -- (hours x load zones) array of row indices.
+    """
+    tz_val = np.array([int(id2timezone[i][-1]) for i in columns])
+    index = np.arange(n_hours)[:, None] - tz_val[None, :]
+    return np.where(index < 0, index + 8736, index)
+
+
 def shift_local_time_by_loadzone_to_utc(df):
     """Maps the local time for each load zone to the corresponding UTC time.
 
@@ -151,16 +196,13 @@ def shift_local_time_by_loadzone_to_utc(df):
     if set(df.columns) != set(id2abv):
         raise ValueError("This data does not include all load zones.")
 
-    # Shift values according to UTC time correction
-    df_tz = df.copy()
-    for i in df_tz.columns:
-        tz_val = int(id2timezone[i][-1])
-        df_tz[i] = df_tz[i].shift(tz_val)
-
-        # Populate with data from December 30 (same day of week) that is the same time
-        df_tz.iloc[0:tz_val, df_tz.columns.get_loc(i)] = df.iloc[
-            (8736 - tz_val) : 8736
-        ][i].values
+    # Shift values according to UTC time correction in a single gather
+    index = _get_utc_shift_index(tuple(df.columns), len(df))
+    df_tz = pd.DataFrame(
+        df.to_numpy(dtype=float)[index, np.arange(df.shape[1])],
+        index=df.index.copy(),
+        columns=df.columns,
+    )
 
     # Rename index
     df_tz.index.name = "UTC Time"
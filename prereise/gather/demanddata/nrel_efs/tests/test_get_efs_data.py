@@ -1,5 +1,8 @@
+import hashlib
 import os
+import shutil
 import zipfile
+from unittest.mock import MagicMock, patch
 
 import pandas as pd
 import pytest
@@ -13,6 +16,7 @@ from prereise.gather.demanddata.nrel_efs.get_efs_data import (
     _download_data,
     _extract_data,
     account_for_leap_year,
+    convert_efs_data,
     partition_demand_by_sector,
     partition_flexibility_by_sector,
 )
@@ -72,6 +76,78 @@ def test_download_data():
         os.remove("project_resstock_efs_2013.zip")
 
 
+def _mock_response(content, status_code, headers):
+    response = MagicMock()
+    response.__enter__.return_value = response
+    response.status_code = status_code
+    response.headers = headers
+    response.iter_content.return_value = [
+        content[i : i + 4] for i in range(0, len(content), 4)
+    ]
+    return response
+
+
+@patch("prereise.gather.demanddata.nrel_efs.get_efs_data.requests.get")
+def test_download_data_resumes(mock_get, tmp_path):
+    content = b"0123456789abcdef"
+    zip_name = "test.zip"
+    with open(os.path.join(tmp_path, f"{zip_name}.part"), "wb") as f:
+        f.write(content[:6])
+    mock_get.return_value = _mock_response(
+        content[6:], 206, {"Content-Range": f"bytes 6-15/{len(content)}"}
+    )
+
+    zip_path = _download_data(
+        zip_name,
+        "https://example.com/test.zip",
+        str(tmp_path),
+        sha256=hashlib.sha256(content).hexdigest(),
+    )
+
+    assert mock_get.call_args.kwargs["headers"] == {"Range": "bytes=6-"}
+    assert not os.path.isfile(f"{zip_path}.part")
+    with open(zip_path, "rb") as f:
+        assert f.read() == content
+
+
+@patch("prereise.gather.demanddata.nrel_efs.get_efs_data.requests.get")
+def test_download_data_restarts_without_content_range(mock_get, tmp_path):
+    content = b"0123456789abcdef"
+    zip_name = "test.zip"
+    with open(os.path.join(tmp_path, f"{zip_name}.part"), "wb") as f:
+        f.write(b"corrupted partial download")
+    mock_get.side_effect = [
+        _mock_response(b"", 416, {}),
+        _mock_response(content, 200, {"Content-Length": str(len(content))}),
+    ]
+
+    zip_path = _download_data(zip_name, "https://example.com/test.zip", str(tmp_path))
+
+    assert mock_get.call_args.kwargs["headers"] == {}
+    with open(zip_path, "rb") as f:
+        assert f.read() == content
+
+
+@patch("prereise.gather.demanddata.nrel_efs.get_efs_data.requests.get")
+def test_download_data_checks_file(mock_get, tmp_path):
+    content = b"0123456789abcdef"
+    mock_get.return_value = _mock_response(
+        content[:8], 200, {"Content-Length": str(len(content))}
+    )
+    with pytest.raises(IOError):
+        _download_data("test.zip", "https://example.com/test.zip", str(tmp_path))
+    assert os.path.getsize(os.path.join(tmp_path, "test.zip.part")) == 8
+
+    mock_get.return_value = _mock_response(
+        content[8:], 206, {"Content-Range": f"bytes 8-15/{len(content)}"}
+    )
+    with pytest.raises(ValueError):
+        _download_data(
+            "test.zip", "https://example.com/test.zip", str(tmp_path), sha256="0" * 64
+        )
+    assert not os.path.isfile(os.path.join(tmp_path, "test.zip.part"))
+
+
 @pytest.mark.integration
 def test_extract_data():
     # Create a dummy demand data set
@@ -98,7 +174,6 @@ def test_extract_data():
     try:
         # Try extracting the dummy .csv file from the dummy .zip file
         _extract_data(
-            z=None,
             zf_works=False,
             zip_name="test_demand.zip",
             csv_name="test_demand.csv",
@@ -172,8 +247,9 @@ def test_partition_demand_by_sector():
         assert_frame_equal(exp_res_dem, test_sect_dem["Residential"], check_names=False)
 
     finally:
-        # Delete the test .csv file
+        # Delete the test .csv file and its columnar store
         os.remove("EFSLoadProfile_High_Rapid.csv")
+        shutil.rmtree("EFSLoadProfile_High_Rapid.parquet", ignore_errors=True)
 
 
 @pytest.mark.integration
@@ -215,8 +291,36 @@ def test_partition_flexibility_by_sector():
         )
 
     finally:
-        # Delete the test .csv file
+        # Delete the test .csv file and its columnar store
         os.remove("EFSFlexLoadProfiles_High.csv")
+        shutil.rmtree("EFSFlexLoadProfiles_High.parquet", ignore_errors=True)
+
+
+def test_convert_efs_data(tmp_path):
+    # Create a dummy flexibility data set spanning two years
+    dummy_flex_data = {
+        "Electrification": ["High"] * 16,
+        "TechnologyAdvancement": ["Rapid", "Slow"] * 8,
+        "Flexibility": ["Base"] * 16,
+        "Year": [2030] * 8 + [2040] * 8,
+        "LocalHourID": [1, 1, 2, 2] * 4,
+        "State": ["AL", "AL", "AL", "AL", "AZ", "AZ", "AZ", "AZ"] * 2,
+        "Sector": ["Residential"] * 16,
+        "LoadMW": list(range(16)),
+    }
+    csv_path = os.path.join(tmp_path, "EFSFlexLoadProfiles_High.csv")
+    pd.DataFrame(data=dummy_flex_data).to_csv(csv_path, index=False)
+
+    # Convert the .csv file by chunks of rows overlapping both years
+    store_path = convert_efs_data(csv_path, chunksize=5)
+
+    # Check the partitions and types of the columnar store
+    assert sorted(os.listdir(store_path)) == ["Year=2030", "Year=2040"]
+    df = pd.read_parquet(store_path, filters=[("Year", "=", 2040)])
+    assert df["LocalHourID"].dtype == "int16"
+    assert df["State"].dtype == "category"
+    assert df["Sector"].dtype == "category"
+    assert sorted(df["LoadMW"]) == list(range(8, 16))
 
 
 def test_account_for_leap_year():
@@ -4,6 +4,7 @@ from powersimdata.network.model import ModelImmutables
 
 from prereise.gather.demanddata.nrel_efs.map_states import (
     decompose_demand_profile_by_state_to_loadzone,
+    get_state_to_loadzone_weights,
     shift_local_time_by_loadzone_to_utc,
 )
 
@@ -64,3 +65,15 @@ def test_shift_local_time_by_loadzone_to_utc():
 
     # Compare the two results
     assert_series_equal(exp_agg_dem, test_agg_dem[1])
+
+
+def test_get_state_to_loadzone_weights():
+    weights = get_state_to_loadzone_weights()
+
+    # Each load zone belongs to a single state and state demand is fully allocated
+    assert list(weights.columns) == list(id2abv)
+    assert ((weights > 0).sum() == 1).all()
+    assert_series_equal(
+        weights.sum(axis=1), pd.Series(1.0, index=weights.index), check_names=False
+    )
+    assert weights.loc["NY"].idxmax() == 7
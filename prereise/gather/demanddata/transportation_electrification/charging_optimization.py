@@ -1,7 +1,13 @@
 import numpy as np
 import pandas as pd
+from scipy import sparse
+from scipy.optimize import linprog
 
-from prereise.gather.demanddata.transportation_electrification import const, dwelling
+from prereise.gather.demanddata.transportation_electrification import (
+    const,
+    dwelling,
+    trip_chain,
+)
 
 
 def get_constraints(
@@ -28,51 +34,25 @@ def get_constraints(
     :return: (*pandas.DataFrame*) -- a DataFrame adding the calculated constraints
         to an individual vehicle's data
     """
-    grouped_trips = constraints_df.groupby("vehicle_number")
-
     constraints_df.loc[
         constraints_df["dwell_location"].isin(const.dwell_location_list),
         "power_allowed",
     ] = power
     constraints_df["power_allowed"].fillna(0, inplace=True)
 
-    # for "power" - location
-    if location_strategy == 3:
-        constraints_df["location_allowed"] = True
-    else:
-        allowed = location_allowed[location_strategy]
-        constraints_df["location_allowed"] = constraints_df["dwell_location"].map(
-            lambda x: x in allowed
-        )
-
-    # for "power" - trip_number
-    if trip_strategy == 1:
-        constraints_df["trip_allowed"] = True
-    elif trip_strategy == 2:
-        constraints_df["trip_allowed"] = (
-            constraints_df["trip_number"] == constraints_df["total_trips"]
-        )
-
-    # for "power" - dwell
-    constraints_df["dwell_allowed"] = constraints_df["dwell_time"] > 0.2
+    # for "power" - location, trip_number and dwell, determine if can charge
+    constraints_df = trip_chain.add_charging_allowed(
+        constraints_df,
+        location_strategy,
+        location_allowed,
+        trip_strategy,
+        power_allowed=constraints_df["power_allowed"],
+    )
 
-    # for "power" - determine if can charge
-    allowed_cols = [
-        "power_allowed",
-        "location_allowed",
-        "trip_allowed",
-        "dwell_allowed",
-    ]
-    constraints_df["charging_allowed"] = constraints_df[allowed_cols].apply(all, axis=1)
-
-    for trip_num, group in grouped_trips:
-        constraints_df.loc[group.index, "charging consumption"] = (
-            constraints_df.loc[group.index, "trip_miles"] * kwhmi * -1
-        )
-        constraints_df.loc[group.index, "seg"] = dwelling.get_segment(
-            constraints_df.loc[group.index, "trip_end"],
-            constraints_df.loc[group.index, "dwell_time"],
-        )
+    constraints_df["charging consumption"] = constraints_df["trip_miles"] * kwhmi * -1
+    constraints_df["seg"] = dwelling.get_segment(
+        constraints_df["trip_end"], constraints_df["dwell_time"]
+    )
 
     constraints_df.loc[
         constraints_df["charging_allowed"] == True, "power"  # noqa: E712
@@ -95,6 +75,37 @@ def get_constraints(
     return constraints_df
 
 
+def get_battery_constraints(charging_consumption, seg, kwh):
+    """Build the state of charge constraints of one vehicle. Starting from any trip,
+    the energy charged over the following trips must cover the energy consumed, within
+    the battery capacity.
+
+    :param numpy.ndarray charging_consumption: the charging consumption for each trip
+    :param numpy.ndarray seg: the amount of the segments in the dwelling activity
+    :param float kwh: kwhmi * veh_range, amount of energy needed to charge vehicle.
+    :return: (*tuple*) -- sparse (m * (m - 1), segsum) constraint matrix and upper
+        bounds of ``A_ub @ x <= b_ub``, m being the number of trips.
+    """
+    m = len(seg)
+    seg_trip = np.repeat(np.arange(m), seg)
+    if m == 1:
+        return sparse.csr_matrix((0, len(seg_trip))), np.zeros(0)
+
+    # row (j, r) starts at trip j and spans the r + 1 (charging) or r + 2
+    # (consumption) following trips, wrapping around the last trip
+    j, r = np.divmod(np.arange(m * (m - 1)), m - 1)
+    position = (np.arange(m) - j[:, None]) % m
+    consumption_mask = (position <= r[:, None] + 1).astype(float)
+    rows, cols = np.nonzero(position[:, seg_trip] <= r[:, None])
+
+    a_ub = sparse.csr_matrix(
+        (-np.ones(len(rows)), (rows, cols)), shape=(m * (m - 1), len(seg_trip))
+    )
+    consumption = np.asarray(charging_consumption, dtype=float).reshape((m, 1))
+    b_ub = kwh + (consumption_mask.reshape((m, m - 1, m)) @ consumption).ravel()
+    return a_ub, b_ub
+
+
 def calculate_optimization(
     charging_consumption,
     rates,
@@ -115,75 +126,99 @@ def calculate_optimization(
     :param float charging_efficiency: from grid to battery efficiency.
     :return: (*dict*) -- contains the necessary inputs for the linprog optimization
     """
-
+    seg = np.asarray(seg, dtype=int)
     segsum = np.sum(seg)
-    segcum = np.cumsum(seg)
-
-    f = np.array(rates)
-
-    # form all the constraints
-    # equality constraint
-    Aeq = np.ones((1, segsum))  # noqa: N806
-
-    # equality constraint
-    Beq = -sum(charging_consumption)  # noqa: N806
-
-    # G2V power upper bound in DC
-    ub = elimit
-    lb = [0] * segsum
-    bounds = list(zip(lb, ub))
 
-    # formulate the constraints matrix in Ax <= b, A can be divided into m
-    # generate the cumulative sum array of seg in segcum
+    # inequality constraints, sparse
+    Aineq, Bineq = get_battery_constraints(charging_consumption, seg, kwh)  # noqa: N806
 
-    # the amount of trips. submatrix dimension is m-1 * m
-    m = total_trips
-
-    # 'a' is a m-1 * segsum matrix
-    a = np.zeros((m - 1, segsum))
-    Aineq = np.zeros(((m - 1) * m, segsum))  # noqa: N806
-
-    b = np.tril(np.ones((m - 1, m)), 1)
-    Bineq = np.zeros((m * (m - 1), 1))  # noqa: N806
-
-    for j in range(m):
-        # part of the A matrix
-        a = np.zeros((m - 1, segsum))
-
-        if j > 0:
-            # switch components in b matrix
-            bb = np.concatenate((b[:, m - j : m], b[:, : m - j]), axis=1)
-
-        else:
-            # do not switch if j is 0
-            bb = b
-
-        charging_consumption = np.array(charging_consumption)
-        cc = charging_consumption.reshape((charging_consumption.shape[0], 1))
+    return {
+        "c": np.array(rates),
+        "A_ub": Aineq,
+        "b_ub": Bineq,
+        "A_eq": sparse.csr_matrix(np.ones((1, segsum))),
+        "b_eq": -sum(charging_consumption),
+        # G2V power upper bound in DC
+        "bounds": np.column_stack([np.zeros(segsum), elimit]),
+    }
 
-        # set the constraints in DC
-        Bineq[(m - 1) * j : (m - 1) * (j + 1), :] = kwh + (np.dot(bb, cc))
 
-        for ii in range(m - 1):
-            # indicate the number of the trips
-            k = j + ii
+def get_programs(trips, kwh):
+    """Build the linear program of each vehicle. Constraints do not depend on the cost
+    signal, they are built once and reused for every day.
 
-            if k < m:
-                # ones part of the column
-                a[ii : m - 1, segcum[k] - seg[k] : segcum[k]] = 1
+    :param pandas.DataFrame trips: trip data, output of :func:`get_constraints`.
+        Vehicles are blocks of *total_trips* consecutive rows.
+    :param float kwh: kwhmi * veh_range, amount of energy needed to charge vehicle.
+    :return: (*list*) -- one dictionary per vehicle with the position of its first
+        trip, its number of trips, the hour and dwell location of each charging
+        segment, the constraints and the bounds of the linear program.
+    """
+    total_trips = trips["total_trips"].to_numpy(dtype=int)
+    consumption = trips["charging consumption"].to_numpy(dtype=float)
+    seg = trips["seg"].to_numpy(dtype=int)
+    first_hour = np.floor(trips["trip_end"].to_numpy(dtype=float)).astype(int)
+    dwell_location = trips["dwell_location"].to_numpy(dtype=int)
+    energy_limit = trips["energy limit"].to_numpy()
+
+    programs = []
+    i = 0
+    while i < len(trips):
+        m = total_trips[i]
+        trip_seg = seg[i : i + m]
+        a_ub, b_ub = get_battery_constraints(consumption[i : i + m], trip_seg, kwh)
+        seg_start = np.repeat(np.cumsum(trip_seg) - trip_seg, trip_seg)
+        programs.append(
+            {
+                "start": i,
+                "total_trips": m,
+                "hours": np.repeat(first_hour[i : i + m], trip_seg)
+                + np.arange(trip_seg.sum())
+                - seg_start,
+                "dwell_location": np.repeat(dwell_location[i : i + m], trip_seg),
+                "A_ub": a_ub,
+                "b_ub": b_ub,
+                "b_eq": -sum(consumption[i : i + m]),
+                "ub": np.concatenate(energy_limit[i : i + m]).astype(float),
+            }
+        )
+        i += m
+    return programs
 
-            else:
-                k = k - m
-                # ones part of the column
-                a[ii : m - 1, segcum[k] - seg[k] : segcum[k]] = 1
 
-        Aineq[(m - 1) * j : (m - 1) * (j + 1), :] = -a
+def solve_programs(programs, cost):
+    """Minimize the charging cost of several vehicles in a single block diagonal linear
+    program solved by HiGHS. If it fails, vehicles are solved one by one to find which
+    ones are infeasible.
 
-    return {
-        "c": f,
-        "A_ub": Aineq,
-        "b_ub": Bineq,
-        "A_eq": Aeq,
-        "b_eq": Beq,
-        "bounds": bounds,
-    }
+    :param list programs: programs of the vehicles, see :func:`get_programs`.
+    :param numpy.ndarray cost: cost of each hour.
+    :return: (*list*) -- exit status of the optimization (0 for success) and charging
+        of each segment, one tuple per vehicle.
+    """
+    sizes = [len(p["hours"]) for p in programs]
+    a_ub = sparse.block_diag([p["A_ub"] for p in programs], format="csr")
+    a_eq = sparse.csr_matrix(
+        (
+            np.ones(sum(sizes)),
+            (np.repeat(np.arange(len(sizes)), sizes), np.arange(sum(sizes))),
+        ),
+        shape=(len(sizes), sum(sizes)),
+    )
+    ub = np.concatenate([p["ub"] for p in programs])
+    result = linprog(
+        np.concatenate([cost[p["hours"]] for p in programs]),
+        A_ub=a_ub if a_ub.shape[0] > 0 else None,
+        b_ub=np.concatenate([p["b_ub"] for p in programs])
+        if a_ub.shape[0] > 0
+        else None,
+        A_eq=a_eq,
+        b_eq=np.array([p["b_eq"] for p in programs]),
+        bounds=np.column_stack([np.zeros_like(ub), ub]),
+        method="highs",
+    )
+    if result.status != 0:
+        if len(programs) > 1:
+            return [r for p in programs for r in solve_programs([p], cost)]
+        return [(result.status, None)]
+    return list(zip([0] * len(programs), np.split(result.x, np.cumsum(sizes)[:-1])))
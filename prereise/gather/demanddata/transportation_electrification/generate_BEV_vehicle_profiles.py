@@ -1,4 +1,5 @@
 import os
+from functools import lru_cache
 
 import pandas as pd
 
@@ -16,6 +17,55 @@ from prereise.gather.demanddata.transportation_electrification.data_helper impor
 )
 
 
+@lru_cache(maxsize=None)
+def get_normalized_demand(
+    census_region,
+    model_year,
+    veh_range,
+    power,
+    location_strategy,
+    veh_type,
+    filepath,
+):
+    """Compute the normalized immediate charging profile. Profiles only depend on the
+    vehicle and charging parameters, not on the BEV VMT of the geographic area, hence
+    they are computed once and shared by all the urban and rural areas.
+
+    :param int census_region: any of the 9 census regions defined by US census bureau,
+        ignored for MDV and HDV.
+    :param int model_year: year that is being modelled/projected to, 2017, 2030, 2040,
+        2050.
+    :param int veh_range: 100, 200, or 300, represents how far vehicle can travel on
+        single charge in miles.
+    :param int power: charger power, EVSE kW.
+    :param int location_strategy: where the vehicle can charge.
+    :param str veh_type: vehicle category: LDV, LDT, MDV or HDV.
+    :param str filepath: filepath of the trip data.
+    :return: (*numpy.ndarray*) -- read-only normalized charging profile.
+    """
+    if veh_type.lower() in {"ldv", "ldt"}:
+        normalized_demand, _, _ = immediate.immediate_charging(
+            census_region=census_region,
+            model_year=model_year,
+            veh_range=veh_range,
+            power=power,
+            location_strategy=location_strategy,
+            veh_type=veh_type,
+            filepath=filepath,
+        )
+    elif veh_type.lower() in {"mdv", "hdv"}:
+        normalized_demand, _, _ = immediate_charging_HDV.immediate_hdv_charging(
+            model_year=model_year,
+            veh_range=veh_range,
+            power=power,
+            location_strategy=location_strategy,
+            veh_type=veh_type,
+            filepath=filepath,
+        )
+    normalized_demand.flags.writeable = False
+    return normalized_demand
+
+
 def generate_bev_vehicle_profiles(
     vehicle_trip_data_filepath,
     charging_strategy,
@@ -101,30 +151,32 @@ def generate_bev_vehicle_profiles(
     )
     geographic_area_bev_vmt.update({f"{state}_rural": rural_bev_vmt})
 
+    if charging_strategy == "immediate":
+        normalized_demand = get_normalized_demand(
+            census_region if veh_type.lower() in {"ldv", "ldt"} else None,
+            projection_year,
+            veh_range,
+            power,
+            location_strategy,
+            veh_type.lower(),
+            vehicle_trip_data_filepath,
+        )
+    elif charging_strategy == "smart":
+        trips = smart_charging.prepare_trips(
+            veh_range,
+            power,
+            location_strategy,
+            veh_type,
+            vehicle_trip_data_filepath,
+            kwhmi,
+            census_region=census_region,
+            trip_strategy=trip_strategy,
+        )
+
     # calculate demand for all geographic areas with scaling factors
     state_demand_profiles = {}
     for geographic_area, bev_vmt in geographic_area_bev_vmt.items():
         if charging_strategy == "immediate":
-            if veh_type.lower() in {"ldv", "ldt"}:
-                normalized_demand, _, _ = immediate.immediate_charging(
-                    census_region=census_region,
-                    model_year=projection_year,
-                    veh_range=veh_range,
-                    power=power,
-                    location_strategy=location_strategy,
-                    veh_type=veh_type,
-                    filepath=vehicle_trip_data_filepath,
-                )
-            elif veh_type.lower() in {"mdv", "hdv"}:
-                normalized_demand, _, _ = immediate_charging_HDV.immediate_charging(
-                    model_year=projection_year,
-                    veh_range=veh_range,
-                    power=power,
-                    location_strategy=location_strategy,
-                    veh_type=veh_type,
-                    filepath=vehicle_trip_data_filepath,
-                )
-
             final_demand = immediate.adjust_bev(
                 hourly_profile=normalized_demand,
                 adjustment_values=daily_values,
@@ -149,16 +201,17 @@ def generate_bev_vehicle_profiles(
                 external_signal=external_signal,
                 bev_vmt=bev_vmt,
                 trip_strategy=trip_strategy,
+                trips=trips,
             )
 
         state_demand_profiles.update({geographic_area: final_demand})
 
-        state_demand_profiles_df = pd.DataFrame(
-            state_demand_profiles,
-            index=pd.date_range(
-                start=f"{projection_year}-01-01 00:00:00",
-                end=f"{projection_year}-12-31 23:00:00",
-                freq="H",
-            ),
-        )
+    state_demand_profiles_df = pd.DataFrame(
+        state_demand_profiles,
+        index=pd.date_range(
+            start=f"{projection_year}-01-01 00:00:00",
+            end=f"{projection_year}-12-31 23:00:00",
+            freq="H",
+        ),
+    )
     return state_demand_profiles_df
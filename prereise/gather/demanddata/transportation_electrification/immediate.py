@@ -1,7 +1,11 @@
 import numpy as np
-import pandas as pd
 
-from prereise.gather.demanddata.transportation_electrification import const, data_helper
+from prereise.gather.demanddata.transportation_electrification import (
+    const,
+    data_helper,
+    state_of_charge,
+    trip_chain,
+)
 
 allowed_locations_by_strategy = {
     1: {1},  # home only
@@ -26,37 +30,11 @@ def calculate_charging(
     # Add trip_number entries
     trips["trip_number"] = trips.groupby("vehicle_number").cumcount() + 1
 
-    grouped_trips = trips.groupby("trip_number")
-    for trip_num, group in grouped_trips:
-        if trip_num == 1:
-            # For the first trip, we assume that the vehicle starts with a full battery
-            trips.loc[group.index, "trip start battery charge"] = battery_capacity
-        else:
-            # For subsequent trips, the starting SoC depends on the previous trip
-            relevant_vehicles = group["vehicle_number"]
-            previous_group = grouped_trips.get_group(trip_num - 1)
-            start_soc = (
-                previous_group["trip end battery charge"]
-                + previous_group["charging consumption"]
-            )
-            trips.loc[group.index, "trip start battery charge"] = start_soc.values[
-                previous_group["vehicle_number"].isin(relevant_vehicles)
-            ]
-        # For all trips, update ending state of charge
-        trips.loc[group.index, "trip end battery charge"] = (
-            trips.loc[group.index, "trip start battery charge"]
-            - group["trip_miles"] * kwhmi * const.ER
-        )
-        # Calculate charging duration/energy for the trips that can charge
-        trips.loc[group.index, "full_charge_time"] = (
-            battery_capacity - trips["trip end battery charge"]
-        ) / (charging_power * charging_efficiency)
-        trips.loc[group.index, "charging time"] = trips["charging_allowed"] * (
-            trips[["full_charge_time", "dwell_time"]].apply(min, axis=1)
-        )
-        trips.loc[group.index, "charging consumption"] = (
-            trips["charging time"] * charging_power * charging_efficiency
-        )
+    # For the first trip, we assume that the vehicle starts with a full battery, the
+    # starting SoC of subsequent trips depends on the previous trip
+    state_of_charge.calculate_charging(
+        trips, charging_power, battery_capacity, kwhmi, charging_efficiency
+    )
 
 
 def resample_daily_charging(trips, charging_power):
@@ -70,35 +48,32 @@ def resample_daily_charging(trips, charging_power):
     coarse_resolution = 72
     ratio = int(fine_resolution / coarse_resolution)
     # determine timing of charging
-    augmented_trips = trips.assign(
-        start_point=(ratio * trips["trip_end"]).map(round),
-        elapsed=(ratio * trips["charging time"]).map(round),
-        end_point=lambda x: x["start_point"] + x["elapsed"],
+    start_point = np.round(ratio * trips["trip_end"].to_numpy(dtype=float))
+    elapsed = np.round(ratio * trips["charging time"].to_numpy(dtype=float))
+    start_point = np.clip(start_point, 0, fine_resolution).astype(int)
+    end_point = np.clip(start_point + elapsed, 0, fine_resolution).astype(int)
+    charging = start_point < end_point
+
+    # Count vehicles charging at fine resolution: +1 when a vehicle starts charging
+    # and -1 when it stops
+    count_change = np.zeros(fine_resolution + 1, dtype=int)
+    np.add.at(count_change, start_point[charging], 1)
+    np.add.at(count_change, end_point[charging], -1)
+    total_count = np.cumsum(count_change[:fine_resolution])
+
+    # Resample into a coarse resolution array. First and last hours are normal sums,
+    # every other hour sums from the half hour before to the half hour after
+    half = ratio // 2
+    output_array = np.empty(coarse_resolution)
+    output_array[0] = total_count[:ratio].sum()
+    output_array[-1] = total_count[-ratio:].sum()
+    output_array[1:-1] = (
+        total_count[half : fine_resolution - ratio - half]
+        .reshape(coarse_resolution - 2, ratio)
+        .sum(axis=1)
     )
-    # Translate times to fine-resolution arrays
-    indiv_charging_profiles = np.zeros((len(trips), fine_resolution), dtype=bool)
-    for i, (trip_id, trip) in enumerate(augmented_trips.iterrows()):
-        indiv_charging_profiles[i, trip["start_point"] : trip["end_point"]] = True
-    # Sum fine-resolution arrays for each trip into one aggregate array
-    total_profile = indiv_charging_profiles.sum(axis=0) * charging_power
-
-    # Resample fine-resolution arrays into a coarse-resolution array
-    output_array = np.zeros(coarse_resolution)
-    for k in range(coarse_resolution):
-        if k == 0:
-            # First hour, normal sum
-            output_array[k] = sum(total_profile[:ratio]) / ratio
-        elif k == coarse_resolution - 1:
-            # Last hour, normal sum
-            output_array[k] = sum(total_profile[(-1 * ratio) :]) / ratio
-        else:
-            # Every other hour: sum from the half hour before to the half hour after
-            output_array[k] = (
-                sum(total_profile[int((k - 0.5) * ratio) : int((k + 0.5) * ratio)])
-                / 100
-            )
-
-    return output_array
+
+    return output_array * charging_power / ratio
 
 
 def immediate_charging(
@@ -126,30 +101,7 @@ def immediate_charging(
     :param int trip_strategy: determine to charge after any trip (1) or only after the last trip (2)
     :return: (*numpy.ndarray*) -- charging profiles.
     """
-    if veh_type.lower() == "ldv":
-        trips = data_helper.remove_ldt(data_helper.load_data(census_region, filepath))
-    elif veh_type.lower() == "ldt":
-        trips = data_helper.remove_ldv(data_helper.load_data(census_region, filepath))
-    elif veh_type.lower() == "mdv":
-        trips = data_helper.load_hdv_data("mhdv", filepath)
-    elif veh_type.lower() == "hdv":
-        trips = data_helper.load_hdv_data("hhdv", filepath)
-
-    # filter for cyclical trips
-    filtered_census_data = pd.DataFrame(columns=const.nhts_census_column_names)
-    i = 0
-    while i < len(trips):
-        total_trips = int(trips.iloc[i, trips.columns.get_loc("total_trips")])
-        # copy one vehicle information to the block
-        individual = trips.iloc[i : i + total_trips].copy()
-        if individual["why_from"].iloc[0] == individual["dwell_location"].iloc[-1]:
-            filtered_census_data = pd.concat(
-                [filtered_census_data, individual], ignore_index=True
-            )
-        i += total_trips
-    trips = filtered_census_data
-
-    #####
+    trips = trip_chain.load_trips(veh_type, filepath, census_region)
 
     # Constants
     kwhmi = data_helper.get_kwhmi(model_year, veh_type, veh_range)
@@ -157,9 +109,6 @@ def immediate_charging(
 
     input_day = data_helper.get_input_day(data_helper.get_model_year_dti(model_year))
 
-    # updates the weekend and weekday values in the nhts data
-    trips = data_helper.update_if_weekend(trips)
-
     if power > 19.2:
         charging_efficiency = 0.95
     else:
@@ -173,52 +122,21 @@ def immediate_charging(
         "charging time",
         "charging consumption",
         "BEV could be used",
-        "trip_number",
     ]
     trips = trips.reindex(list(trips.columns) + new_columns, axis=1, fill_value=0)
     # Add flag for whether the total mileage is within the vehicle's range
     trips["BEV could be used"] = (
         trips["total vehicle miles traveled"] < veh_range * const.ER
     )
-    # Add booleans for whether the location allows charging
-    if location_strategy == 3:
-        trips["location_allowed"] = True
-    else:
-        allowed = allowed_locations_by_strategy[location_strategy]
-        trips["location_allowed"] = trips["dwell_location"].isin(allowed)
-    # Add booleans for whether the trip_number (compared to total trips) allows charging
-    if trip_strategy == 1:
-        trips["trip_allowed"] = True
-    elif trip_strategy == 2:
-        trips["trip_allowed"] = trips["trip_number"] == trips["total_trips"]
-    # Add booleans for whether the dell time is long enough to allow charging
-    trips["dwell_allowed"] = trips["dwell_time"] > 0.2
-    # Add boolean for whether this trip allows charging
-    allowed_cols = [
-        "location_allowed",
-        "trip_allowed",
-        "dwell_allowed",
-    ]
-    trips["charging_allowed"] = trips[allowed_cols].apply(all, axis=1)
-
-    trips["dwell_charging"] = (
-        trips["charging_allowed"] * trips["dwell_time"] * power * charging_efficiency
+    # Add booleans for whether the location, trip number and dwell time allow charging
+    trips = trip_chain.add_charging_allowed(
+        trips, location_strategy, allowed_locations_by_strategy, trip_strategy
     )
-
-    grouped_trips = trips.groupby("vehicle_number")
-    for vehicle_num, group in grouped_trips:
-        trips.loc[group.index, "max_charging"] = trips.loc[
-            group.index, "dwell_charging"
-        ].sum()
-        trips.loc[group.index, "required_charging"] = (
-            trips.loc[group.index, "trip_miles"].sum() * kwhmi
-        )
+    trips = trip_chain.add_vehicle_charging(trips, power, charging_efficiency, kwhmi)
 
     # Filter for whenever available charging is insufficient to meet required charging
-    trips = trips.loc[(trips["required_charging"] <= trips["max_charging"])]
-
-    # Filter by vehicle range
-    trips = trips.loc[trips["total vehicle miles traveled"] < veh_range * const.ER]
+    # and by vehicle range
+    trips = trip_chain.filter_feasible(trips, veh_range * const.ER)
 
     # Evaluate weekend vs. weekday for each trip
     data_day = data_helper.get_data_day(trips)
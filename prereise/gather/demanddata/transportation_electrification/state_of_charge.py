@@ -0,0 +1,124 @@
+import numpy as np
+import pandas as pd
+
+from prereise.gather.demanddata.transportation_electrification import const
+
+
+def get_trip_layout(trips):
+    """Locate each trip in a (vehicles x max_trips) array, vehicles in order of first
+    appearance and trips of each vehicle in row order.
+
+    :param pandas.DataFrame trips: trip data.
+    :return: (*tuple*) -- row and column index of each trip and shape of the array.
+    """
+    rows, vehicles = pd.factorize(trips["vehicle_number"])
+    cols = trips.groupby(rows, sort=False).cumcount().to_numpy()
+    shape = (len(vehicles), cols.max() + 1 if len(cols) > 0 else 0)
+    return rows, cols, shape
+
+
+def propagate_soc(
+    trip_miles,
+    dwell_time,
+    charging_allowed,
+    restart,
+    charging_power,
+    battery_capacity,
+    kwhmi,
+    charging_efficiency,
+):
+    """Propagate the state of charge of all vehicles trip after trip. Trips are laid out
+    as (vehicles x max_trips) arrays, padding trips are never used.
+
+    :param numpy.ndarray trip_miles: miles of each trip.
+    :param numpy.ndarray dwell_time: dwell time after each trip.
+    :param numpy.ndarray charging_allowed: whether the vehicle can charge after each
+        trip.
+    :param numpy.ndarray restart: whether the vehicle starts each trip with a full
+        battery. The first trip of each vehicle always does.
+    :param int/float charging_power: charging power (kW).
+    :param int/float battery_capacity: battery capacity (kWh).
+    :param int/float kwhmi: vehicle electricity consumption (kWh/ mile).
+    :param float charging_efficiency: from grid to battery efficiency.
+    :return: (*dict*) -- (vehicles x max_trips) arrays of trip start/end battery
+        charge, full charge time, charging time and charging consumption.
+    """
+    shape = trip_miles.shape
+    soc = {
+        k: np.zeros(shape)
+        for k in [
+            "trip start battery charge",
+            "trip end battery charge",
+            "full_charge_time",
+            "charging time",
+            "charging consumption",
+        ]
+    }
+    start = soc["trip start battery charge"]
+    end = soc["trip end battery charge"]
+    full_charge_time = soc["full_charge_time"]
+    charging_time = soc["charging time"]
+    consumption = soc["charging consumption"]
+    for j in range(shape[1]):
+        if j == 0:
+            start[:, j] = battery_capacity
+        else:
+            start[:, j] = np.where(
+                restart[:, j],
+                battery_capacity,
+                end[:, j - 1] + consumption[:, j - 1],
+            )
+        end[:, j] = start[:, j] - trip_miles[:, j] * kwhmi * const.ER
+        full_charge_time[:, j] = (battery_capacity - end[:, j]) / (
+            charging_power * charging_efficiency
+        )
+        charging_time[:, j] = charging_allowed[:, j] * np.minimum(
+            full_charge_time[:, j], dwell_time[:, j]
+        )
+        consumption[:, j] = charging_time[:, j] * charging_power * charging_efficiency
+    return soc
+
+
+def calculate_charging(
+    trips,
+    charging_power,
+    battery_capacity,
+    kwhmi,
+    charging_efficiency,
+    restart=None,
+):
+    """Estimate charging and state-of-charge after each trip. Trips of each vehicle
+    are taken in row order.
+
+    :param pandas.DataFrame trips: trip data.
+    :param int/float charging_power: charging power (kW).
+    :param int/float battery_capacity: battery capacity (kWh).
+    :param int/float kwhmi: vehicle electricity consumption (kWh/ mile).
+    :param float charging_efficiency: from grid to battery efficiency.
+    :param pandas.Series restart: boolean, trips starting with a full battery in
+        addition to the first trip of each vehicle. Defaults to None, i.e. only the
+        first trips.
+    :return: (*pandas.DataFrame*) -- trip data with *trip start battery charge*,
+        *trip end battery charge*, *full_charge_time*, *charging time* and *charging
+        consumption* columns.
+    """
+    rows, cols, shape = get_trip_layout(trips)
+
+    def to_array(values, dtype=float):
+        array = np.zeros(shape, dtype=dtype)
+        array[rows, cols] = values
+        return array
+
+    soc = propagate_soc(
+        to_array(trips["trip_miles"].to_numpy(dtype=float)),
+        to_array(trips["dwell_time"].to_numpy(dtype=float)),
+        to_array(trips["charging_allowed"].to_numpy(dtype=bool), bool),
+        to_array(False if restart is None else restart.to_numpy(dtype=bool), bool),
+        charging_power,
+        battery_capacity,
+        kwhmi,
+        charging_efficiency,
+    )
+    for k, v in soc.items():
+        trips[k] = v[rows, cols]
+    return trips
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from prereise.gather.demanddata.transportation_electrification.charging_optimization import (
+    get_battery_constraints,
+    get_programs,
+    solve_programs,
+)
+
+
+def test_get_battery_constraints():
+    a_ub, b_ub = get_battery_constraints([-1, -2, -3], np.array([1, 2, 1]), 10)
+
+    correct_a_ub = -np.array(
+        [
+            [1, 0, 0, 0],
+            [1, 1, 1, 0],
+            [0, 1, 1, 0],
+            [0, 1, 1, 1],
+            [0, 0, 0, 1],
+            [1, 0, 0, 1],
+        ]
+    )
+    assert sparse.issparse(a_ub)
+    np.testing.assert_array_equal(a_ub.toarray(), correct_a_ub)
+    np.testing.assert_array_equal(b_ub, [7, 4, 5, 4, 6, 4])
+
+    a_ub, b_ub = get_battery_constraints([-1], np.array([3]), 10)
+    assert a_ub.shape == (0, 3)
+    assert len(b_ub) == 0
+
+
+def get_test_trips():
+    return pd.DataFrame(
+        {
+            "total_trips": [2, 2, 1, 2, 2],
+            "charging consumption": [-5, -10, -4, -6, -50],
+            "seg": [2, 1, 3, 1, 1],
+            "trip_end": [8.5, 17.2, 20.5, 9.1, 18.3],
+            "dwell_location": [11, 1, 1, 21, 1],
+            "energy limit": [[3, 6], [6], [3, 6, 6], [6], [6]],
+        }
+    )
+
+
+def test_get_programs():
+    programs = get_programs(get_test_trips(), 60)
+    assert [p["start"] for p in programs] == [0, 2, 3]
+    np.testing.assert_array_equal(programs[0]["hours"], [8, 9, 17])
+    np.testing.assert_array_equal(programs[0]["dwell_location"], [11, 11, 1])
+    np.testing.assert_array_equal(programs[1]["hours"], [20, 21, 22])
+    np.testing.assert_array_equal(programs[0]["ub"], [3, 6, 6])
+    assert programs[0]["b_eq"] == 15
+
+
+def test_solve_programs():
+    programs = get_programs(get_test_trips(), 60)
+    cost = np.arange(72, 0, -1, dtype=float)
+
+    results = solve_programs(programs, cost)
+    assert [r[0] for r in results] == [0, 0, 2]
+    # charging happens when it is the cheapest, within energy limits
+    np.testing.assert_allclose(results[0][1], [3, 6, 6])
+    np.testing.assert_allclose(results[1][1], [0, 0, 4])
+    assert results[2][1] is None
+
+    for program, result in zip(programs[:2], results[:2]):
+        single_result = solve_programs([program], cost)[0]
+        np.testing.assert_allclose(single_result[1], result[1])
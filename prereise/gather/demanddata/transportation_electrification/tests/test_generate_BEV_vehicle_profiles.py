@@ -1,6 +1,12 @@
 import os
 
-from prereise.gather.demanddata.transportation_electrification import const
+import numpy as np
+
+from prereise.gather.demanddata.transportation_electrification import (
+    const,
+    generate_BEV_vehicle_profiles,
+    immediate,
+)
 from prereise.gather.demanddata.transportation_electrification.generate_BEV_vehicle_profiles import (
     generate_bev_vehicle_profiles,
 )
@@ -24,3 +30,32 @@ def test_ldv_immediate_runs():
 
     assert len(state_demand_df) == 8760
     assert len(state_demand_df.columns) == 15
+
+
+def test_normalized_demand_is_shared_across_areas(monkeypatch):
+    calls = []
+
+    def immediate_charging(**kwargs):
+        calls.append(kwargs)
+        return np.full(8760, 1 / 8760), None, None
+
+    monkeypatch.setattr(immediate, "immediate_charging", immediate_charging)
+    generate_BEV_vehicle_profiles.get_normalized_demand.cache_clear()
+    try:
+        state_demand_df = generate_bev_vehicle_profiles(
+            vehicle_trip_data_filepath="nhts.mat",
+            charging_strategy="immediate",
+            veh_type="ldv",
+            veh_range=100,
+            projection_year=2017,
+            state="AL",
+        )
+    finally:
+        generate_BEV_vehicle_profiles.get_normalized_demand.cache_clear()
+
+    assert len(calls) == 1
+    assert len(state_demand_df.columns) == 15
+    # areas only differ by their BEV VMT scaling factor
+    profiles = state_demand_df.to_numpy()
+    normalized = profiles / profiles.sum(axis=0)
+    np.testing.assert_allclose(normalized, np.tile(normalized[:, [0]], 15))
@@ -4,6 +4,7 @@ import pandas as pd
 from prereise.gather.demanddata.transportation_electrification.immediate import (  # adjust_bev,
     apply_annual_scaling,
     apply_daily_adjustments,
+    resample_daily_charging,
 )
 
 
@@ -70,3 +71,21 @@ def test_apply_annual_scaling():
     correct_annual_scaling = np.array([20, 60, 40, 40, 80, 20, 18, 22, 20, 20, 50, 30])
 
     assert np.array_equal(scaling_result, correct_annual_scaling)
+
+
+def test_resample_daily_charging():
+    trips = pd.DataFrame(
+        {
+            "trip_end": [0.5, 71.5, 10.25, 10.2],
+            "charging time": [1, 2, 0, 0.6],
+        }
+    )
+
+    resampled = resample_daily_charging(trips, 10)
+
+    correct_resampled = np.zeros(72)
+    # first and last hour are sums from the start of the hour, other hours from the
+    # half hour before
+    correct_resampled[[0, 1, 10, 11, 71]] = [5, 10, 3, 3, 5]
+
+    np.testing.assert_allclose(resampled, correct_resampled)
@@ -0,0 +1,79 @@
+import os
+
+import numpy as np
+
+from prereise.gather.demanddata.transportation_electrification import (
+    const,
+    immediate,
+    immediate_charging_HDV,
+    trip_chain,
+)
+
+test_dir = os.path.dirname(os.path.abspath(__file__))
+
+soc_columns = [
+    "trip start battery charge",
+    "trip end battery charge",
+    "full_charge_time",
+    "charging time",
+    "charging consumption",
+]
+
+
+def calculate_charging_loop(trips, power, battery_capacity, kwhmi, efficiency, restart):
+    """Reference implementation iterating over the trips of each vehicle."""
+    result = {c: {} for c in soc_columns}
+    for _, group in trips.groupby("vehicle_number", sort=False):
+        end = consumption = None
+        for i, trip in group.iterrows():
+            if end is None or restart[i]:
+                start = battery_capacity
+            else:
+                start = end + consumption
+            end = start - trip["trip_miles"] * kwhmi * const.ER
+            full_charge_time = (battery_capacity - end) / (power * efficiency)
+            charging_time = trip["charging_allowed"] * min(
+                full_charge_time, trip["dwell_time"]
+            )
+            consumption = charging_time * power * efficiency
+            for c, v in zip(
+                soc_columns,
+                [start, end, full_charge_time, charging_time, consumption],
+            ):
+                result[c][i] = v
+    return {c: np.array([v[i] for i in trips.index]) for c, v in result.items()}
+
+
+def get_test_trips(veh_type):
+    trips = trip_chain.load_trips(
+        veh_type, os.path.join(test_dir, f"{veh_type}_test_data.csv")
+    )
+    return trip_chain.add_charging_allowed(
+        trips, 1, {1: {1}}, power_allowed=trips["dwell_location"] == 1
+    )
+
+
+def test_calculate_charging_hdv():
+    for veh_type in ["mdv", "hdv"]:
+        trips = get_test_trips(veh_type)
+        # vehicles are not always listed in contiguous rows
+        trips = trips.sample(frac=1, random_state=0)
+        expected = calculate_charging_loop(
+            trips, 19.2, 400, 2, 0.95, trips["trip_number"] == 1
+        )
+        trips = immediate_charging_HDV.calculate_charging(trips, 19.2, 400, 2, 0.95)
+        for c in soc_columns:
+            np.testing.assert_array_equal(trips[c].to_numpy(), expected[c])
+
+
+def test_calculate_charging_immediate():
+    trips = get_test_trips("mdv")
+    expected = calculate_charging_loop(
+        trips, 6.6, 30, 0.3, 0.9, trips["trip_number"] < 0
+    )
+    immediate.calculate_charging(trips, 6.6, 30, 0.3, 0.9)
+    for c in soc_columns:
+        np.testing.assert_array_equal(trips[c].to_numpy(), expected[c])
+    np.testing.assert_array_equal(
+        trips["trip_number"], trips.groupby("vehicle_number").cumcount() + 1
+    )
@@ -0,0 +1,78 @@
+import os
+
+import pandas as pd
+import pytest
+
+from prereise.gather.demanddata.transportation_electrification import trip_chain
+
+test_dir = os.path.dirname(os.path.abspath(__file__))
+
+
+def get_test_trips():
+    return pd.DataFrame(
+        {
+            "vehicle_number": [1, 1, 1, 2, 2, 3, 3],
+            "trip_number": [1, 2, 3, 1, 2, 1, 2],
+            "total_trips": [3, 3, 3, 2, 2, 2, 2],
+            "why_from": [1, 11, 13, 1, 21, 1, 1],
+            "dwell_location": [11, 13, 1, 21, 5, 1, 1],
+            "dwell_time": [8, 0.1, 12, 6, 10, 0.5, 20],
+            "trip_miles": [10, 5, 15, 20, 20, 150, 1],
+            "total vehicle miles traveled": [30, 30, 30, 40, 40, 151, 151],
+        }
+    )
+
+
+def test_filter_cyclical():
+    trips = trip_chain.filter_cyclical(get_test_trips())
+    assert trips["vehicle_number"].tolist() == [1, 1, 1, 3, 3]
+    assert trips.index.tolist() == list(range(5))
+
+
+def test_add_charging_allowed():
+    trips = trip_chain.add_charging_allowed(get_test_trips(), 1, {1: {1}})
+    assert trips["charging_allowed"].tolist() == [0, 0, 1, 0, 0, 1, 1]
+
+    trips = trip_chain.add_charging_allowed(get_test_trips(), 3, {}, trip_strategy=2)
+    assert trips["charging_allowed"].tolist() == [0, 0, 1, 0, 1, 0, 1]
+
+    power_allowed = pd.Series([0, 6.6, 6.6, 6.6, 0, 6.6, 6.6])
+    trips = trip_chain.add_charging_allowed(
+        get_test_trips(), 3, {}, power_allowed=power_allowed
+    )
+    assert trips["charging_allowed"].tolist() == [0, 0, 1, 1, 0, 1, 1]
+
+    with pytest.raises(ValueError):
+        trip_chain.add_charging_allowed(get_test_trips(), 3, {}, trip_strategy=3)
+
+
+def test_add_vehicle_charging():
+    trips = trip_chain.add_charging_allowed(get_test_trips(), 1, {1: {1}})
+    trips = trip_chain.add_vehicle_charging(trips, 10, 0.9, 0.5)
+    assert trips["max_charging"].tolist() == [108] * 3 + [0] * 2 + [184.5] * 2
+    assert trips["required_charging"].tolist() == [15] * 3 + [20] * 2 + [75.5] * 2
+
+    trips = trip_chain.filter_feasible(trips, 100)
+    assert trips["vehicle_number"].tolist() == [1, 1, 1]
+
+
+def test_load_trips_cache(tmp_path):
+    filepath = os.path.join(test_dir, "mdv_test_data.csv")
+    expected = trip_chain.load_trips("MDV", filepath)
+    assert expected["vehicle_number"].dtype == "int64"
+    try:
+        trip_chain.set_cache_dir(str(tmp_path))
+        pd.testing.assert_frame_equal(trip_chain.load_trips("MDV", filepath), expected)
+        assert len(list(tmp_path.glob("mdv_test_data_*_mdv.parquet"))) == 1
+        pd.testing.assert_frame_equal(trip_chain.load_trips("mdv", filepath), expected)
+
+        # a file with the same name elsewhere is not read from the same entry
+        other_dir = tmp_path / "other"
+        other_dir.mkdir()
+        pd.read_csv(filepath).head(20).to_csv(other_dir / "mdv_test_data.csv")
+        other = trip_chain.load_trips("mdv", str(other_dir / "mdv_test_data.csv"))
+        assert len(other) < len(expected)
+        assert len(list(tmp_path.glob("mdv_test_data_*_mdv.parquet"))) == 2
+        assert not list(tmp_path.glob("*.tmp"))
+    finally:
+        trip_chain.set_cache_dir(None)
@@ -0,0 +1,182 @@
+import hashlib
+import os
+import tempfile
+
+import pandas as pd
+
+from prereise.gather.demanddata.transportation_electrification import data_helper
+
+_cache_dir = None
+
+integer_columns = [
+    "vehicle_number",
+    "trip_number",
+    "total_trips",
+    "dwell_location",
+    "why_from",
+    "Day of Week",
+    "If Weekend",
+    "Vehicle type",
+]
+
+
+def set_cache_dir(cache_dir):
+    """Set the directory where preprocessed trips are stored.
+
+    :param str cache_dir: path to a directory, created if it does not exist. If None,
+        trips are preprocessed each time they are loaded.
+    """
+    global _cache_dir
+    if cache_dir is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+    _cache_dir = cache_dir
+
+
+def filter_cyclical(trips):
+    """Keep vehicles whose last trip ends where their first trip starts.
+
+    :param pandas.DataFrame trips: trip data.
+    :return: (*pandas.DataFrame*) -- trip data of cyclical trip chains.
+    """
+    grouped = trips.groupby("vehicle_number", sort=False)
+    start = grouped["why_from"].transform("first")
+    end = grouped["dwell_location"].transform("last")
+    return trips.loc[start == end].reset_index(drop=True)
+
+
+def _read_trips(veh_type, filepath, census_region):
+    if veh_type in {"ldv", "ldt"}:
+        trips = data_helper.load_data(census_region, filepath)
+        if veh_type == "ldv":
+            trips = data_helper.remove_ldt(trips)
+        else:
+            trips = data_helper.remove_ldv(trips)
+        # updates the weekend and weekday values in the nhts data
+        trips = data_helper.update_if_weekend(trips)
+        trips = filter_cyclical(trips)
+    elif veh_type == "mdv":
+        trips = data_helper.load_hdv_data("mhdv", filepath)
+    elif veh_type == "hdv":
+        trips = data_helper.load_hdv_data("hhdv", filepath)
+    else:
+        raise ValueError("veh_type must be one of LDV, LDT, MDV or HDV")
+
+    if "trip_number" not in trips.columns:
+        trips["trip_number"] = trips.groupby("vehicle_number").cumcount() + 1
+    dtypes = {c: "int64" for c in integer_columns if c in trips.columns}
+    return trips.astype(dtypes).reset_index(drop=True)
+
+
+def load_trips(veh_type, filepath, census_region=None):
+    """Load trips of a vehicle category, number trips of each vehicle and, for LDV and
+    LDT, keep cyclical trip chains. MDV and HDV data do not record the origin of the
+    first trip, all their vehicles are kept. When a cache directory is set with
+    :func:`set_cache_dir`, the result is stored in a parquet file per source file,
+    census region and vehicle category and read back as long as the source file is not
+    modified.
+
+    :param str veh_type: vehicle category: LDV, LDT, MDV or HDV.
+    :param str filepath: the path to the trip data file.
+    :param int census_region: any of the 9 census regions defined by US census bureau,
+        ignored for MDV and HDV.
+    :return: (*pandas.DataFrame*) -- trip data.
+    :raises ValueError: if ``veh_type`` is not LDV, LDT, MDV or HDV.
+    """
+    veh_type = veh_type.lower()
+    if veh_type in {"mdv", "hdv"}:
+        census_region = None
+    if _cache_dir is None:
+        return _read_trips(veh_type, filepath, census_region)
+
+    # files with the same name in different directories have distinct entries
+    stem = os.path.splitext(os.path.basename(filepath))[0]
+    digest = hashlib.sha256(os.path.abspath(filepath).encode()).hexdigest()[:12]
+    suffix = "" if census_region is None else f"_{census_region}"
+    cache_path = os.path.join(_cache_dir, f"{stem}_{digest}_{veh_type}{suffix}.parquet")
+    if os.path.isfile(cache_path) and os.path.getmtime(cache_path) >= os.path.getmtime(
+        filepath
+    ):
+        return pd.read_parquet(cache_path)
+    trips = _read_trips(veh_type, filepath, census_region)
+    fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=_cache_dir)
+    os.close(fd)
+    try:
+        trips.to_parquet(tmp_path)
+        os.replace(tmp_path, cache_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return trips
+
+
+def add_charging_allowed(
+    trips, location_strategy, allowed_locations, trip_strategy=1, power_allowed=None
+):
+    """Add booleans for whether each trip allows charging.
+
+    :param pandas.DataFrame trips: trip data.
+    :param int location_strategy: where the vehicle can charge, 3 means anywhere.
+    :param dict allowed_locations: keys are location strategies, values are sets of
+        dwell locations where the vehicle can charge.
+    :param int trip_strategy: determine to charge after any trip (1) or only after the
+        last trip (2).
+    :param pandas.Series power_allowed: additional boolean condition on each trip,
+        e.g. charging power available at the dwell location. Ignored if None.
+    :return: (*pandas.DataFrame*) -- trip data with *location_allowed*,
+        *trip_allowed*, *dwell_allowed* and *charging_allowed* columns.
+    :raises ValueError: if ``trip_strategy`` is neither 1 nor 2.
+    """
+    if location_strategy == 3:
+        trips["location_allowed"] = True
+    else:
+        allowed = allowed_locations[location_strategy]
+        trips["location_allowed"] = trips["dwell_location"].isin(allowed)
+
+    if trip_strategy == 1:
+        trips["trip_allowed"] = True
+    elif trip_strategy == 2:
+        trips["trip_allowed"] = trips["trip_number"] == trips["total_trips"]
+    else:
+        raise ValueError("trip_strategy parameter is not valid, i.e. either 1 or 2")
+
+    trips["dwell_allowed"] = trips["dwell_time"] > 0.2
+
+    charging_allowed = (
+        trips["location_allowed"] & trips["trip_allowed"] & trips["dwell_allowed"]
+    )
+    if power_allowed is not None:
+        charging_allowed &= power_allowed.astype(bool)
+    trips["charging_allowed"] = charging_allowed
+    return trips
+
+
+def add_vehicle_charging(trips, power, charging_efficiency, kwhmi):
+    """Add the energy each vehicle can charge while dwelling and the energy it needs.
+
+    :param pandas.DataFrame trips: trip data with a *charging_allowed* column.
+    :param int/float power: charger power, EVSE kW.
+    :param float charging_efficiency: from grid to battery efficiency.
+    :param int/float kwhmi: vehicle electricity consumption (kWh/ mile).
+    :return: (*pandas.DataFrame*) -- trip data with *dwell_charging*,
+        *max_charging* and *required_charging* columns.
+    """
+    trips["dwell_charging"] = (
+        trips["charging_allowed"] * trips["dwell_time"] * power * charging_efficiency
+    )
+    grouped = trips.groupby("vehicle_number", sort=False)
+    trips["max_charging"] = grouped["dwell_charging"].transform("sum")
+    trips["required_charging"] = grouped["trip_miles"].transform("sum") * kwhmi
+    return trips
+
+
+def filter_feasible(trips, max_miles):
+    """Keep vehicles which can charge enough while dwelling and travel within range.
+
+    :param pandas.DataFrame trips: trip data, output of :func:`add_vehicle_charging`.
+    :param int/float max_miles: vehicle range.
+    :return: (*pandas.DataFrame*) -- trip data of feasible vehicles.
+    """
+    feasible = (trips["required_charging"] <= trips["max_charging"]) & (
+        trips["total vehicle miles traveled"] < max_miles
+    )
+    return trips.loc[feasible].copy()
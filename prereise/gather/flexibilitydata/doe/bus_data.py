@@ -9,9 +9,10 @@ import pandas as pd
 import requests
 from geopy.extra.rate_limiter import RateLimiter
 from geopy.geocoders import Nominatim
-from powersimdata.utility.distance import find_closest_neighbor
 from tqdm import tqdm
 
+from prereise.gather.helpers import find_closest_neighbors
+
 
 def get_bus_pos(grid):
     """Read raw files of synthetic grid and extract the lat/lon coordinate of all buses
@@ -215,29 +216,16 @@ def get_all_bus_eiaid(bus_csv_path, doe_csv_path, cache_path, bus_pos, out_path)
 
     bus_df["eia_id"] = bus_eiaid
 
-    # buses that cannot be identified with LSE
-    bus_pos_ids = bus_pos["bus_id"].tolist()
-    bus_without_lse = bus_df.loc[bus_df["eia_id"] == 0, "bus_id"]
-
-    for i in bus_without_lse:
-        # position of target bus
-        lat, lon = bus_pos.loc[bus_pos_ids.index(i), ["lat", "lon"]].values
-
-        # find all buses in the same load zone as the target bus
-        bus_zone = bus_df.loc[bus_df["bus_id"] == i, "zone_id"].values[0]
-        buses_same_zone = bus_df.loc[
-            (bus_df["zone_id"] == bus_zone) & (bus_df["eia_id"] > 0), "bus_id"
-        ]
-        same_zone_bus_idx = [bus_pos_ids.index(j) for j in buses_same_zone]
-        same_zone_bus_pos = bus_pos.loc[same_zone_bus_idx, ["lat", "lon"]].values
-
-        # find nearest neighbor and assign the same eia id
-        nearest_neighbor_id = bus_pos_ids[
-            same_zone_bus_idx[find_closest_neighbor((lat, lon), same_zone_bus_pos)]
-        ]
-        nearest_neighbor_eiaid = bus_df.loc[
-            bus_df["bus_id"] == nearest_neighbor_id, "eia_id"
-        ].values[0]
-        bus_df.loc[bus_df["bus_id"] == i, "eia_id"] = nearest_neighbor_eiaid
+    # buses that cannot be identified with LSE are assigned the EIA ID of the nearest
+    # identified bus in the same load zone, one batched query per load zone
+    bus_lon_lat = bus_pos.set_index("bus_id")[["lon", "lat"]]
+    identified = bus_df["eia_id"] > 0
+    for zone_id, unidentified in bus_df.loc[~identified].groupby("zone_id"):
+        same_zone = bus_df.loc[identified & (bus_df["zone_id"] == zone_id)]
+        nearest = find_closest_neighbors(
+            bus_lon_lat.loc[unidentified["bus_id"]].values,
+            bus_lon_lat.loc[same_zone["bus_id"]].values,
+        )
+        bus_df.loc[unidentified.index, "eia_id"] = same_zone["eia_id"].values[nearest]
 
     bus_df.to_csv(out_path, index=False)
@@ -2,6 +2,7 @@ import os
 
 import numpy as np
 import pandas as pd
+from scipy.spatial import cKDTree
 
 from prereise.gather.const import abv2state
 
@@ -97,3 +98,44 @@ def get_monthly_net_generation(state, eia_form_923, resource, hps=True):
     eia_net_generation = list(np.nan_to_num(eia_net_generation))
 
     return eia_net_generation
+
+
+def ll2uv(lon, lat):
+    """Convert arrays of (longitude, latitude) to unit vectors.
+
+    :param array-like lon: longitudes (in deg.) measured eastward from Greenwich, UK.
+    :param array-like lat: latitudes (in deg.). Equator is the zero point.
+    :return: (*numpy.ndarray*) -- array of shape (n, 3) holding the (x, y, z)
+        components of the unit vectors.
+    """
+    lon = np.radians(np.asarray(lon, dtype=float)).reshape(-1)
+    lat = np.radians(np.asarray(lat, dtype=float)).reshape(-1)
+    cos_lat = np.cos(lat)
+    return np.column_stack((cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)))
+
+
+def find_closest_neighbors(points, neighbors):
+    """Locate the closest neighbor of each point in a single batched query.
+
+    The great circle distance is monotonic with the chord length between unit
+    vectors, hence a KD-tree built on unit vectors returns the same neighbors as
+    :func:`powersimdata.utility.distance.find_closest_neighbor` for all points at
+    once.
+
+    :param array-like points: (lon, lat) in degrees of the query points.
+    :param array-like neighbors: (lon, lat) in degrees of the potential neighbors.
+    :return: (*numpy.ndarray*) -- index in ``neighbors`` of the closest neighbor of
+        each point.
+    :raises ValueError: if ``neighbors`` is empty.
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    neighbors = np.asarray(neighbors, dtype=float).reshape(-1, 2)
+    if len(neighbors) == 0:
+        raise ValueError("neighbors must contain at least one location")
+    if len(points) == 0:
+        return np.array([], dtype=int)
+
+    tree = cKDTree(ll2uv(neighbors[:, 0], neighbors[:, 1]))
+    _, indices = tree.query(ll2uv(points[:, 0], points[:, 1]))
+
+    return indices
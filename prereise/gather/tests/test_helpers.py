@@ -1,6 +1,7 @@
 import pytest
+from powersimdata.utility.distance import find_closest_neighbor
 
-from prereise.gather.helpers import get_monthly_net_generation
+from prereise.gather.helpers import find_closest_neighbors, get_monthly_net_generation
 from prereise.gather.tests.mock_generation import create_mock_generation_data_frame
 
 
@@ -44,3 +45,18 @@ def test_get_monthly_net_generation():
 
     for i in range(8):
         assert res[i] == [i + 1] * 12
+
+
+def test_find_closest_neighbors():
+    neighbors = [(-118.24, 34.05), (-95.37, 29.76), (-74.01, 40.71)]
+    points = [(-73.5, 41.0), (-117.0, 33.0), (-96.0, 30.0), (-100.0, 45.0)]
+    expected = [find_closest_neighbor(p, neighbors) for p in points]
+    assert (
+        find_closest_neighbors(points, neighbors).tolist() == expected == [2, 0, 1, 1]
+    )
+
+
+def test_find_closest_neighbors_empty():
+    assert len(find_closest_neighbors([], [(0, 0)])) == 0
+    with pytest.raises(ValueError):
+        find_closest_neighbors([(0, 0)], [])